@@ -0,0 +1,81 @@
+"""add progress rollups
+
+Revision ID: a1c3e5f7b901
+Revises: 
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f7b901'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_progress_rollups',
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('chapters_started', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completed_chapters', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_completion', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('current_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('longest_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_activity_at', sa.DateTime(timezone=True)),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        'user_subject_rollups',
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('subject', sa.String(), primary_key=True),
+        sa.Column('chapters_started', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completed_chapters', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_completion', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('total_score', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('test_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    # Backfill from the existing progress rows
+    op.execute("""
+        INSERT INTO user_progress_rollups
+            (user_id, chapters_started, completed_chapters, total_completion,
+             current_streak, longest_streak, last_activity_at)
+        SELECT user_id,
+               COUNT(*),
+               SUM(CASE WHEN is_completed THEN 1 ELSE 0 END),
+               COALESCE(SUM(completion_percentage), 0),
+               COALESCE(MAX(current_streak), 0),
+               COALESCE(MAX(longest_streak), 0),
+               MAX(last_accessed_at)
+        FROM learning_progress
+        GROUP BY user_id
+    """)
+    op.execute("""
+        INSERT INTO user_subject_rollups
+            (user_id, subject, chapters_started, completed_chapters, total_completion,
+             total_score, test_count)
+        SELECT lp.user_id,
+               c.subject,
+               COUNT(*),
+               SUM(CASE WHEN lp.is_completed THEN 1 ELSE 0 END),
+               COALESCE(SUM(lp.completion_percentage), 0),
+               SUM(CASE WHEN lp.test_attempts > 0 THEN lp.highest_score ELSE 0 END),
+               SUM(CASE WHEN lp.test_attempts > 0 THEN 1 ELSE 0 END)
+        FROM learning_progress lp
+        JOIN chapters c ON c.id = lp.chapter_id
+        GROUP BY lp.user_id, c.subject
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_subject_rollups')
+    op.drop_table('user_progress_rollups')
@@ -0,0 +1,82 @@
+"""add user activity calendars
+
+Revision ID: a7c9e1f3b562
+Revises: f6b8d0e2a451
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from datetime import timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c9e1f3b562'
+down_revision: Union[str, None] = 'f6b8d0e2a451'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _longest_run(bits: int) -> int:
+    longest = 0
+    while bits:
+        bits &= bits >> 1
+        longest += 1
+    return longest
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    calendars = op.create_table(
+        'user_activity_calendars',
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('start_day', sa.Date(), nullable=False),
+        sa.Column('days', sa.LargeBinary(), nullable=False),
+        sa.Column('longest_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_active_day', sa.Date()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    # Backfill from the activity we still know about: last access per chapter,
+    # test attempt days and the days covered by each chapter's current streak
+    connection = op.get_bind()
+    activity = {}
+    for user_id, day in connection.execute(sa.text("""
+        SELECT user_id, CAST(last_accessed_at AS DATE) FROM learning_progress WHERE last_accessed_at IS NOT NULL
+        UNION
+        SELECT user_id, CAST(attempted_at AS DATE) FROM test_attempts
+    """)):
+        activity.setdefault(user_id, set()).add(day)
+
+    longest_recorded = {}
+    for user_id, last_day, streak, longest in connection.execute(sa.text("""
+        SELECT user_id, CAST(last_streak_date AS DATE), current_streak, longest_streak
+        FROM learning_progress
+        WHERE last_streak_date IS NOT NULL
+    """)):
+        days = activity.setdefault(user_id, set())
+        days.update(last_day - timedelta(days=offset) for offset in range(streak or 0))
+        longest_recorded[user_id] = max(longest_recorded.get(user_id, 0), longest or 0)
+
+    rows = []
+    for user_id, days in activity.items():
+        start = min(days)
+        bits = 0
+        for day in days:
+            bits |= 1 << (day - start).days
+        rows.append({
+            'user_id': user_id,
+            'start_day': start,
+            'days': bits.to_bytes((bits.bit_length() + 7) // 8, 'little'),
+            'longest_streak': max(_longest_run(bits), longest_recorded.get(user_id, 0)),
+            'last_active_day': max(days),
+        })
+    if rows:
+        op.bulk_insert(calendars, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_activity_calendars')
@@ -0,0 +1,148 @@
+"""normalize test attempts
+
+Revision ID: b2d4f6a8c013
+Revises: a1c3e5f7b901
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d4f6a8c013'
+down_revision: Union[str, None] = 'a1c3e5f7b901'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+learning_progress = sa.table(
+    'learning_progress',
+    sa.column('user_id', sa.String),
+    sa.column('chapter_id', sa.String),
+    sa.column('test_history', sa.JSON),
+)
+test_attempts = sa.table(
+    'test_attempts',
+    sa.column('id', sa.String),
+    sa.column('user_id', sa.String),
+    sa.column('chapter_id', sa.String),
+    sa.column('attempted_at', sa.DateTime(timezone=True)),
+    sa.column('score', sa.Float),
+    sa.column('total_questions', sa.Integer),
+    sa.column('correct_answers', sa.Integer),
+)
+test_attempt_questions = sa.table(
+    'test_attempt_questions',
+    sa.column('attempt_id', sa.String),
+    sa.column('position', sa.Integer),
+    sa.column('detail', sa.JSON),
+)
+
+
+def _parse_attempted_at(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'test_attempts',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('chapter_id', sa.String(), sa.ForeignKey('chapters.id'), nullable=False),
+        sa.Column('attempted_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('total_questions', sa.Integer(), nullable=False),
+        sa.Column('correct_answers', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint('user_id', 'chapter_id', 'attempted_at', name='uq_test_attempts_user_chapter_attempted'),
+    )
+    op.create_index('ix_test_attempts_user_attempted', 'test_attempts', ['user_id', 'attempted_at'])
+    op.create_table(
+        'test_attempt_questions',
+        sa.Column('attempt_id', sa.String(), sa.ForeignKey('test_attempts.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('position', sa.Integer(), primary_key=True),
+        sa.Column('detail', sa.JSON(), nullable=False),
+    )
+
+    # Move the JSON history into the new tables
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(learning_progress.c.user_id, learning_progress.c.chapter_id, learning_progress.c.test_history)
+        .where(learning_progress.c.test_history.isnot(None))
+    )
+    attempts, questions, seen = [], [], set()
+    for user_id, chapter_id, history in rows:
+        for entry in history or []:
+            attempted_at = _parse_attempted_at(entry['attempted_at'])
+            key = (user_id, chapter_id, attempted_at)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            attempt_id = str(uuid.uuid4())
+            attempts.append({
+                'id': attempt_id,
+                'user_id': user_id,
+                'chapter_id': chapter_id,
+                'attempted_at': attempted_at,
+                'score': entry.get('score', 0.0),
+                'total_questions': entry.get('total_questions', 0),
+                'correct_answers': entry.get('correct_answers', 0),
+            })
+            questions.extend(
+                {'attempt_id': attempt_id, 'position': position, 'detail': detail}
+                for position, detail in enumerate(entry.get('questions_attempted') or [])
+            )
+
+            if len(attempts) >= BATCH_SIZE:
+                op.bulk_insert(test_attempts, attempts)
+                if questions:
+                    op.bulk_insert(test_attempt_questions, questions)
+                attempts, questions = [], []
+
+    if attempts:
+        op.bulk_insert(test_attempts, attempts)
+    if questions:
+        op.bulk_insert(test_attempt_questions, questions)
+
+    op.drop_column('learning_progress', 'test_history')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('learning_progress', sa.Column('test_history', sa.JSON(), nullable=True))
+    op.execute("""
+        UPDATE learning_progress lp
+        SET test_history = h.history
+        FROM (
+            SELECT ta.user_id,
+                   ta.chapter_id,
+                   json_agg(json_build_object(
+                       'score', ta.score,
+                       'total_questions', ta.total_questions,
+                       'correct_answers', ta.correct_answers,
+                       'attempted_at', ta.attempted_at,
+                       'questions_attempted', COALESCE(
+                           (SELECT json_agg(q.detail ORDER BY q.position)
+                            FROM test_attempt_questions q
+                            WHERE q.attempt_id = ta.id),
+                           '[]'::json
+                       )
+                   ) ORDER BY ta.attempted_at) AS history
+            FROM test_attempts ta
+            GROUP BY ta.user_id, ta.chapter_id
+        ) h
+        WHERE lp.user_id = h.user_id AND lp.chapter_id = h.chapter_id
+    """)
+    op.drop_table('test_attempt_questions')
+    op.drop_index('ix_test_attempts_user_attempted', table_name='test_attempts')
+    op.drop_table('test_attempts')
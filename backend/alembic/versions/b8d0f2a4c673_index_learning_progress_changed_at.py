@@ -0,0 +1,30 @@
+"""index learning progress by change time
+
+Revision ID: b8d0f2a4c673
+Revises: a7c9e1f3b562
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d0f2a4c673'
+down_revision: Union[str, None] = 'a7c9e1f3b562'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_learning_progress_changed_at', 'learning_progress', [sa.text('coalesce(updated_at, created_at)')]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_learning_progress_changed_at', table_name='learning_progress')
@@ -0,0 +1,109 @@
+"""unique learning progress per user and chapter
+
+Revision ID: d4f6b8c0e237
+Revises: c3e5a7b9d125
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f6b8c0e237'
+down_revision: Union[str, None] = 'c3e5a7b9d125'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fold duplicate rows into the oldest row of each (user_id, chapter_id)
+    op.execute("""
+        WITH merged AS (
+            SELECT user_id,
+                   chapter_id,
+                   (ARRAY_AGG(id ORDER BY created_at NULLS LAST, id))[1] AS keep_id,
+                   BOOL_OR(COALESCE(is_completed, false)) AS is_completed,
+                   MAX(completion_percentage) AS completion_percentage,
+                   MAX(completed_sections) AS completed_sections,
+                   MAX(last_accessed_at) AS last_accessed_at,
+                   SUM(COALESCE(test_attempts, 0)) AS test_attempts,
+                   MAX(highest_score) AS highest_score,
+                   MAX(current_streak) AS current_streak,
+                   MAX(longest_streak) AS longest_streak,
+                   MAX(last_streak_date) AS last_streak_date
+            FROM learning_progress
+            GROUP BY user_id, chapter_id
+            HAVING COUNT(*) > 1
+        )
+        UPDATE learning_progress lp
+        SET is_completed = m.is_completed,
+            completion_percentage = m.completion_percentage,
+            completed_sections = m.completed_sections,
+            last_accessed_at = m.last_accessed_at,
+            test_attempts = m.test_attempts,
+            highest_score = m.highest_score,
+            current_streak = m.current_streak,
+            longest_streak = m.longest_streak,
+            last_streak_date = m.last_streak_date,
+            updated_at = now()
+        FROM merged m
+        WHERE lp.id = m.keep_id
+    """)
+    # Rank rather than compare (created_at, id) pairs: a NULL created_at makes the comparison NULL
+    op.execute("""
+        DELETE FROM learning_progress lp
+        USING (
+            SELECT id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY user_id, chapter_id ORDER BY created_at NULLS LAST, id
+                   ) AS position
+            FROM learning_progress
+        ) ranked
+        WHERE lp.id = ranked.id
+          AND ranked.position > 1
+    """)
+    op.create_unique_constraint(
+        'uq_learning_progress_user_chapter', 'learning_progress', ['user_id', 'chapter_id']
+    )
+
+    # Rollups were counted over the duplicates; recompute them
+    op.execute("DELETE FROM user_subject_rollups")
+    op.execute("DELETE FROM user_progress_rollups")
+    op.execute("""
+        INSERT INTO user_progress_rollups
+            (user_id, chapters_started, completed_chapters, total_completion,
+             current_streak, longest_streak, last_activity_at)
+        SELECT user_id,
+               COUNT(*),
+               SUM(CASE WHEN is_completed THEN 1 ELSE 0 END),
+               COALESCE(SUM(completion_percentage), 0),
+               COALESCE(MAX(current_streak), 0),
+               COALESCE(MAX(longest_streak), 0),
+               MAX(last_accessed_at)
+        FROM learning_progress
+        GROUP BY user_id
+    """)
+    op.execute("""
+        INSERT INTO user_subject_rollups
+            (user_id, subject, chapters_started, completed_chapters, total_completion,
+             total_score, test_count)
+        SELECT lp.user_id,
+               c.subject,
+               COUNT(*),
+               SUM(CASE WHEN lp.is_completed THEN 1 ELSE 0 END),
+               COALESCE(SUM(lp.completion_percentage), 0),
+               SUM(CASE WHEN lp.test_attempts > 0 THEN lp.highest_score ELSE 0 END),
+               SUM(CASE WHEN lp.test_attempts > 0 THEN 1 ELSE 0 END)
+        FROM learning_progress lp
+        JOIN chapters c ON c.id = lp.chapter_id
+        GROUP BY lp.user_id, c.subject
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_learning_progress_user_chapter', 'learning_progress', type_='unique')
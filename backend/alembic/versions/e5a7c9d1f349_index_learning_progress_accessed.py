@@ -0,0 +1,30 @@
+"""index learning progress by user and last access
+
+Revision ID: e5a7c9d1f349
+Revises: d4f6b8c0e237
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c9d1f349'
+down_revision: Union[str, None] = 'd4f6b8c0e237'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_learning_progress_user_accessed', 'learning_progress', ['user_id', 'last_accessed_at']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_learning_progress_user_accessed', table_name='learning_progress')
@@ -0,0 +1,31 @@
+"""add progress rollup version
+
+Revision ID: f6b8d0e2a451
+Revises: e5a7c9d1f349
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b8d0e2a451'
+down_revision: Union[str, None] = 'e5a7c9d1f349'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'user_progress_rollups',
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='1')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user_progress_rollups', 'version')
@@ -0,0 +1,147 @@
+"""Compare embedding throughput: Ollama over HTTP against the in-process ONNX engine.
+
+Each backend runs three workloads over chunk-sized texts:
+
+- single: one query at a time (latency of an isolated search);
+- concurrent: --threads handlers embedding queries at once, as during a
+  busy hour of Q&A and search; the ONNX engine batches these together;
+- bulk: embed_documents over --bulk texts, as when a chapter is ingested.
+
+The Ollama backend talks to EMBEDDING_BASE_URL (or --ollama-url); with
+--fake-ollama it uses the local fake from benchmarks/fakes.py instead,
+which measures client and transport overhead only. The ONNX backend loads
+--onnx-dir (EMBEDDING_ONNX_DIR by default). Backends that cannot be
+reached or loaded are skipped.
+
+Usage (from backend/):
+    python -m benchmarks.embedding_throughput
+    python -m benchmarks.embedding_throughput --onnx-dir models/nomic-embed-text --threads 32 --batch-size 64
+    python -m benchmarks.embedding_throughput --fake-ollama --only onnx ollama
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from .offline_suite import WORDS
+
+
+def make_texts(count: int, words: int = 80) -> List[str]:
+    """Distinct pseudo-text of roughly one chunk (about 500 characters) each."""
+    return [
+        " ".join(WORDS[(i * 7 + j * (i % 5 + 1)) % len(WORDS)] for j in range(words)) + f" {i}"
+        for i in range(count)
+    ]
+
+
+def run_workloads(embeddings, args) -> Dict[str, Dict[str, float]]:
+    queries = make_texts(args.queries, words=12)
+    documents = make_texts(args.bulk)
+    embeddings.embed_query("warm up")
+
+    latencies = []
+    for text in queries[:args.single]:
+        started = time.perf_counter()
+        embeddings.embed_query(text)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        started = time.perf_counter()
+        list(pool.map(embeddings.embed_query, queries))
+        concurrent_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    embeddings.embed_documents(documents)
+    bulk_seconds = time.perf_counter() - started
+
+    return {
+        "single": {"p50_ms": statistics.median(latencies), "p95_ms": latencies[max(0, int(len(latencies) * 0.95) - 1)]},
+        "concurrent": {"texts_per_second": len(queries) / concurrent_seconds},
+        "bulk": {"texts_per_second": len(documents) / bulk_seconds},
+    }
+
+
+def ollama_backend(args) -> Callable[[], object]:
+    def create():
+        from src.config import EMBEDDING_MODEL, EMBEDDING_BASE_URL
+        from src.pooled_embeddings import PooledOllamaEmbeddings
+
+        embeddings = PooledOllamaEmbeddings(model=EMBEDDING_MODEL, base_url=EMBEDDING_BASE_URL)
+        embeddings.embed_query("ping")  # Fail early when the server is down
+        return embeddings
+    return create
+
+
+def onnx_backend(args) -> Callable[[], object]:
+    def create():
+        from src.onnx_embeddings import OnnxEmbeddings
+
+        return OnnxEmbeddings(model_dir=args.onnx_dir, batch_size=args.batch_size, batch_wait_ms=args.batch_wait_ms)
+    return create
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=["ollama", "onnx"], default=["ollama", "onnx"])
+    parser.add_argument("--ollama-url", help="Embedding server to use instead of EMBEDDING_BASE_URL")
+    parser.add_argument("--fake-ollama", action="store_true", help="Use the local fake embedding server")
+    parser.add_argument("--onnx-dir", help="Directory with model.onnx and tokenizer.json")
+    parser.add_argument("--batch-size", type=int, help="ONNX texts per forward pass")
+    parser.add_argument("--batch-wait-ms", type=float, help="ONNX batching window")
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent handlers in the concurrent workload")
+    parser.add_argument("--single", type=int, default=50, help="Sequential queries in the single workload")
+    parser.add_argument("--queries", type=int, default=400, help="Queries in the concurrent workload")
+    parser.add_argument("--bulk", type=int, default=256, help="Documents in the bulk workload")
+    args = parser.parse_args()
+
+    fakes = None
+    if args.fake_ollama:
+        from .fakes import FakeServices
+
+        fakes = FakeServices().start()
+        os.environ["EMBEDDING_BASE_URL"] = fakes.url
+    elif args.ollama_url:
+        os.environ["EMBEDDING_BASE_URL"] = args.ollama_url
+    # Settings are read at import time, so these must be in place before `src` is imported
+    from src.config import EMBEDDING_ONNX_DIR, EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WAIT_MS
+
+    args.onnx_dir = args.onnx_dir or EMBEDDING_ONNX_DIR
+    args.batch_size = args.batch_size or EMBEDDING_BATCH_SIZE
+    args.batch_wait_ms = EMBEDDING_BATCH_WAIT_MS if args.batch_wait_ms is None else args.batch_wait_ms
+
+    backends = {"ollama": ollama_backend(args), "onnx": onnx_backend(args)}
+    results = {}
+    try:
+        for name in args.only:
+            try:
+                embeddings = backends[name]()
+            except Exception as e:
+                print(f"{name:>7}: skipped ({str(e)})")
+                continue
+            results[name] = run_workloads(embeddings, args)
+            if hasattr(embeddings, "close"):
+                embeddings.close()
+    finally:
+        if fakes is not None:
+            fakes.stop()
+
+    if not results:
+        sys.exit("No embedding backend was available")
+    print(f"\n{'backend':>7} {'single p50 ms':>14} {'single p95 ms':>14} {'concurrent texts/s':>19} {'bulk texts/s':>13}")
+    for name, result in results.items():
+        print(
+            f"{name:>7} {result['single']['p50_ms']:14.2f} {result['single']['p95_ms']:14.2f} "
+            f"{result['concurrent']['texts_per_second']:19.1f} {result['bulk']['texts_per_second']:13.1f}"
+        )
+    if len(results) == 2:
+        for workload in ("concurrent", "bulk"):
+            ratio = results["onnx"][workload]["texts_per_second"] / results["ollama"][workload]["texts_per_second"]
+            print(f"onnx / ollama {workload} throughput: {ratio:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""Deterministic local stand-ins for the services the backend calls.
+
+One threaded HTTP server answers, on a single port:
+
+- Ollama embeddings (POST /api/embeddings): a fixed unit vector derived
+  from a hash of the text, so the same text always embeds the same way.
+- Groq / OpenAI chat completions (POST /openai/v1/chat/completions): a
+  canned answer, or a JSON array of MCQs for test generation prompts,
+  after `llm_latency` seconds plus `completion_tokens / llm_tokens_per_second`.
+- Supabase PostgREST for the vector store: upserts into and selects
+  (by id list or created_at, paged in id order, with exact counts) from
+  /rest/v1/document_embeddings,
+  and cosine search through /rest/v1/rpc/match_documents, held in memory
+  with NumPy.
+- Supabase auth (/auth/v1/signup, /token, /user, /logout) with users held
+  in memory; access tokens are opaque and resolve to their user.
+
+Progress data is not faked: benchmarks point DATABASE_URL at a local
+database (SQLite by default).
+"""
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+EMBEDDING_DIM = 768
+MCQ_REQUEST = re.compile(r"Generate (\d+) multiple choice questions")
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """Unit vector seeded by the text's hash."""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def _token(user_id: str) -> str:
+    """JWT-shaped opaque token; only this server interprets it."""
+    def part(data: Dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+    return ".".join([part({"alg": "none", "typ": "JWT"}), part({"sub": user_id, "n": uuid.uuid4().hex}), "fake"])
+
+
+class FakeStore:
+    """In-memory vector table and auth users."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.lock = threading.Lock()
+        self.dim = dim
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.matrix = np.empty((0, dim), dtype=np.float32)
+        self.row_ids: List[str] = []
+        self.users: Dict[str, Dict[str, Any]] = {}  # email -> user
+        self.tokens: Dict[str, str] = {}  # access token -> email
+
+    def upsert(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self.lock:
+            for row in rows:
+                row_id = str(row.get("id") or uuid.uuid4())
+                row = {**row, "id": row_id}
+                if row_id not in self.rows:
+                    self.row_ids.append(row_id)
+                    # Column default, set on insert only
+                    row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+                else:
+                    row.setdefault("created_at", self.rows[row_id].get("created_at"))
+                self.rows[row_id] = row
+            self.matrix = np.array([self.rows[row_id]["embedding"] for row_id in self.row_ids], dtype=np.float32).reshape(-1, self.dim)
+        return [{key: value for key, value in row.items() if key != "embedding"} for row in rows]
+
+    def select(
+        self,
+        columns: List[str],
+        ids: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """(page of rows, rows matching before paging)."""
+        with self.lock:
+            rows = [self.rows[row_id] for row_id in ids if row_id in self.rows] if ids is not None else [self.rows[row_id] for row_id in sorted(self.rows)]
+        if since is not None:
+            rows = [row for row in rows if datetime.fromisoformat(row["created_at"]) >= datetime.fromisoformat(since)]
+        total = len(rows)
+        rows = rows[offset:None if limit is None else offset + limit]
+        return [row if columns == ["*"] else {column: row.get(column) for column in columns} for row in rows], total
+
+    def delete(self, row_id: str):
+        with self.lock:
+            if self.rows.pop(row_id, None) is not None:
+                self.row_ids.remove(row_id)
+                self.matrix = np.array([self.rows[i]["embedding"] for i in self.row_ids], dtype=np.float32).reshape(-1, self.dim)
+
+    def match(self, query: List[float], limit: int) -> List[Dict[str, Any]]:
+        with self.lock:
+            matrix, row_ids = self.matrix, list(self.row_ids)
+        if not row_ids:
+            return []
+        # Stored vectors are unit length, so the dot product is the cosine similarity
+        scores = matrix @ np.asarray(query, dtype=np.float32)
+        top = np.argsort(-scores)[:limit]
+        return [
+            {
+                "id": row_ids[i],
+                "content": self.rows[row_ids[i]]["content"],
+                "metadata": self.rows[row_ids[i]].get("metadata") or {},
+                "similarity": float(scores[i]),
+            }
+            for i in top
+        ]
+
+    def user_json(self, email: str) -> Dict[str, Any]:
+        user = self.users[email]
+        return {
+            "id": user["id"],
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": email,
+            "app_metadata": user["app_metadata"],
+            "user_metadata": user["user_metadata"],
+            "created_at": user["created_at"],
+        }
+
+    def sign_up(self, email: str, password: str, data: Dict[str, Any], user_id: Optional[str] = None, role: str = "student") -> Dict[str, Any]:
+        with self.lock:
+            if email not in self.users:
+                self.users[email] = {
+                    "id": user_id or str(uuid.uuid4()),
+                    "password": password,
+                    "app_metadata": {"provider": "email", "role": role},
+                    "user_metadata": data or {},
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                }
+        return self.user_json(email)
+
+    def sign_in(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        user = self.users.get(email)
+        if user is None or user["password"] != password:
+            return None
+        token = _token(user["id"])
+        with self.lock:
+            self.tokens[token] = email
+        return {
+            "access_token": token,
+            "refresh_token": uuid.uuid4().hex,
+            "token_type": "bearer",
+            "expires_in": 3600,
+            "user": self.user_json(email),
+        }
+
+    def user_for(self, token: str) -> Optional[Dict[str, Any]]:
+        email = self.tokens.get(token)
+        return self.user_json(email) if email else None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real services
+    disable_nagle_algorithm = True  # Headers and body are separate writes; don't add delayed-ACK stalls
+    server: "FakeServices"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/auth/v1/user":
+            token = (self.headers.get("Authorization") or "").removeprefix("Bearer ")
+            user = self.server.store.user_for(token)
+            if user is None:
+                return self._send(401, {"code": 401, "msg": "invalid JWT"})
+            return self._send(200, user)
+        if url.path == "/rest/v1/document_embeddings":
+            query = parse_qs(url.query)
+            ids = query.get("id", [None])[0]
+            since = query.get("created_at", [None])[0]
+            offset = int(query.get("offset", ["0"])[0])
+            rows, total = self.server.store.select(
+                [column.strip() for column in query.get("select", ["*"])[0].split(",")],
+                ids=[value.strip('"') for value in ids[len("in.("):-1].split(",")] if ids else None,
+                since=since[len("gte."):] if since else None,
+                offset=offset,
+                limit=int(query["limit"][0]) if "limit" in query else None,
+            )
+            headers = {}
+            if "count=exact" in (self.headers.get("Prefer") or ""):
+                headers["Content-Range"] = f"{offset}-{offset + len(rows) - 1}/{total}" if rows else f"*/{total}"
+            return self._send(200, rows, headers)
+        self._send(404, {"message": f"No fake for GET {url.path}"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        body = self._body()
+        store = self.server.store
+
+        if url.path == "/api/embeddings":
+            return self._send(200, {"embedding": fake_embedding(body["prompt"], store.dim)})
+
+        if url.path.endswith("/chat/completions"):
+            return self._send(200, self.server.complete(body))
+
+        if url.path == "/rest/v1/rpc/match_documents":
+            limit = int(query.get("limit", ["4"])[0])
+            return self._send(200, store.match(body["query_embedding"], limit))
+
+        if url.path.startswith("/rest/v1/"):
+            rows = body if isinstance(body, list) else [body]
+            return self._send(201, store.upsert(rows))
+
+        if url.path == "/auth/v1/signup":
+            user = store.sign_up(body["email"], body["password"], body.get("data"))
+            return self._send(200, user)
+
+        if url.path == "/auth/v1/token":
+            session = store.sign_in(body.get("email"), body.get("password"))
+            if session is None:
+                return self._send(400, {"error": "invalid_grant", "error_description": "Invalid login credentials"})
+            return self._send(200, session)
+
+        if url.path == "/auth/v1/logout":
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self._send(404, {"message": f"No fake for POST {url.path}"})
+
+
+class FakeServices(ThreadingHTTPServer):
+    """The fake embedding server, LLM provider and Supabase, on one local port."""
+
+    daemon_threads = True
+
+    def __init__(self, llm_latency: float = 0.2, llm_tokens_per_second: float = 500.0, answer_tokens: int = 120, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.store = FakeStore()
+        self.llm_latency = llm_latency
+        self.llm_tokens_per_second = llm_tokens_per_second
+        self.answer_tokens = answer_tokens
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeServices":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-services", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def complete(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+        mcq = MCQ_REQUEST.search(prompt)
+        if mcq:
+            count = int(mcq.group(1))
+            content = json.dumps([
+                {
+                    "question": f"Question {i + 1} about the chapter?",
+                    "options": {"A": "First", "B": "Second", "C": "Third", "D": "Fourth"},
+                    "correct_answer": "ABCD"[i % 4],
+                    "explanation": "Because the chapter says so.",
+                }
+                for i in range(count)
+            ])
+        else:
+            content = " ".join(["answer"] * self.answer_tokens)
+        completion_tokens = max(1, len(content) // 4)
+        prompt_tokens = max(1, len(prompt) // 4)
+
+        time.sleep(self.llm_latency + completion_tokens / self.llm_tokens_per_second)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
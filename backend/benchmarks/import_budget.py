@@ -0,0 +1,118 @@
+"""Check that importing the app stays fast and never loads the ML stacks.
+
+Imports src.main in fresh interpreters (default and API_ONLY=true) and
+fails when:
+
+- the best of --repeat import times exceeds --budget-ms,
+- peak RSS after the import exceeds --rss-budget-mb, or
+- any heavy module (TTS, torch, LangChain, Groq, ONNX Runtime, PyMuPDF,
+  audio I/O) was imported; these belong behind the learning components,
+  loaded on first use.
+
+The slowest modules from `python -X importtime` are listed to show where
+the time goes. Settings are dummies: nothing is contacted at import time.
+
+Usage (from backend/):
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --budget-ms 1500 --top 30
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .offline_suite import FAKE_SUPABASE_KEY
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = (
+    "TTS", "torch", "sounddevice", "soundfile", "fitz",
+    "langchain", "langchain_core", "langchain_community", "langchain_groq", "groq",
+    "onnxruntime", "tokenizers",
+)
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import src.main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "import_ms": elapsed * 1000,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": sorted({name.split(".")[0] for name in sys.modules}),
+}))
+"""
+
+
+def _env(api_only: bool) -> Dict[str, str]:
+    env = os.environ.copy()
+    env.update(
+        SUPABASE_URL="http://127.0.0.1:9",
+        SUPABASE_KEY=FAKE_SUPABASE_KEY,
+        SUPABASE_JWT_SECRET="budget",
+        SECRET_KEY="budget",
+        DATABASE_URL="sqlite://",
+        API_ONLY="true" if api_only else "false",
+        LEARNING_PRELOAD="false",
+    )
+    return env
+
+
+def probe(api_only: bool) -> Dict[str, object]:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=_env(api_only),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(api_only: bool, top: int) -> List[Tuple[int, str]]:
+    """(cumulative microseconds, module) of the slowest imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"], cwd=BACKEND_DIR, env=_env(api_only),
+        capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=3000.0, help="Largest allowed import time")
+    parser.add_argument("--rss-budget-mb", type=float, default=250.0, help="Largest allowed peak RSS after import")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    failures = []
+    for api_only in (False, True):
+        label = "API_ONLY" if api_only else "default"
+        runs = [probe(api_only) for _ in range(args.repeat)]
+        best = min(run["import_ms"] for run in runs)
+        rss = max(run["max_rss_mb"] for run in runs)
+        heavy = sorted(set(runs[0]["modules"]) & set(HEAVY_MODULES))
+        print(f"{label:>9}: import {best:8.1f} ms  peak RSS {rss:7.1f} MB  heavy modules: {', '.join(heavy) or 'none'}")
+        if best > args.budget_ms:
+            failures.append(f"{label} import took {best:.0f} ms (budget {args.budget_ms:.0f} ms)")
+        if rss > args.rss_budget_mb:
+            failures.append(f"{label} peak RSS {rss:.0f} MB (budget {args.rss_budget_mb:.0f} MB)")
+        if heavy:
+            failures.append(f"{label} import loaded {', '.join(heavy)}")
+
+    print("\nSlowest imports (cumulative):")
+    for cumulative, name in slowest_imports(False, args.top):
+        print(f"{cumulative / 1000:9.1f} ms  {name}")
+
+    if failures:
+        print("\nOver budget:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,523 @@
+"""Drive a running app with many concurrent students and report per-endpoint latency.
+
+Unless --url points at an app that is already running, this starts the
+fakes from benchmarks/fakes.py in their own process, seeds a throwaway
+SQLite database (or --database-url), and serves --app with uvicorn in a
+subprocess configured against both; the app's output goes to a log file
+that is shown if it fails to start. With --url, the app's auth backend must
+already know the students (studentN@example.com, password "load-password").
+Students sign in once, then send a weighted mix of requests:
+
+    auth_login, auth_me, ask, search, test, explain, progress_read, progress_write
+
+Two load models are supported:
+
+- closed loop (default): --ramp values are numbers of concurrent students,
+  each sending its next request when the previous one finishes (plus
+  --think-ms, exponentially distributed);
+- open loop (--open): --ramp values are arrival rates in requests per
+  second, with Poisson arrivals. Latency is measured from the scheduled
+  arrival, so a backed-up server is not hidden by a slower client.
+
+Each ramp step runs for --duration seconds and reports throughput, p50, p95,
+p99 and error rate per endpoint. To find where event-loop blocking begins,
+every step also reads the app's aischool_event_loop_lag_seconds histogram
+from /metrics (loopback, or --internal-token) and times a /health probe
+every 100 ms. The first step whose loop lag p99 exceeds --lag-threshold-ms
+is reported as the onset of blocking. With more than one uvicorn worker,
+/metrics answers from whichever worker takes the scrape, so keep
+--workers 1 when hunting for blocking.
+
+The explain endpoint is called with save_audio=true, so the server writes
+narration files instead of playing audio.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --ramp 10 50 100 250 500 --duration 20
+    python -m benchmarks.load_test --open --ramp 20 50 100 --mix progress_read=60 progress_write=40
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --ramp 50 --save load.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .offline_suite import BENCH_CHAPTERS, SUBJECTS, WORDS, configure, seed_progress_db
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+STUDENT_PASSWORD = "load-password"
+LAG_METRIC = "aischool_event_loop_lag_seconds"
+QUESTIONS = (
+    "How does energy relate to motion?",
+    "What is a cell made of?",
+    "Why did the empire trade along the river?",
+    "How do you add a fraction to a number?",
+)
+
+
+def student(i: int) -> Tuple[str, str]:
+    """(user id, email) of the i-th load test student."""
+    return f"load-student-{i}", f"student{i}@example.com"
+
+
+def _serve_fakes(conn, llm_latency: float, llm_tokens_per_second: float, students: int):
+    """Fakes process: sign up the students, seed chapter vectors, then serve until stopped."""
+    from .fakes import FakeServices, fake_embedding
+
+    fakes = FakeServices(llm_latency=llm_latency, llm_tokens_per_second=llm_tokens_per_second)
+    for i in range(students):
+        user_id, email = student(i)
+        fakes.store.sign_up(email, STUDENT_PASSWORD, {"full_name": f"Student {i}"}, user_id=user_id)
+    rows = []
+    for chapter in range(BENCH_CHAPTERS):
+        for chunk in range(20):
+            content = " ".join(WORDS[(chapter * 5 + chunk * 3 + word) % len(WORDS)] for word in range(150))
+            rows.append({
+                "content": content,
+                "metadata": {"chapter_id": f"bench-chapter-{chapter}", "chunk": chunk},
+                "embedding": fake_embedding(content, fakes.store.dim),
+            })
+    fakes.store.upsert(rows)
+    conn.send(fakes.url)
+    fakes.serve_forever()
+
+
+def seed_students(students: int):
+    """Database rows for the students, so progress writes satisfy foreign keys."""
+    from src.database.database import SessionLocal
+    from src.database.models import User
+
+    db = SessionLocal()
+    try:
+        for i in range(students):
+            user_id, email = student(i)
+            if not db.get(User, user_id):
+                db.add(User(id=user_id, email=email, hashed_password="-"))
+        db.commit()
+    finally:
+        db.close()
+
+
+class Student:
+    def __init__(self, index: int):
+        self.user_id, self.email = student(index)
+        self.headers: Dict[str, str] = {}
+
+
+# Each endpoint: (default weight, request). Weights are relative.
+Request = Callable[[httpx.AsyncClient, Student, random.Random], Awaitable[httpx.Response]]
+
+
+def _chapter(rng: random.Random) -> str:
+    return f"bench-chapter-{rng.randrange(BENCH_CHAPTERS)}"
+
+
+def _progress_read(client: httpx.AsyncClient, user: Student, rng: random.Random) -> Awaitable[httpx.Response]:
+    view = rng.randrange(3)
+    if view == 0:
+        return client.get("/progress/summary", headers=user.headers)
+    if view == 1:
+        return client.get(f"/progress/subjects/{rng.choice(SUBJECTS)}", headers=user.headers)
+    return client.get("/progress/chapters", params={"size": 20}, headers=user.headers)
+
+
+ENDPOINTS: Dict[str, Tuple[float, Request]] = {
+    "auth_login": (2, lambda client, user, rng: client.post(
+        "/auth/login", json={"email": user.email, "password": STUDENT_PASSWORD}
+    )),
+    "auth_me": (5, lambda client, user, rng: client.get("/auth/me", headers=user.headers)),
+    "ask": (10, lambda client, user, rng: client.post(
+        f"/learning/chapters/{_chapter(rng)}/ask", params={"question": rng.choice(QUESTIONS)}
+    )),
+    "search": (13, lambda client, user, rng: client.get(
+        "/learning/search", params={"query": rng.choice(QUESTIONS), "k": 4}
+    )),
+    "test": (5, lambda client, user, rng: client.post(
+        f"/learning/chapters/{_chapter(rng)}/test", params={"num_questions": 5}
+    )),
+    "explain": (5, lambda client, user, rng: client.post(
+        "/learning/explain", params={"text": rng.choice(QUESTIONS), "save_audio": "true"}
+    )),
+    "progress_read": (35, _progress_read),
+    "progress_write": (25, lambda client, user, rng: client.put(
+        f"/progress/chapters/{_chapter(rng)}",
+        json={"completion_percentage": float(rng.randrange(101))}, headers=user.headers
+    )),
+}
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+
+    def record(self, seconds: float, error: Optional[str]):
+        self.latencies.append(seconds)
+        if error:
+            self.errors[error] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, object]:
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+        return {
+            "requests": count,
+            "throughput_rps": count / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(ordered, 0.50) * 1000,
+            "p95_ms": percentile(ordered, 0.95) * 1000,
+            "p99_ms": percentile(ordered, 0.99) * 1000,
+            "error_rate": sum(self.errors.values()) / count if count else 0.0,
+            "errors": dict(self.errors.most_common(5)),
+        }
+
+
+class LagMonitor:
+    """Sleep overshoot of this process's event loop, to tell a slow app from a saturated client."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.lags: List[float] = []
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            deadline = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - deadline))
+
+
+def parse_buckets(text: str, metric: str) -> Dict[float, float]:
+    """Cumulative bucket counts of an unlabelled Prometheus histogram."""
+    pattern = re.compile(rf'^{metric}_bucket\{{le="([^"]+)"\}} (\S+)$', re.MULTILINE)
+    return {float(le): float(count) for le, count in pattern.findall(text)}
+
+
+def bucket_quantile(before: Dict[float, float], after: Dict[float, float], q: float) -> Optional[float]:
+    """Upper bound of the bucket holding quantile `q` of the observations made between two scrapes."""
+    deltas = sorted((le, after[le] - before.get(le, 0.0)) for le in after)
+    total = deltas[-1][1] if deltas else 0.0
+    if total <= 0:
+        return None
+    for le, cumulative in deltas:
+        if cumulative >= q * total:
+            return le
+    return deltas[-1][0]
+
+
+async def scrape_lag(client: httpx.AsyncClient, token: Optional[str]) -> Optional[Dict[float, float]]:
+    try:
+        response = await client.get("/metrics", headers={"X-Internal-Token": token} if token else {})
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200:
+        return None
+    return parse_buckets(response.text, LAG_METRIC) or None
+
+
+async def health_probe(client: httpx.AsyncClient, samples: List[float]):
+    while True:
+        started = time.perf_counter()
+        try:
+            await client.get("/health")
+            samples.append(time.perf_counter() - started)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.1)
+
+
+async def sign_in(client: httpx.AsyncClient, users: List[Student], parallel: int = 20):
+    gate = asyncio.Semaphore(parallel)
+
+    async def one(user: Student):
+        async with gate:
+            response = await client.post("/auth/login", json={"email": user.email, "password": STUDENT_PASSWORD})
+            response.raise_for_status()
+            user.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    await asyncio.gather(*(one(user) for user in users))
+
+
+async def run_step(client: httpx.AsyncClient, users: List[Student], mix: Dict[str, float], level: float, args) -> Dict[str, object]:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    stats = {name: EndpointStats() for name in names}
+    dropped = 0
+
+    async def issue(name: str, user: Student, rng: random.Random, scheduled: float):
+        error = None
+        try:
+            response = await ENDPOINTS[name][1](client, user, rng)
+            if response.status_code >= 400:
+                error = str(response.status_code)
+        except httpx.HTTPError as e:
+            error = type(e).__name__
+        stats[name].record(time.perf_counter() - scheduled, error)
+
+    async def closed_loop_student(index: int, end: float):
+        rng = random.Random(args.seed * 100003 + index)
+        user = users[index % len(users)]
+        while time.perf_counter() < end:
+            await issue(rng.choices(names, weights)[0], user, rng, time.perf_counter())
+            if args.think_ms:
+                await asyncio.sleep(rng.expovariate(1000 / args.think_ms))
+
+    async def open_loop(end: float):
+        nonlocal dropped
+        rng = random.Random(args.seed)
+        in_flight = set()
+        scheduled = time.perf_counter()
+        while True:
+            scheduled += rng.expovariate(level)
+            if scheduled >= end:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= args.max_in_flight:
+                dropped += 1
+                continue
+            task = asyncio.create_task(issue(rng.choices(names, weights)[0], rng.choice(users), rng, scheduled))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+    lag_before = await scrape_lag(client, args.internal_token)
+    probe_samples: List[float] = []
+    client_lag = LagMonitor()
+    background = [asyncio.create_task(health_probe(client, probe_samples)), asyncio.create_task(client_lag.run())]
+
+    started = time.perf_counter()
+    end = started + args.duration
+    try:
+        if args.open:
+            await open_loop(end)
+        else:
+            await asyncio.gather(*(closed_loop_student(i, end) for i in range(int(level))))
+    finally:
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+    elapsed = time.perf_counter() - started
+
+    lag_after = await scrape_lag(client, args.internal_token)
+    server_lag = bucket_quantile(lag_before or {}, lag_after, 0.99) if lag_after else None
+    all_stats = EndpointStats()
+    for endpoint in stats.values():
+        all_stats.latencies.extend(endpoint.latencies)
+        all_stats.errors.update(endpoint.errors)
+    probe_samples.sort()
+    client_lag.lags.sort()
+    return {
+        "level": level,
+        "elapsed_s": elapsed,
+        "dropped": dropped,
+        "endpoints": {name: stats[name].summary(elapsed) for name in names if stats[name].latencies},
+        "total": all_stats.summary(elapsed),
+        "server_loop_lag_p99_ms": server_lag * 1000 if server_lag is not None else None,
+        "health_p99_ms": percentile(probe_samples, 0.99) * 1000 if probe_samples else None,
+        "client_loop_lag_p99_ms": percentile(client_lag.lags, 0.99) * 1000 if client_lag.lags else None,
+    }
+
+
+def _ms(value: Optional[float]) -> str:
+    return "       -" if value is None or math.isnan(value) else f"{value:8.1f}"
+
+
+def print_step(step: Dict[str, object], unit: str):
+    print(f"\n== {step['level']:g} {unit} for {step['elapsed_s']:.1f}s ==")
+    print(f"{'endpoint':>16} {'reqs':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}  top errors")
+    rows = list(step["endpoints"].items()) + [("TOTAL", step["total"])]
+    for name, summary in rows:
+        top = ", ".join(f"{error} x{count}" for error, count in summary["errors"].items())
+        print(
+            f"{name:>16} {summary['requests']:7d} {summary['throughput_rps']:8.1f} {_ms(summary['p50_ms'])} "
+            f"{_ms(summary['p95_ms'])} {_ms(summary['p99_ms'])} {summary['error_rate']:7.1%}  {top}"
+        )
+    print(
+        f"server loop lag p99 <= {_ms(step['server_loop_lag_p99_ms']).strip()} ms   "
+        f"/health p99 {_ms(step['health_p99_ms']).strip()} ms   "
+        f"client loop lag p99 {_ms(step['client_loop_lag_p99_ms']).strip()} ms"
+        + (f"   dropped arrivals {step['dropped']}" if step["dropped"] else "")
+    )
+    if (step["client_loop_lag_p99_ms"] or 0) > 50:
+        print("warning: the load generator's own loop is lagging; client-side latencies are inflated")
+
+
+def find_blocking(steps: List[Dict[str, object]], threshold_ms: float) -> Optional[Dict[str, object]]:
+    """First step whose server loop lag (or, without /metrics, /health p99) exceeds the threshold."""
+    for step in steps:
+        lag = step["server_loop_lag_p99_ms"]
+        if lag is None:
+            lag = step["health_p99_ms"]
+        if lag is not None and lag > threshold_ms:
+            return step
+    return None
+
+
+async def run_load(args, mix: Dict[str, float], base_url: str) -> List[Dict[str, object]]:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        users = [Student(i) for i in range(args.students)]
+        if "auth_me" in mix or "progress_read" in mix or "progress_write" in mix:
+            await sign_in(client, users)
+        steps = []
+        for level in args.ramp:
+            step = await run_step(client, users, mix, level, args)
+            print_step(step, "req/s" if args.open else "concurrent students")
+            steps.append(step)
+        return steps
+
+
+def start_app(args, port: int, log_path: Path) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "uvicorn", args.app,
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    with open(log_path, "wb") as log:
+        return subprocess.Popen(command, cwd=BACKEND_DIR, env=os.environ.copy(), stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_until_ready(base_url: str, server: subprocess.Popen, log_path: Path, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            tail = log_path.read_text(errors="replace").splitlines()[-20:]
+            raise RuntimeError(f"App exited with status {server.returncode} before becoming ready:\n" + "\n".join(tail))
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"App at {base_url} was not ready after {timeout:.0f}s")
+
+
+def _free_port() -> int:
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def parse_mix(values: Optional[List[str]]) -> Dict[str, float]:
+    if not values:
+        return {name: weight for name, (weight, _) in ENDPOINTS.items()}
+    mix = {}
+    for value in values:
+        name, _, weight = value.partition("=")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or ENDPOINTS[name][0])
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Load an already running app instead of starting one")
+    parser.add_argument("--app", default="src.main:app", help="uvicorn app to start when --url is not given")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the started app")
+    parser.add_argument("--database-url", help="Migrated database to use instead of a throwaway SQLite file")
+    parser.add_argument("--mix", nargs="+", metavar="ENDPOINT=WEIGHT", help="Endpoints and relative weights")
+    parser.add_argument("--open", action="store_true", help="Open loop: --ramp values are arrival rates (req/s)")
+    parser.add_argument("--ramp", type=float, nargs="+", default=[10, 50, 100], help="Load levels, run in order")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per ramp step")
+    parser.add_argument("--students", type=int, default=500, help="Distinct signed-in students")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between a student's requests")
+    parser.add_argument("--max-in-flight", type=int, default=2000, help="Open loop: arrivals beyond this are dropped")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--lag-threshold-ms", type=float, default=50.0, help="Loop lag p99 that counts as blocking")
+    parser.add_argument("--internal-token", default=os.getenv("INTERNAL_API_TOKEN"), help="For /metrics")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="Fake LLM time to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=500.0, help="Fake LLM generation rate")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", type=Path, help="Write the results to this JSON file")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    fakes_process = server = None
+    try:
+        with tempfile.TemporaryDirectory(prefix="load-test-") as workdir:
+            if args.url:
+                base_url = args.url.rstrip("/")
+            else:
+                context = multiprocessing.get_context("spawn")
+                receiver, sender = context.Pipe(duplex=False)
+                fakes_process = context.Process(
+                    target=_serve_fakes, daemon=True,
+                    args=(sender, args.llm_latency_ms / 1000, args.llm_tokens_per_second, args.students),
+                )
+                fakes_process.start()
+                configure(receiver.recv(), args.database_url or f"sqlite:///{workdir}/progress.db")
+                seed_progress_db()
+                seed_students(args.students)
+
+                port = _free_port()
+                base_url = f"http://127.0.0.1:{port}"
+                log_path = Path(workdir) / "app.log"
+                server = start_app(args, port, log_path)
+                wait_until_ready(base_url, server, log_path)
+
+            steps = asyncio.run(run_load(args, mix, base_url))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if fakes_process is not None:
+            fakes_process.terminate()
+
+    unit = "req/s" if args.open else "concurrent students"
+    blocking = find_blocking(steps, args.lag_threshold_ms)
+    if blocking:
+        print(f"\nEvent loop blocking begins at {blocking['level']:g} {unit} (loop lag p99 > {args.lag_threshold_ms:g} ms)")
+    else:
+        print(f"\nNo event loop blocking above {args.lag_threshold_ms:g} ms up to {steps[-1]['level']:g} {unit}")
+
+    if args.save:
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "settings": {
+                "app": args.url or args.app,
+                "workers": args.workers,
+                "mode": "open" if args.open else "closed",
+                "duration_s": args.duration,
+                "students": args.students,
+                "think_ms": args.think_ms,
+                "mix": mix,
+                "llm_latency_ms": args.llm_latency_ms,
+                "llm_tokens_per_second": args.llm_tokens_per_second,
+            },
+            "blocking_level": blocking["level"] if blocking else None,
+            "steps": steps,
+        }
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Saved results to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Benchmark the learning pipeline, progress endpoints and auth without live services.
+
+Ollama, Groq and Supabase are replaced by the deterministic fakes in
+benchmarks/fakes.py, and progress data lives in a throwaway SQLite database
+unless --database-url points at a migrated one. SQLite runs need the
+aiosqlite driver for the async engine.
+
+Each benchmark runs once to warm up, then --repeat times sequentially.
+Results can be saved as a JSON baseline and later runs compared against
+it; the comparison exits non-zero when a benchmark's median is slower than
+the baseline by more than --tolerance.
+
+Usage (from backend/):
+    python -m benchmarks.offline_suite --save benchmarks/baselines/offline.json
+    python -m benchmarks.offline_suite --compare benchmarks/baselines/offline.json --tolerance 0.2
+    python -m benchmarks.offline_suite --only rag_ask progress_summary --llm-latency-ms 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+from .fakes import FakeServices
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+BENCH_USER_ID = "bench-user"
+BENCH_CHAPTERS = 30
+SUBJECTS = ("math", "science", "history")
+FAKE_SUPABASE_KEY = "bench.fake.key"  # Must look like a JWT to pass supabase-py's check
+
+WORDS = (
+    "energy", "matter", "cell", "equation", "history", "empire", "river", "force", "motion", "light",
+    "atom", "fraction", "triangle", "climate", "plant", "trade", "language", "number", "system", "reaction",
+)
+
+
+def configure(fakes_url: str, database_url: str):
+    """Point the backend's settings at the fakes; must run before `src` is imported."""
+    os.environ.update(
+        SUPABASE_URL=fakes_url,
+        SUPABASE_KEY=FAKE_SUPABASE_KEY,
+        SUPABASE_JWT_SECRET="bench",
+        SECRET_KEY="bench",
+        GROQ_API_KEY="bench",
+        GROQ_BASE_URL=fakes_url,
+        EMBEDDING_BASE_URL=fakes_url,
+        DATABASE_URL=database_url,
+    )
+    # Measure the pipeline, not the provider rate budget
+    os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000")
+    os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "1000000000")
+
+
+def write_pdf(path: Path, pages: int):
+    """A PDF of deterministic pseudo-text, about 2,500 characters per page."""
+    import fitz
+
+    doc = fitz.open()
+    for page_number in range(pages):
+        page = doc.new_page()
+        lines = [
+            " ".join(WORDS[(page_number * 7 + line * 3 + word) % len(WORDS)] for word in range(12)) + "."
+            for line in range(40)
+        ]
+        page.insert_textbox(page.rect + (36, 36, -36, -36), "\n".join(lines), fontsize=9)
+    doc.save(str(path))
+
+
+def seed_progress_db():
+    """Create the schema (SQLite) and the benchmark user's chapters and progress."""
+    from src.database.database import engine, SessionLocal, Base
+    from src.database.models import User, Chapter
+    from src.learning.progress_service import ProgressService
+    from src.learning.schemas import LearningProgressUpdate
+
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(engine)
+
+    db = SessionLocal()
+    try:
+        if not db.get(User, BENCH_USER_ID):
+            db.add(User(id=BENCH_USER_ID, email=BENCH_EMAIL, hashed_password="-"))
+        for i in range(BENCH_CHAPTERS):
+            chapter_id = f"bench-chapter-{i}"
+            if not db.get(Chapter, chapter_id):
+                db.add(Chapter(id=chapter_id, title=f"Benchmark chapter {i}", subject=SUBJECTS[i % len(SUBJECTS)]))
+        db.commit()
+
+        service = ProgressService(db)
+        for i in range(BENCH_CHAPTERS):
+            service.update_progress(
+                BENCH_USER_ID,
+                f"bench-chapter-{i}",
+                LearningProgressUpdate(completion_percentage=float(i * 3 % 100), is_completed=i % 4 == 0)
+            )
+    finally:
+        db.close()
+
+
+def build_app():
+    """The auth and progress routers, without the ML-heavy learning router."""
+    from fastapi import FastAPI
+    from src.auth.router import router as auth_router
+    from src.learning.progress_router import router as progress_router
+    from src.profiling import ServerTimingMiddleware
+
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+    app.include_router(auth_router)
+    app.include_router(progress_router)
+    return app
+
+
+async def measure(run: Callable[[], Awaitable[object]], repeat: int) -> Dict[str, float]:
+    """Latency summary in milliseconds over `repeat` sequential runs, after one warm-up."""
+    await run()
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await run()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "runs": repeat,
+        "p50_ms": statistics.median(samples),
+        "p95_ms": samples[max(0, int(len(samples) * 0.95) - 1)],
+        "mean_ms": statistics.fmean(samples),
+        "min_ms": samples[0],
+    }
+
+
+async def run_suite(args, workdir: Path) -> Dict[str, Dict[str, float]]:
+    import httpx
+    from src.learning.embeddings import PDFEmbedder
+    from src.learning.rag import RAGChatbot
+    from src.learning.test_generation import TestGenerator
+    from src.database.database import async_engine
+    from src.clients import close_clients
+
+    pdf_path = workdir / "bench-chapter.pdf"
+    write_pdf(pdf_path, args.pdf_pages)
+
+    embedder = PDFEmbedder()
+    rag = RAGChatbot()
+    test_generator = TestGenerator()
+
+    # The vector store needs content before Q&A and test generation are meaningful
+    await embedder.process_pdf(pdf_path, {"chapter_id": "bench-chapter-0"})
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=build_app()), base_url="http://bench")
+    login = await client.post("/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    login.raise_for_status()
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    async def ok(request: Awaitable[httpx.Response]):
+        response = await request
+        response.raise_for_status()
+        return response
+
+    counter = iter(range(10 ** 9))
+    benchmarks: Dict[str, Callable[[], Awaitable[object]]] = {
+        "pdf_ingest": lambda: embedder.process_pdf(pdf_path, {"chapter_id": "bench-chapter-0"}),
+        "rag_ask": lambda: rag.ask_question("How does energy relate to motion?"),
+        "test_generation": lambda: test_generator.generate_chapter_test("bench-chapter-0", args.questions),
+        "progress_update": lambda: ok(client.put(
+            f"/progress/chapters/bench-chapter-{next(counter) % BENCH_CHAPTERS}",
+            json={"completion_percentage": 50.0}, headers=headers
+        )),
+        "progress_summary": lambda: ok(client.get("/progress/summary", headers=headers)),
+        "progress_subject": lambda: ok(client.get(f"/progress/subjects/{SUBJECTS[0]}", headers=headers)),
+        "progress_chapters_page": lambda: ok(client.get("/progress/chapters", params={"size": 20}, headers=headers)),
+        "auth_login": lambda: ok(client.post("/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})),
+        "auth_me": lambda: ok(client.get("/auth/me", headers=headers)),
+    }
+
+    results = {}
+    try:
+        for name, run in benchmarks.items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = await measure(run, args.repeat)
+            print(
+                f"{name:>24}: p50 {results[name]['p50_ms']:9.2f} ms  "
+                f"p95 {results[name]['p95_ms']:9.2f} ms  mean {results[name]['mean_ms']:9.2f} ms"
+            )
+    finally:
+        await client.aclose()
+        await close_clients()
+        await async_engine.dispose()
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """Print the change in median latency against a baseline; returns the regressed benchmarks."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:>24}: not in baseline")
+            continue
+        change = result["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        regressed = change > tolerance
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:>24}: p50 {before['p50_ms']:9.2f} -> {result['p50_ms']:9.2f} ms  "
+            f"({change:+.1%}){'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--only", nargs="+", help="Run only these benchmarks")
+    parser.add_argument("--database-url", help="Migrated database to use instead of a throwaway SQLite file")
+    parser.add_argument("--pdf-pages", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="Fake LLM time to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=500.0, help="Fake LLM generation rate")
+    parser.add_argument("--save", type=Path, help="Write the results to this JSON baseline")
+    parser.add_argument("--compare", type=Path, help="Compare the results with this JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed median slowdown, as a fraction")
+    args = parser.parse_args()
+
+    fakes = FakeServices(llm_latency=args.llm_latency_ms / 1000, llm_tokens_per_second=args.llm_tokens_per_second).start()
+    fakes.store.sign_up(BENCH_EMAIL, BENCH_PASSWORD, {"full_name": "Bench User"}, user_id=BENCH_USER_ID)
+    try:
+        with tempfile.TemporaryDirectory(prefix="offline-bench-") as workdir:
+            configure(fakes.url, args.database_url or f"sqlite:///{workdir}/progress.db")
+            seed_progress_db()
+            results = asyncio.run(run_suite(args, Path(workdir)))
+    finally:
+        fakes.stop()
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": {
+            "repeat": args.repeat,
+            "pdf_pages": args.pdf_pages,
+            "questions": args.questions,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_tokens_per_second": args.llm_tokens_per_second,
+        },
+        "results": results,
+    }
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline.get("settings") != report["settings"]:
+            print(f"Warning: baseline settings differ: {baseline.get('settings')}")
+        if compare(results, baseline["results"], args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Compare offset and keyset pagination of test attempts at increasing depth.
+
+Offset pagination counts the whole result and skips `offset` rows on every
+page, so its cost grows with depth. Keyset pagination seeks to the cursor
+through the (user_id, attempted_at) index and reads one page.
+
+Usage (from backend/):
+    python -m benchmarks.pagination_depth --seed 50000 --depths 0 1000 10000 45000
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from src.database.database import SessionLocal
+from src.database.models import User, Chapter, ChapterTestAttempt
+from src.pagination import paginate_query, paginate_keyset, encode_cursor
+
+BENCH_USER_ID = "bench-user"
+BENCH_CHAPTER_ID = "bench-chapter-0"
+BATCH_SIZE = 5000
+
+
+def seed(attempts: int):
+    """Give the benchmark user `attempts` test attempts."""
+    db = SessionLocal()
+    try:
+        if not db.get(User, BENCH_USER_ID):
+            db.add(User(id=BENCH_USER_ID, email="bench@example.com", hashed_password="-"))
+        if not db.get(Chapter, BENCH_CHAPTER_ID):
+            db.add(Chapter(id=BENCH_CHAPTER_ID, title="Benchmark chapter 0", subject="subject-0"))
+        db.commit()
+
+        existing = db.query(ChapterTestAttempt).filter(ChapterTestAttempt.user_id == BENCH_USER_ID).count()
+        start = datetime(2024, 1, 1)
+        for offset in range(existing, attempts, BATCH_SIZE):
+            db.add_all([
+                ChapterTestAttempt(
+                    user_id=BENCH_USER_ID,
+                    chapter_id=BENCH_CHAPTER_ID,
+                    attempted_at=start + timedelta(minutes=i),
+                    score=float(i % 100),
+                    total_questions=10,
+                    correct_answers=i % 11
+                )
+                for i in range(offset, min(offset + BATCH_SIZE, attempts))
+            ])
+            db.commit()
+    finally:
+        db.close()
+
+
+def attempts_query(db):
+    return db.query(ChapterTestAttempt).filter(ChapterTestAttempt.user_id == BENCH_USER_ID)
+
+
+def timed(fetch: Callable[[], None], repeat: int) -> float:
+    """Median milliseconds over `repeat` runs."""
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fetch()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="Seed the benchmark user with this many attempts")
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1000, 10000])
+    parser.add_argument("--size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.seed)
+
+    order_by = [ChapterTestAttempt.attempted_at, ChapterTestAttempt.id]
+    db = SessionLocal()
+    try:
+        for depth in args.depths:
+            # The cursor a client would hold after paging down to `depth`
+            cursor = None
+            if depth:
+                boundary = attempts_query(db).order_by(
+                    *(column.desc() for column in order_by)
+                ).offset(depth - 1).first()
+                if boundary is None:
+                    print(f"depth {depth:>7}: beyond the seeded attempts")
+                    continue
+                cursor = encode_cursor([getattr(boundary, column.key) for column in order_by])
+
+            page = depth // args.size + 1
+            offset_ms = timed(lambda: paginate_query(
+                attempts_query(db).order_by(ChapterTestAttempt.attempted_at.desc()), page, args.size
+            ), args.repeat)
+            keyset_ms = timed(lambda: paginate_keyset(
+                attempts_query(db), order_by, cursor, args.size
+            ), args.repeat)
+            estimate_ms = timed(lambda: paginate_keyset(
+                attempts_query(db), order_by, cursor, args.size, count="estimate"
+            ), args.repeat)
+            print(
+                f"depth {depth:>7}: offset {offset_ms:8.2f} ms  keyset {keyset_ms:8.2f} ms  "
+                f"keyset+estimate {estimate_ms:8.2f} ms"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Compare progress-summary throughput on the sync and async database paths.
+
+The sync path reproduces the old handlers: an `async def` endpoint calling
+the blocking ProgressService on the event loop. The async path uses
+AsyncProgressService over the async engine.
+
+Usage (from backend/):
+    python -m benchmarks.progress_db_concurrency --seed 200 --requests 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from src.database.database import SessionLocal, AsyncSessionLocal, async_engine
+from src.database.models import User, Chapter
+from src.learning.progress_service import ProgressService, AsyncProgressService
+from src.learning.schemas import LearningProgressUpdate
+
+BENCH_USER_ID = "bench-user"
+
+
+def seed(chapters: int) -> str:
+    """Create a benchmark user with progress on `chapters` chapters."""
+    db = SessionLocal()
+    try:
+        if not db.get(User, BENCH_USER_ID):
+            db.add(User(id=BENCH_USER_ID, email="bench@example.com", hashed_password="-"))
+        for i in range(chapters):
+            chapter_id = f"bench-chapter-{i}"
+            if not db.get(Chapter, chapter_id):
+                db.add(Chapter(id=chapter_id, title=f"Benchmark chapter {i}", subject=f"subject-{i % 5}"))
+        db.commit()
+
+        service = ProgressService(db)
+        for i in range(chapters):
+            service.update_progress(
+                BENCH_USER_ID,
+                f"bench-chapter-{i}",
+                LearningProgressUpdate(completion_percentage=float(i % 100), is_completed=i % 4 == 0)
+            )
+        return BENCH_USER_ID
+    finally:
+        db.close()
+
+
+async def sync_request(user_id: str):
+    db = SessionLocal()
+    try:
+        ProgressService(db).get_user_progress_summary(user_id)
+    finally:
+        db.close()
+
+
+async def async_request(user_id: str):
+    async with AsyncSessionLocal() as db:
+        await AsyncProgressService(db).get_user_progress_summary(user_id)
+
+
+async def run(request: Callable[[str], Awaitable[None]], user_id: str, total: int, concurrency: int) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await request(user_id)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    # Pooled async connections are bound to this event loop
+    await async_engine.dispose()
+
+    latencies.sort()
+    return {
+        "throughput_rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", help="Existing user to summarise (default: seeded benchmark user)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed a benchmark user with this many chapters")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    user_id = args.user_id or BENCH_USER_ID
+    if args.seed:
+        user_id = seed(args.seed)
+
+    for name, request in (("sync", sync_request), ("async", async_request)):
+        result = asyncio.run(run(request, user_id, args.requests, args.concurrency))
+        print(
+            f"{name:>5}: {result['throughput_rps']:8.1f} req/s  "
+            f"p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Measure what quantized vector search saves in memory and loses in recall.
+
+For each scheme (int8 and binary, as in src/quantization.py) the benchmark
+reports, against exact float32 cosine search over the same vectors:
+
+- bytes per vector held in worker memory and the saving over float32;
+- recall@k of the first pass alone (codes only);
+- recall@k after rescoring the best k * factor candidates with the
+  full-precision vectors, for each --factors value (VECTOR_RESCORE_FACTOR);
+- first-pass latency per query next to exact search.
+
+Vectors are synthetic by default: unit vectors grouped around topics,
+sharing a common direction as real text embeddings do. Pass --vectors with
+an .npy matrix of real chunk embeddings (e.g. exported from
+document_embeddings) for numbers that reflect the stored chapters; queries
+are then perturbed copies of randomly chosen rows.
+
+Usage (from backend/):
+    python -m benchmarks.quantization_recall
+    python -m benchmarks.quantization_recall --documents 200000 --k 5 --factors 2 5 10 20
+    python -m benchmarks.quantization_recall --vectors embeddings.npy
+"""
+import argparse
+import statistics
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from src.quantization import QUANTIZATION_MODES, QuantizedIndex, top_indices
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_vectors(count: int, dim: int, topics: int, rng: np.random.Generator) -> np.ndarray:
+    common = rng.standard_normal(dim)
+    centers = rng.standard_normal((topics, dim))
+    assignment = rng.integers(0, topics, count)
+    return normalize(0.3 * common + centers[assignment] + 0.8 * rng.standard_normal((count, dim)))
+
+
+def make_queries(documents: np.ndarray, count: int, noise: float, rng: np.random.Generator) -> np.ndarray:
+    """Queries near stored chunks, as a question is near the passage that answers it."""
+    picked = documents[rng.integers(0, len(documents), count)]
+    return normalize(picked + noise * rng.standard_normal(picked.shape) / np.sqrt(documents.shape[1]))
+
+
+def recall(found: List[np.ndarray], exact: List[np.ndarray]) -> float:
+    return statistics.mean(len(set(f.tolist()) & set(e.tolist())) / len(e) for f, e in zip(found, exact))
+
+
+def evaluate(mode: str, documents: np.ndarray, queries: np.ndarray, exact: List[np.ndarray], k: int, factors: List[int]) -> Dict[str, object]:
+    index = QuantizedIndex(mode)
+    index.add([str(i) for i in range(len(documents))], documents)
+
+    started = time.perf_counter()
+    candidates = [np.array([int(row_id) for row_id in index.candidates(query, k * max(factors))]) for query in queries]
+    first_pass_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    rescored = {}
+    for factor in factors:
+        found = []
+        for query, ranked in zip(queries, candidates):
+            shortlist = ranked[:k * factor]
+            found.append(shortlist[top_indices(documents[shortlist] @ query, k)])
+        rescored[factor] = recall(found, exact)
+    return {
+        "bytes_per_vector": index.nbytes / len(documents),
+        "first_pass_recall": recall([ranked[:k] for ranked in candidates], exact),
+        "rescored_recall": rescored,
+        "first_pass_ms": first_pass_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", help=".npy matrix of real embeddings to use instead of synthetic ones")
+    parser.add_argument("--documents", type=int, default=50000, help="Synthetic chunk vectors")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--topics", type=int, default=200, help="Synthetic topic clusters")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=1.0, help="Query distance from its source chunk")
+    parser.add_argument("--k", type=int, default=3, help="Results per search, as in the Q&A endpoints")
+    parser.add_argument("--factors", type=int, nargs="+", default=[1, 2, 5, 10, 20], help="Rescore factors to compare")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.vectors:
+        documents = normalize(np.load(args.vectors).astype(np.float32))
+    else:
+        documents = synthetic_vectors(args.documents, args.dim, args.topics, rng)
+    queries = make_queries(documents, args.queries, args.noise, rng)
+
+    started = time.perf_counter()
+    exact = [top_indices(documents @ query, args.k) for query in queries]
+    exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    float_bytes = documents.itemsize * documents.shape[1]
+
+    print(f"{len(documents)} vectors x {documents.shape[1]} dims, {len(queries)} queries, recall@{args.k}")
+    print(f"float32: {float_bytes:6.0f} B/vector  {float_bytes * len(documents) / 1024 / 1024:8.1f} MB  exact search {exact_ms:6.2f} ms/query\n")
+    print(f"{'mode':>7} {'B/vector':>9} {'MB':>8} {'saving':>7} {'pass ms':>8} {'codes only':>11} " + " ".join(f"{f'x{factor}':>7}" for factor in args.factors))
+    for mode in QUANTIZATION_MODES:
+        result = evaluate(mode, documents, queries, exact, args.k, args.factors)
+        size = result["bytes_per_vector"]
+        print(
+            f"{mode:>7} {size:9.1f} {size * len(documents) / 1024 / 1024:8.1f} {float_bytes / size:6.1f}x "
+            f"{result['first_pass_ms']:8.2f} {result['first_pass_recall']:11.3f} "
+            + " ".join(f"{result['rescored_recall'][factor]:7.3f}" for factor in args.factors)
+        )
+    print("\nColumns xN: recall after rescoring k * N candidates with full-precision vectors (VECTOR_RESCORE_FACTOR=N).")
+
+
+if __name__ == "__main__":
+    main()
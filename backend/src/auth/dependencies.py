@@ -5,6 +5,8 @@ from .schemas import UserResponse
 
 security = HTTPBearer()
 
+TEACHER_ROLES = {"teacher", "admin"}
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -17,3 +19,14 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     return user
+
+
+async def require_teacher(
+    current_user: UserResponse = Depends(get_current_user)
+) -> UserResponse:
+    if current_user.role not in TEACHER_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Teacher access required",
+        )
+    return current_user
@@ -19,6 +19,7 @@ class UserResponse(UserBase):
     id: str
     full_name: str
     is_active: bool = True
+    role: str = "student"  # From Supabase app_metadata, which users cannot edit
 
     class Config:
         from_attributes = True
@@ -1,6 +1,7 @@
-from supabase import create_client, Client
+from supabase import Client
 from fastapi import HTTPException, status
 from .config import get_settings
+from ..clients import get_auth_supabase
 from .schemas import UserCreate, UserLogin, UserResponse, Token
 from typing import Optional
 import logging
@@ -12,10 +13,7 @@ class AuthService:
     def __init__(self):
         settings = get_settings()
         logger.info(f"Initializing Supabase client with URL: {settings.SUPABASE_URL}")
-        self.supabase: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_KEY
-        )
+        self.supabase: Client = get_auth_supabase()
 
     async def register(self, user_data: UserCreate) -> UserResponse:
         try:
@@ -88,7 +86,8 @@ class AuthService:
     async def get_current_user(self, token: str) -> Optional[UserResponse]:
         try:
             # Get user from Supabase using the token
-            user = self.supabase.auth.get_user(token)
+            response = self.supabase.auth.get_user(token)
+            user = response.user if response else None
             
             if not user:
                 return None
@@ -96,7 +95,8 @@ class AuthService:
             return UserResponse(
                 id=user.id,
                 email=user.email,
-                full_name=user.user_metadata.get("full_name", "")
+                full_name=user.user_metadata.get("full_name", ""),
+                role=(user.app_metadata or {}).get("role", "student")
             )
             
         except Exception:
@@ -0,0 +1,207 @@
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from supabase import create_client, Client, ClientOptions
+
+from .config import (
+    SUPABASE_URL,
+    SUPABASE_KEY,
+    EMBEDDING_MODEL,
+    EMBEDDING_BASE_URL,
+    LLM_MODEL_NAME,
+    GROQ_API_KEY,
+    GROQ_BASE_URL,
+    VECTOR_TABLE_NAME,
+    VECTOR_QUERY_NAME,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_CONNECT_TIMEOUT,
+    SUPABASE_TIMEOUT,
+    LLM_TIMEOUT,
+    LLM_MAX_RETRIES,
+    INFERENCE_SOCKET,
+    INFERENCE_EMBEDDINGS,
+    EMBEDDING_BACKEND,
+    VECTOR_QUANTIZATION,
+)
+
+if TYPE_CHECKING:
+    from groq import Groq
+    from langchain_core.embeddings import Embeddings
+    from langchain_community.vectorstores import SupabaseVectorStore
+    from langchain_groq import ChatGroq
+    from .inference.client import InferenceClient
+
+logger = logging.getLogger(__name__)
+
+# Shared outbound clients, created on first use and closed at shutdown; the
+# factories import the Groq and LangChain stacks, so workers that only serve
+# auth and progress never load them.
+_clients: Dict[str, Any] = {}
+_lock = threading.RLock()
+
+
+def _shared(name: str, factory: Callable[[], Any]) -> Any:
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = factory()
+                _clients[name] = client
+                logger.info(f"Created shared {name} client")
+    return client
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _llm_timeout() -> httpx.Timeout:
+    return httpx.Timeout(LLM_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+
+def _supabase_options() -> ClientOptions:
+    timeout = httpx.Timeout(SUPABASE_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    return ClientOptions(postgrest_client_timeout=timeout, storage_client_timeout=timeout)
+
+
+def get_supabase() -> Client:
+    """Supabase client for data access (vector store, tables, RPCs)."""
+    return _shared("supabase", lambda: create_client(SUPABASE_URL or "", SUPABASE_KEY or "", _supabase_options()))
+
+
+def get_auth_supabase() -> Client:
+    """Supabase client for auth calls.
+
+    Kept apart from the data client: signing a user in rewrites the client's
+    Authorization header, which must not leak into shared data queries.
+    """
+    return _shared("supabase_auth", lambda: create_client(SUPABASE_URL or "", SUPABASE_KEY or "", _supabase_options()))
+
+
+def embedding_session() -> requests.Session:
+    """Keep-alive session for the embedding server."""
+    def create():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_MAX_KEEPALIVE_CONNECTIONS)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    return _shared("embedding_http", create)
+
+
+def get_embeddings() -> "Embeddings":
+    """Embeddings for ingestion and search: through the inference sidecar when configured."""
+    if INFERENCE_SOCKET and INFERENCE_EMBEDDINGS:
+        from .inference.embeddings import SidecarEmbeddings
+
+        return _shared("sidecar_embeddings", lambda: SidecarEmbeddings(get_inference_client()))
+    return get_local_embeddings()
+
+
+def get_local_embeddings() -> "Embeddings":
+    """This process's embedding model: in-process ONNX, or the Ollama server over HTTP."""
+    if EMBEDDING_BACKEND == "onnx":
+        from .onnx_embeddings import OnnxEmbeddings
+
+        return _shared("onnx_embeddings", OnnxEmbeddings)
+    from .pooled_embeddings import PooledOllamaEmbeddings
+
+    return _shared("embeddings", lambda: PooledOllamaEmbeddings(
+        model=EMBEDDING_MODEL,
+        base_url=EMBEDDING_BASE_URL
+    ))
+
+
+def get_vector_store() -> "SupabaseVectorStore":
+    """Document embeddings table, shared by ingestion, Q&A and test generation."""
+    if VECTOR_QUANTIZATION != "none":
+        from .quantized_store import QuantizedVectorStore
+
+        return _shared("vector_store", lambda: QuantizedVectorStore(
+            client=get_supabase(),
+            embedding=get_embeddings(),
+            table_name=VECTOR_TABLE_NAME,
+            query_name=VECTOR_QUERY_NAME
+        ))
+    from langchain_community.vectorstores import SupabaseVectorStore
+
+    return _shared("vector_store", lambda: SupabaseVectorStore(
+        client=get_supabase(),
+        embedding=get_embeddings(),
+        table_name=VECTOR_TABLE_NAME,
+        query_name=VECTOR_QUERY_NAME
+    ))
+
+
+def _llm_http() -> httpx.Client:
+    return _shared("llm_http", lambda: httpx.Client(limits=_limits(), timeout=_llm_timeout()))
+
+
+def _llm_async_http() -> httpx.AsyncClient:
+    return _shared("llm_async_http", lambda: httpx.AsyncClient(limits=_limits(), timeout=_llm_timeout()))
+
+
+def get_chat_llm() -> "ChatGroq":
+    """Chat model for Q&A and test generation."""
+    from langchain_groq import ChatGroq
+
+    return _shared("chat_llm", lambda: ChatGroq(
+        api_key=GROQ_API_KEY,
+        model_name=LLM_MODEL_NAME,
+        base_url=GROQ_BASE_URL,
+        request_timeout=_llm_timeout(),
+        max_retries=LLM_MAX_RETRIES,
+        http_client=_llm_http(),
+        http_async_client=_llm_async_http()
+    ))
+
+
+def get_groq_client() -> "Groq":
+    """Raw Groq client (narrated explanations), on the same connection pool as the chat model."""
+    from groq import Groq
+
+    return _shared("groq", lambda: Groq(
+        api_key=GROQ_API_KEY,
+        base_url=GROQ_BASE_URL,
+        timeout=_llm_timeout(),
+        max_retries=LLM_MAX_RETRIES,
+        http_client=_llm_http()
+    ))
+
+
+def get_inference_client() -> "InferenceClient":
+    """Client for the inference sidecar at INFERENCE_SOCKET."""
+    from .inference.client import InferenceClient
+
+    return _shared("inference", lambda: InferenceClient(INFERENCE_SOCKET))
+
+
+async def close_clients():
+    """Close every shared client's connections; later calls create fresh clients."""
+    with _lock:
+        clients = dict(_clients)
+        _clients.clear()
+
+    for name, client in clients.items():
+        try:
+            if isinstance(client, httpx.AsyncClient):
+                await client.aclose()
+            elif isinstance(client, (httpx.Client, requests.Session)):
+                client.close()
+            elif isinstance(client, Client) and client._postgrest is not None:
+                client.postgrest.aclose()
+            elif name in ("inference", "onnx_embeddings"):
+                client.close()
+        except Exception as e:
+            logger.error(f"Error closing {name} client: {str(e)}")
@@ -19,14 +19,107 @@ PDF_DIR.mkdir(exist_ok=True)
 # Database settings
 DATABASE_URL = os.getenv("DATABASE_URL")  # Must be set in .env
 
+
+def _async_database_url(url):
+    """Map a sync database URL onto its async driver."""
+    if not url or "+" in url.split("://", 1)[0]:
+        return url
+    for prefix, async_prefix in (
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+
+# Connection pool settings (applied to both the sync and async engines, per worker)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Seconds before a connection is replaced
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"  # Detect connections dropped by failovers
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # 0 disables
+
+# Internal endpoints (/internal/...): token required in X-Internal-Token; loopback only when unset
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+# Request timing: Server-Timing headers, and a sampling profiler for every Nth request (0 disables)
+# or for internal callers sending "X-Profile: 1"; sampled requests slower than PROFILE_SLOW_MS are saved
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "True").lower() == "true"
+PROFILE_EVERY_N_REQUESTS = int(os.getenv("PROFILE_EVERY_N_REQUESTS", "0"))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "1000"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(BASE_DIR / "profiles")))
+
+# Event loop lag: how often a worker checks that its loop wakes up on time (0 disables)
+EVENT_LOOP_MONITOR_INTERVAL_MS = float(os.getenv("EVENT_LOOP_MONITOR_INTERVAL_MS", "100"))
+
 # Supabase settings
 SUPABASE_URL = os.getenv("SUPABASE_URL")  # Must be set in .env
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")  # Must be set in .env
 
 # AI Model settings
 EMBEDDING_MODEL = "nomic-embed-text"
-EMBEDDING_BASE_URL = "http://localhost:11434"
+EMBEDDING_BASE_URL = os.getenv("EMBEDDING_BASE_URL", "http://localhost:11434")
 LLM_MODEL_NAME = "llama3-8b-8192"
+GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")  # Optional, e.g. a local fake LLM server
+
+# Embedding backend: "ollama" (HTTP, one request per text) or "onnx" (in-process on CPU, batched).
+# Vectors from different backends are not comparable; re-ingest chapters after switching.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "ollama").lower()
+EMBEDDING_ONNX_DIR = Path(os.getenv("EMBEDDING_ONNX_DIR", str(BASE_DIR / "models" / "nomic-embed-text")))  # model.onnx + tokenizer.json
+EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))  # 0 lets ONNX Runtime decide
+EMBEDDING_MAX_TOKENS = int(os.getenv("EMBEDDING_MAX_TOKENS", "512"))
+EMBEDDING_DOCUMENT_PREFIX = os.getenv("EMBEDDING_DOCUMENT_PREFIX", "search_document: ")  # nomic-embed task prefixes
+EMBEDDING_QUERY_PREFIX = os.getenv("EMBEDDING_QUERY_PREFIX", "search_query: ")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))  # Texts per forward pass
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))  # Longest wait for a batch to fill
+
+# Outbound HTTP clients (Supabase, embedding server, LLM provider): shared keep-alive pools, per worker
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))  # Seconds an idle connection is kept
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))  # Seconds
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))  # Seconds
+EMBEDDING_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "30"))  # Seconds
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))  # Seconds
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# LLM scheduler settings
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "30000"))
+LLM_CONCURRENCY_INTERACTIVE = int(os.getenv("LLM_CONCURRENCY_INTERACTIVE", "8"))
+LLM_CONCURRENCY_EXPLANATION = int(os.getenv("LLM_CONCURRENCY_EXPLANATION", "4"))
+LLM_CONCURRENCY_BACKGROUND = int(os.getenv("LLM_CONCURRENCY_BACKGROUND", "2"))
+LLM_DEADLINE_INTERACTIVE = float(os.getenv("LLM_DEADLINE_INTERACTIVE", "15"))  # Seconds
+LLM_DEADLINE_EXPLANATION = float(os.getenv("LLM_DEADLINE_EXPLANATION", "30"))  # Seconds
+LLM_DEADLINE_BACKGROUND = float(os.getenv("LLM_DEADLINE_BACKGROUND", "120"))  # Seconds
+
+# Chapter catalog cache: how often a worker checks the shared version stamp
+CATALOG_VERSION_CHECK_SECONDS = float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", "5"))
+
+# Progress write-behind: coalesce frequent progress updates and flush them in batches
+PROGRESS_WRITE_BEHIND = os.getenv("PROGRESS_WRITE_BEHIND", "False").lower() == "true"
+PROGRESS_FLUSH_INTERVAL_SECONDS = float(os.getenv("PROGRESS_FLUSH_INTERVAL_SECONDS", "2"))
+PROGRESS_FLUSH_MAX_PENDING = int(os.getenv("PROGRESS_FLUSH_MAX_PENDING", "500"))
+PROGRESS_FLUSH_MAX_ATTEMPTS = int(os.getenv("PROGRESS_FLUSH_MAX_ATTEMPTS", "5"))  # Failed writes of one entry before it is dropped
+
+# Progress reads: how long clients may reuse a response before revalidating with its ETag
+PROGRESS_CACHE_MAX_AGE_SECONDS = int(os.getenv("PROGRESS_CACHE_MAX_AGE_SECONDS", "5"))
+
+# Offline sync: largest batch of queued progress updates accepted in one request
+PROGRESS_SYNC_MAX_ITEMS = int(os.getenv("PROGRESS_SYNC_MAX_ITEMS", "500"))
+
+# Cohort analytics: snapshot refresh cadence and at-risk thresholds
+COHORT_REFRESH_SECONDS = float(os.getenv("COHORT_REFRESH_SECONDS", "60"))
+COHORT_FULL_REFRESH_SECONDS = float(os.getenv("COHORT_FULL_REFRESH_SECONDS", "3600"))
+COHORT_AT_RISK_INACTIVE_DAYS = int(os.getenv("COHORT_AT_RISK_INACTIVE_DAYS", "7"))
+COHORT_AT_RISK_SCORE = float(os.getenv("COHORT_AT_RISK_SCORE", "50"))
 
 # Document processing settings
 CHUNK_SIZE = 500
@@ -34,8 +127,25 @@ CHUNK_OVERLAP = 50
 VECTOR_TABLE_NAME = "document_embeddings"
 VECTOR_QUERY_NAME = "match_documents"
 
+# Quantized vector search: with "int8" or "binary", workers keep only compact codes of the stored
+# chunks in memory, pick candidates by int8 dot product or Hamming distance, and rescore them with
+# full-precision vectors fetched from the table. "none" searches with match_documents.
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+VECTOR_RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", "10"))  # Candidates rescored per result returned
+VECTOR_CODES_REFRESH_SECONDS = float(os.getenv("VECTOR_CODES_REFRESH_SECONDS", "60"))  # Picks up other workers' ingestion
+
 # Audio settings
 AUDIO_SAMPLE_RATE = 22050
+TTS_MODEL_NAME = os.getenv("TTS_MODEL_NAME", "tts_models/en/ljspeech/tacotron2-DDC")
+
+# Inference sidecar: one process (python -m src.inference.server) hosts the TTS model, and
+# optionally embeddings, for every API worker on the host. Unset keeps inference in-process.
+INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET")  # Unix socket path, same value for sidecar and workers
+INFERENCE_EMBEDDINGS = os.getenv("INFERENCE_EMBEDDINGS", "False").lower() == "true"  # Embed through the sidecar too
+INFERENCE_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", "32"))  # Texts per embedding batch
+INFERENCE_BATCH_WAIT_MS = float(os.getenv("INFERENCE_BATCH_WAIT_MS", "5"))  # Longest wait for a batch to fill
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "120"))  # Seconds a worker waits for a reply
+INFERENCE_SHM_TTL_SECONDS = float(os.getenv("INFERENCE_SHM_TTL_SECONDS", "60"))  # Uncollected audio is freed after this
 
 # Security settings
 SECRET_KEY = os.getenv("SECRET_KEY")  # Must be set in .env
@@ -46,3 +156,9 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 API_V1_PREFIX = "/api/v1"
 PROJECT_NAME = "AI School"
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+
+# Worker roles: API-only workers serve auth, progress and analytics and never load the
+# learning (LLM, embedding, TTS) stacks; route /learning to full workers instead
+API_ONLY = os.getenv("API_ONLY", "False").lower() == "true"
+# Full workers: build the learning components at startup instead of on the first requests
+LEARNING_PRELOAD = os.getenv("LEARNING_PRELOAD", "False").lower() == "true"
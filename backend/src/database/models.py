@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, DateTime, Boolean, JSON
+from sqlalchemy import Column, String, Integer, BigInteger, Float, ForeignKey, DateTime, Date, Boolean, JSON, LargeBinary, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -20,6 +20,7 @@ class User(Base):
 
     # Relationships
     learning_progress = relationship("LearningProgress", back_populates="user")
+    test_attempts = relationship("ChapterTestAttempt", back_populates="user")
 
 class Chapter(Base):
     __tablename__ = "chapters"
@@ -35,8 +36,20 @@ class Chapter(Base):
     # Relationships
     learning_progress = relationship("LearningProgress", back_populates="chapter")
 
+class CatalogVersion(Base):
+    """Version stamps that let every worker detect a stale in-memory catalog."""
+    __tablename__ = "catalog_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class LearningProgress(Base):
     __tablename__ = "learning_progress"
+    __table_args__ = (
+        UniqueConstraint("user_id", "chapter_id", name="uq_learning_progress_user_chapter"),
+        Index("ix_learning_progress_user_accessed", "user_id", "last_accessed_at"),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
@@ -51,7 +64,6 @@ class LearningProgress(Base):
     # Test results
     test_attempts = Column(Integer, default=0)
     highest_score = Column(Float, default=0.0)  # 0.0 to 100.0
-    test_history = Column(JSON, default=list)  # List of test attempts with scores and dates
     
     # Streak tracking
     current_streak = Column(Integer, default=0)  # Current consecutive days of learning
@@ -66,4 +78,85 @@ class LearningProgress(Base):
     chapter = relationship("Chapter", back_populates="learning_progress")
 
     class Config:
-        orm_mode = True 
\ No newline at end of file
+        orm_mode = True
+
+# Lets snapshot readers fetch only rows changed since their last refresh
+Index(
+    "ix_learning_progress_changed_at",
+    func.coalesce(LearningProgress.updated_at, LearningProgress.created_at)
+)
+
+class ChapterTestAttempt(Base):
+    """One test attempt; question detail lives in test_attempt_questions."""
+    __tablename__ = "test_attempts"
+    __table_args__ = (
+        UniqueConstraint("user_id", "chapter_id", "attempted_at", name="uq_test_attempts_user_chapter_attempted"),
+        Index("ix_test_attempts_user_attempted", "user_id", "attempted_at"),
+    )
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    chapter_id = Column(String, ForeignKey("chapters.id"), nullable=False)
+    attempted_at = Column(DateTime(timezone=True), nullable=False)
+    score = Column(Float, nullable=False)  # 0.0 to 100.0
+    total_questions = Column(Integer, nullable=False)
+    correct_answers = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    user = relationship("User", back_populates="test_attempts")
+    chapter = relationship("Chapter")
+    questions = relationship(
+        "TestAttemptQuestion",
+        back_populates="attempt",
+        cascade="all, delete-orphan",
+        order_by="TestAttemptQuestion.position"
+    )
+
+class TestAttemptQuestion(Base):
+    __tablename__ = "test_attempt_questions"
+
+    attempt_id = Column(String, ForeignKey("test_attempts.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    detail = Column(JSON, nullable=False)  # Question, chosen answer and correctness as submitted
+
+    # Relationships
+    attempt = relationship("ChapterTestAttempt", back_populates="questions")
+
+class UserProgressRollup(Base):
+    """Per-user progress aggregates, maintained alongside LearningProgress writes."""
+    __tablename__ = "user_progress_rollups"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    chapters_started = Column(Integer, default=0, nullable=False)
+    completed_chapters = Column(Integer, default=0, nullable=False)
+    total_completion = Column(Float, default=0.0, nullable=False)  # Sum of completion_percentage
+    current_streak = Column(Integer, default=0, nullable=False)  # Max over the user's progress rows
+    longest_streak = Column(Integer, default=0, nullable=False)
+    last_activity_at = Column(DateTime(timezone=True))
+    version = Column(BigInteger, default=1, server_default="1", nullable=False)  # Bumped on every progress write
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class UserSubjectRollup(Base):
+    """Per-user, per-subject progress aggregates."""
+    __tablename__ = "user_subject_rollups"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    subject = Column(String, primary_key=True)
+    chapters_started = Column(Integer, default=0, nullable=False)
+    completed_chapters = Column(Integer, default=0, nullable=False)
+    total_completion = Column(Float, default=0.0, nullable=False)
+    total_score = Column(Float, default=0.0, nullable=False)  # Sum of highest_score over tested chapters
+    test_count = Column(Integer, default=0, nullable=False)  # Chapters with at least one test attempt
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class UserActivityCalendar(Base):
+    """Days a user was active, as a bitmap; see learning.activity_calendar."""
+    __tablename__ = "user_activity_calendars"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    start_day = Column(Date, nullable=False)  # Day of bit 0
+    days = Column(LargeBinary, nullable=False)  # One bit per day, little-endian
+    longest_streak = Column(Integer, default=0, nullable=False)
+    last_active_day = Column(Date)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
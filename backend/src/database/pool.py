@@ -0,0 +1,124 @@
+import bisect
+import threading
+import time
+from typing import Any, Dict
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from ..config import (
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+)
+
+# Upper bounds of the checkout wait histogram buckets, in seconds
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class PoolStats:
+    """Checkout counters and a wait-time histogram for one connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.buckets = [0] * (len(WAIT_BUCKETS) + 1)  # Last bucket is +Inf
+
+    def observe(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.buckets[bisect.bisect_left(WAIT_BUCKETS, wait)] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative, histogram = 0, {}
+            for bound, count in zip(list(WAIT_BUCKETS) + ["+Inf"], self.buckets):
+                cumulative += count
+                histogram[str(bound)] = cumulative
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait": self.total_wait / self.checkouts if self.checkouts else 0.0,
+                "max_wait": self.max_wait,
+                "wait_histogram": histogram,  # Cumulative checkouts per upper bound, in seconds
+            }
+
+
+class _InstrumentedPool:
+    """Mixin timing every checkout, including waits for a free connection and pre-ping."""
+
+    stats: PoolStats
+
+    def connect(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.stats.observe(time.perf_counter() - started, timed_out)
+
+    def recreate(self):
+        # dispose() swaps in a new pool; keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "max_overflow": self._max_overflow,
+            "timeout": self._timeout,
+            **self.stats.as_dict(),
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """create_engine keyword arguments for the configured pool and timeouts."""
+    options: Dict[str, Any] = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+    # Statement timeouts are set per connection by the server, PostgreSQL only
+    if DB_STATEMENT_TIMEOUT_MS and url.startswith(("postgresql", "postgres")):
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def attach_stats(engine) -> PoolStats:
+    """Give an engine's instrumented pool its stats collector."""
+    engine.pool.stats = PoolStats()
+    return engine.pool.stats
+
+
+def pool_snapshots(engines: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Live statistics for each named engine's pool."""
+    return {name: engine.pool.snapshot() for name, engine in engines.items()}
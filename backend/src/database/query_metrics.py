@@ -0,0 +1,54 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from ..metrics import Counter, Histogram, record_request_stage
+
+DB_QUERY_SECONDS = Histogram(
+    "aischool_db_query_duration_seconds", "Time spent executing database statements.", ["scope", "operation"]
+)
+DB_QUERY_ERRORS = Counter(
+    "aischool_db_query_errors_total", "Database statements that raised.", ["scope", "operation"]
+)
+
+# Name of the code path issuing statements, e.g. "progress.update_progress"
+_scope: ContextVar[str] = ContextVar("db_query_scope", default="other")
+
+
+@contextmanager
+def query_scope(name: str):
+    """Label statements executed inside the block (or decorated function) with `name`."""
+    token = _scope.set(name)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def _operation(statement: str) -> str:
+    words = statement.lstrip()[:16].split(None, 1)
+    return words[0].upper() if words else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        DB_QUERY_SECONDS.labels(_scope.get(), _operation(statement)).observe(elapsed)
+        record_request_stage("db", elapsed)
+
+
+def _handle_error(exception_context):
+    statement = exception_context.statement or ""
+    DB_QUERY_ERRORS.labels(_scope.get(), _operation(statement)).inc()
+
+
+def attach_query_metrics(engine):
+    """Record the duration of every statement executed through a (sync) engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
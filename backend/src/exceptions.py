@@ -45,3 +45,7 @@ class RAGError(LearningError):
 class TestGenerationError(LearningError):
     """Test generation errors."""
     pass
+
+class InferenceError(AppException):
+    """Inference sidecar errors."""
+    pass
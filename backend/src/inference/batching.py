@@ -0,0 +1,106 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Generic, List, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class _Pending(Generic[T, R]):
+    items: Sequence[T]
+    future: Future = field(default_factory=Future)
+
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesces concurrent submissions into batched calls on one worker thread.
+
+    The worker waits for a first submission, then keeps collecting until
+    `max_batch_size` items are queued or `max_wait_ms` has passed, and runs
+    `fn` once over all of them. The window only applies once load picks up:
+    while each batch holds a single submission, a batch runs with whatever
+    is already queued, so an isolated call pays no extra latency; anything
+    that arrives meanwhile forms the next batch.
+    `fn` must return one result per item, in order. Submissions are never
+    split, so a single large one can exceed `max_batch_size`.
+    """
+
+    def __init__(self, fn: Callable[[List[T]], Sequence[R]], max_batch_size: int, max_wait_ms: float, name: str = "batcher"):
+        self.fn = fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self._last_submissions = 1
+        self._queue: "queue.Queue[_Pending]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, items: Sequence[T]) -> Future:
+        """Queue `items`; the future resolves to their results as a list."""
+        if self._closed:
+            raise RuntimeError(f"{self.name} is closed")
+        pending = _Pending(items)
+        self._queue.put(pending)
+        return pending.future
+
+    def __call__(self, items: Sequence[T]) -> List[R]:
+        return self.submit(items).result()
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first: _Pending) -> List[_Pending]:
+        batch = [first]
+        size = len(first.items)
+        deadline = time.monotonic() + (self.max_wait if self._last_submissions > 1 else 0)
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                pending = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is None:
+                self._queue.put(None)  # Stop after this batch
+                break
+            batch.append(pending)
+            size += len(pending.items)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [pending for pending in self._collect(first) if pending.future.set_running_or_notify_cancel()]
+            self._last_submissions = len(batch)
+            items = [item for pending in batch for item in pending.items]
+            if not items:
+                for pending in batch:
+                    pending.future.set_result([])
+                continue
+            try:
+                results = list(self.fn(items))
+                if len(results) != len(items):
+                    raise RuntimeError(f"{self.name} returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                logger.error(f"Error in {self.name} batch of {len(items)}: {str(e)}")
+                for pending in batch:
+                    pending.future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(items)
+            offset = 0
+            for pending in batch:
+                pending.future.set_result(results[offset:offset + len(pending.items)])
+                offset += len(pending.items)
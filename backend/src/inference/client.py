@@ -0,0 +1,112 @@
+import itertools
+import logging
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from ..config import INFERENCE_SOCKET, INFERENCE_TIMEOUT
+from ..exceptions import InferenceError
+from .protocol import Frame, encode_frame, recv_frame, take_shared_array
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceClient:
+    """Blocking client for the inference sidecar, safe to share between threads.
+
+    Each thread gets its own connection, so calls from the event loop's
+    worker threads run in parallel; the sidecar batches them.
+    """
+
+    def __init__(self, socket_path: str = INFERENCE_SOCKET, timeout: float = INFERENCE_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._sockets: List[socket.socket] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        with self._lock:
+            self._sockets.append(sock)
+        self._local.sock = sock
+        return sock
+
+    def _drop(self, sock: socket.socket):
+        self._local.sock = None
+        with self._lock:
+            if sock in self._sockets:
+                self._sockets.remove(sock)
+        sock.close()
+
+    def call(self, header: Dict[str, Any], body: bytes = b"") -> Frame:
+        """Send one request and wait for its reply; reconnects once if the connection went stale."""
+        header = {**header, "id": next(self._ids)}
+        frame = encode_frame(header, body)
+        for attempt in range(2):
+            sock = getattr(self._local, "sock", None)
+            try:
+                if sock is None:
+                    sock = self._connect()
+                sock.sendall(frame)
+                reply, reply_body = recv_frame(sock)
+                break
+            except (ConnectionError, BrokenPipeError, FileNotFoundError) as e:
+                if sock is not None:
+                    self._drop(sock)
+                if attempt:
+                    raise InferenceError(f"Inference sidecar at {self.socket_path} is unavailable: {str(e)}")
+            except OSError as e:
+                # Timeouts leave a reply in flight on this connection; don't reuse it
+                if sock is not None:
+                    self._drop(sock)
+                raise InferenceError(f"Inference sidecar call failed: {str(e)}")
+        if "error" in reply:
+            raise InferenceError(reply["error"])
+        return reply, reply_body
+
+    def ping(self) -> Dict[str, Any]:
+        return self.call({"op": "ping"})[0]
+
+    def embed(self, texts: Sequence[str], query: bool = False) -> np.ndarray:
+        """Float32 matrix with one row per text, embedded as search queries or as documents."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        reply, body = self.call({"op": "embed", "texts": list(texts), "query": query})
+        return np.frombuffer(body, dtype=np.float32).reshape(reply["shape"])
+
+    def synthesize(self, text: str) -> np.ndarray:
+        """Speech for `text` as float32 samples at the sidecar's sample rate."""
+        reply, _ = self.call({"op": "tts", "text": text})
+        return take_shared_array(reply["audio"])
+
+    def synthesize_to_file(self, text: str, path: str) -> str:
+        """Write speech for `text` to `path` (which the sidecar must be able to write)."""
+        reply, _ = self.call({"op": "tts", "text": text, "path": path})
+        return reply["path"]
+
+    def close(self):
+        with self._lock:
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            sock.close()
+
+
+class RemoteTTS:
+    """Stands in for the Coqui TTS model, synthesizing through the sidecar."""
+
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def tts(self, text: str, **kwargs) -> np.ndarray:
+        return self.client.synthesize(text)
+
+    def tts_to_file(self, text: str, file_path: str, **kwargs) -> str:
+        # The sidecar may run from another working directory
+        return self.client.synthesize_to_file(text, str(Path(file_path).resolve()))
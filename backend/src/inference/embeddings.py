@@ -0,0 +1,21 @@
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from ..metrics import track_stage
+from .client import InferenceClient
+
+
+class SidecarEmbeddings(Embeddings):
+    """Embeddings computed by the inference sidecar, batched with other workers' requests."""
+
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with track_stage("embedding"):
+            return self.client.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        with track_stage("embedding"):
+            return self.client.embed([text], query=True)[0].tolist()
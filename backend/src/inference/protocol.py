@@ -0,0 +1,96 @@
+"""Framing and shared-memory helpers for the inference sidecar socket.
+
+A frame is an 8-byte prefix (header length, body length; big-endian
+uint32), a UTF-8 JSON header, then an optional binary body. Requests carry
+an "op" and an "id" that the response echoes; failures come back as
+{"error": "..."}. An "embed" request with "query": true embeds its texts
+as search queries rather than documents. Embeddings travel in the body
+as float32 rows; audio goes through a shared memory segment that the
+reader unlinks.
+"""
+import asyncio
+import json
+import socket
+import struct
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+PREFIX = struct.Struct(">II")
+MAX_HEADER_BYTES = 16 * 1024 * 1024
+
+Frame = Tuple[Dict[str, Any], bytes]
+
+
+def encode_frame(header: Dict[str, Any], body: bytes = b"") -> bytes:
+    data = json.dumps(header).encode()
+    return PREFIX.pack(len(data), len(body)) + data + body
+
+
+def _decode(prefix: bytes, read) -> Frame:
+    header_length, body_length = PREFIX.unpack(prefix)
+    if header_length > MAX_HEADER_BYTES:
+        raise ValueError(f"Frame header of {header_length} bytes is too large")
+    header = json.loads(read(header_length))
+    return header, read(body_length) if body_length else b""
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Frame:
+    prefix = await reader.readexactly(PREFIX.size)
+    header_length, body_length = PREFIX.unpack(prefix)
+    if header_length > MAX_HEADER_BYTES:
+        raise ValueError(f"Frame header of {header_length} bytes is too large")
+    header = json.loads(await reader.readexactly(header_length))
+    body = await reader.readexactly(body_length) if body_length else b""
+    return header, body
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("Inference sidecar closed the connection")
+        received += count
+    return bytes(buffer)
+
+
+def recv_frame(sock: socket.socket) -> Frame:
+    return _decode(_recv_exactly(sock, PREFIX.size), lambda size: _recv_exactly(sock, size))
+
+
+def share_array(array: np.ndarray) -> Dict[str, Any]:
+    """Copy `array` into a new shared memory segment, owned by whoever reads it."""
+    array = np.ascontiguousarray(array)
+    segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    try:
+        np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+        # The reader unlinks it; don't let this process's tracker unlink it at exit
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return {"name": segment.name, "shape": list(array.shape), "dtype": array.dtype.str}
+    finally:
+        segment.close()
+
+
+def take_shared_array(info: Dict[str, Any]) -> np.ndarray:
+    """Copy an array out of a shared memory segment and unlink the segment."""
+    segment = shared_memory.SharedMemory(name=info["name"])
+    try:
+        return np.ndarray(tuple(info["shape"]), dtype=np.dtype(info["dtype"]), buffer=segment.buf).copy()
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+def discard_shared_array(name: str) -> bool:
+    """Unlink a segment nobody collected; False if it was already taken."""
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    segment.close()
+    segment.unlink()
+    return True
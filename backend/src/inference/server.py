@@ -0,0 +1,224 @@
+"""Inference sidecar: one process holding the models that every API worker shares.
+
+Run one per host, next to the uvicorn workers, with the same settings:
+
+    INFERENCE_SOCKET=/run/aischool/inference.sock python -m src.inference.server
+
+The TTS model is loaded once, here, instead of in every worker. With
+INFERENCE_EMBEDDINGS=true the sidecar also embeds texts for the workers,
+coalescing concurrent requests into batches of up to INFERENCE_BATCH_SIZE
+texts. Synthesized audio is handed back through shared memory rather than
+the socket.
+"""
+import asyncio
+import logging
+import os
+import signal
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import (
+    INFERENCE_SOCKET,
+    INFERENCE_EMBEDDINGS,
+    INFERENCE_BATCH_SIZE,
+    INFERENCE_BATCH_WAIT_MS,
+    INFERENCE_SHM_TTL_SECONDS,
+    AUDIO_SAMPLE_RATE,
+)
+from .batching import MicroBatcher
+from .protocol import Frame, discard_shared_array, encode_frame, read_frame, share_array
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceServer:
+    def __init__(
+        self,
+        socket_path: str,
+        serve_tts: bool = True,
+        serve_embeddings: bool = INFERENCE_EMBEDDINGS,
+        batch_size: int = INFERENCE_BATCH_SIZE,
+        batch_wait_ms: float = INFERENCE_BATCH_WAIT_MS,
+        shm_ttl: float = INFERENCE_SHM_TTL_SECONDS,
+        embeddings: Optional["Embeddings"] = None,
+    ):
+        self.socket_path = socket_path
+        self.shm_ttl = shm_ttl
+        self.tts_model = None
+        self.tts: Optional[MicroBatcher] = None
+        self.embeddings: Optional["Embeddings"] = None
+        self.embedder: Optional[MicroBatcher] = None
+        # Shared memory segments handed out but maybe not collected yet: name -> created at
+        self.shared: Dict[str, float] = {}
+        self.connections = 0
+        self._handlers: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+        if serve_tts:
+            from ..learning.narration import load_tts_model
+
+            self.tts_model = load_tts_model()
+            # One model, one thread: synthesis requests queue up and run in turn
+            self.tts = MicroBatcher(self._synthesize, max_batch_size=1, max_wait_ms=0, name="tts")
+        if serve_embeddings:
+            if embeddings is None:
+                from ..clients import get_local_embeddings
+
+                embeddings = get_local_embeddings()
+            self.embeddings = embeddings
+            self.embedder = MicroBatcher(self._embed, max_batch_size=batch_size, max_wait_ms=batch_wait_ms, name="embeddings")
+
+    def _embed(self, requests: List[Tuple[str, bool]]) -> List[List[float]]:
+        """Vectors for (text, is_query) pairs: documents in one call, queries with the model's query embedding."""
+        results: List[Optional[List[float]]] = [None] * len(requests)
+        documents = [i for i, (_, is_query) in enumerate(requests) if not is_query]
+        if documents:
+            for i, vector in zip(documents, self.embeddings.embed_documents([requests[i][0] for i in documents])):
+                results[i] = vector
+        for i, (text, is_query) in enumerate(requests):
+            if is_query:
+                results[i] = self.embeddings.embed_query(text)
+        return results
+
+    def _synthesize(self, requests: List[Tuple[str, Optional[str]]]) -> List[Any]:
+        results = []
+        for text, path in requests:
+            if path:
+                self.tts_model.tts_to_file(text=text, file_path=path)
+                results.append(path)
+            else:
+                results.append(np.asarray(self.tts_model.tts(text=text), dtype=np.float32))
+        return results
+
+    async def _handle(self, header: Dict[str, Any], body: bytes) -> Frame:
+        op = header.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "tts": self.tts is not None, "embeddings": self.embedder is not None}, b""
+        if op == "stats":
+            return {
+                "connections": self.connections,
+                "shared_segments": len(self.shared),
+                **{
+                    name: {"batches": batcher.batches, "items": batcher.items}
+                    for name, batcher in (("tts", self.tts), ("embeddings", self.embedder)) if batcher is not None
+                },
+            }, b""
+        if op == "embed":
+            if self.embedder is None:
+                raise RuntimeError("This sidecar does not serve embeddings (INFERENCE_EMBEDDINGS=false)")
+            # Queries and documents get different task prefixes from the model
+            is_query = bool(header.get("query"))
+            vectors = await asyncio.wrap_future(self.embedder.submit([(text, is_query) for text in header["texts"]]))
+            matrix = np.asarray(vectors, dtype=np.float32).reshape(len(header["texts"]), -1)
+            return {"shape": list(matrix.shape)}, matrix.tobytes()
+        if op == "tts":
+            if self.tts is None:
+                raise RuntimeError("This sidecar does not serve TTS")
+            path = header.get("path")
+            [result] = await asyncio.wrap_future(self.tts.submit([(header["text"], path)]))
+            if path:
+                return {"path": result}, b""
+            audio = share_array(result)
+            self.shared[audio["name"]] = time.monotonic()
+            return {"audio": audio, "sample_rate": AUDIO_SAMPLE_RATE}, b""
+        raise ValueError(f"Unknown op {op!r}")
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        handler = asyncio.current_task()
+        self._handlers[handler] = writer
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(header: Dict[str, Any], body: bytes):
+            try:
+                reply, reply_body = await self._handle(header, body)
+            except Exception as e:
+                logger.error(f"Error serving {header.get('op')}: {str(e)}")
+                reply, reply_body = {"error": f"{type(e).__name__}: {e}"}, b""
+            reply["id"] = header.get("id")
+            async with lock:
+                writer.write(encode_frame(reply, reply_body))
+                await writer.drain()
+
+        try:
+            while True:
+                try:
+                    header, body = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                task = asyncio.create_task(respond(header, body))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except Exception as e:
+            logger.error(f"Error reading from inference client: {str(e)}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.connections -= 1
+            self._handlers.pop(handler, None)
+            writer.close()
+
+    async def _sweep_shared(self):
+        """Free audio that no worker collected (e.g. the worker died or timed out)."""
+        while True:
+            await asyncio.sleep(max(1.0, self.shm_ttl / 2))
+            cutoff = time.monotonic() - self.shm_ttl
+            for name, created in list(self.shared.items()):
+                if created < cutoff:
+                    del self.shared[name]
+                    if discard_shared_array(name):
+                        logger.warning(f"Freed uncollected audio segment {name}")
+
+    async def serve(self):
+        path = Path(self.socket_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            path.unlink()
+        server = await asyncio.start_unix_server(self._serve_connection, path=str(path))
+        os.chmod(path, 0o660)
+        logger.info(f"Inference sidecar listening on {path} (tts={self.tts is not None}, embeddings={self.embedder is not None})")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        sweeper = asyncio.create_task(self._sweep_shared())
+        try:
+            await stop.wait()
+        finally:
+            sweeper.cancel()
+            server.close()
+            # Hang up on connected workers so their handlers finish before the loop stops
+            handlers = list(self._handlers.items())
+            for _, writer in handlers:
+                writer.close()
+            await asyncio.gather(*(handler for handler, _ in handlers), return_exceptions=True)
+            await server.wait_closed()
+            for batcher in (self.tts, self.embedder):
+                if batcher is not None:
+                    batcher.close()
+            for name in list(self.shared):
+                discard_shared_array(name)
+            if path.exists():
+                path.unlink()
+            logger.info("Inference sidecar stopped")
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    if not INFERENCE_SOCKET:
+        raise SystemExit("Set INFERENCE_SOCKET to the socket path the API workers use")
+    asyncio.run(InferenceServer(INFERENCE_SOCKET).serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,26 @@ def create_vector_index():
         logger.error(f"Error creating vector index: {str(e)}")
         raise DatabaseError(f"Failed to create vector index: {str(e)}")
 
+def create_quantized_columns():
+    """Add the int8 and binary code columns used by quantized vector search, and the
+    created_at column workers use to fetch only the codes stored since their last refresh."""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("""
+                ALTER TABLE document_embeddings
+                    ADD COLUMN IF NOT EXISTS embedding_int8 bytea,
+                    ADD COLUMN IF NOT EXISTS embedding_int8_scale real,
+                    ADD COLUMN IF NOT EXISTS embedding_binary bytea,
+                    ADD COLUMN IF NOT EXISTS created_at timestamptz NOT NULL DEFAULT now();
+                CREATE INDEX IF NOT EXISTS idx_document_embeddings_created_at
+                    ON document_embeddings(created_at);
+            """))
+            conn.commit()
+            logger.info("Quantized embedding columns created successfully")
+    except Exception as e:
+        logger.error(f"Error creating quantized embedding columns: {str(e)}")
+        raise DatabaseError(f"Failed to create quantized embedding columns: {str(e)}")
+
 def create_updated_at_trigger():
     """Create trigger function for updating timestamps."""
     try:
@@ -86,6 +106,9 @@ def initialize_database():
         # Create vector index
         create_vector_index()
         
+        # Create quantized embedding columns
+        create_quantized_columns()
+        
         # Create updated_at triggers
         create_updated_at_trigger()
         
@@ -0,0 +1,26 @@
+import secrets
+from typing import Optional
+from fastapi import Header, HTTPException, Request, status
+from ..config import INTERNAL_API_TOKEN
+
+LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+def is_internal_caller(client_host: Optional[str], token: Optional[str]) -> bool:
+    """A matching internal token, or a loopback client when no token is configured."""
+    if INTERNAL_API_TOKEN:
+        return bool(token) and secrets.compare_digest(token, INTERNAL_API_TOKEN)
+    return client_host in LOOPBACK_HOSTS
+
+
+async def require_internal_access(
+    request: Request,
+    x_internal_token: Optional[str] = Header(None)
+):
+    """Allow operators only: a matching X-Internal-Token, or loopback when no token is configured."""
+    if is_internal_caller(request.client.host if request.client else None, x_internal_token):
+        return
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Internal endpoint",
+    )
@@ -0,0 +1,70 @@
+from datetime import datetime
+from ..database.database import engine, async_engine
+from ..database.pool import WAIT_BUCKETS
+from ..learning.chapter_catalog import chapter_catalog
+from ..learning.cohort_analytics import cohort_analytics
+from ..learning.llm_scheduler import llm_scheduler, LLMPriority
+from ..learning.progress_service import progress_write_buffer
+from ..metrics import family, histogram_samples, registry
+
+POOLS = {"sync": engine, "async": async_engine.sync_engine}
+
+
+def collect_catalog():
+    hits, misses = chapter_catalog.hits, chapter_catalog.misses
+    yield family("aischool_catalog_hits_total", "counter", "Chapter catalog reads served from the loaded catalog.", [({}, hits)])
+    yield family("aischool_catalog_misses_total", "counter", "Chapter catalog reads that reloaded the catalog.", [({}, misses)])
+    yield family(
+        "aischool_catalog_hit_ratio", "gauge", "Share of chapter catalog reads served without a reload.",
+        [({}, hits / (hits + misses) if hits + misses else 0.0)]
+    )
+
+
+def collect_llm_scheduler():
+    snapshot = llm_scheduler.snapshot()
+    classes = snapshot["classes"]
+    for key, type_, help in (
+        ("submitted", "counter", "LLM calls submitted to the scheduler."),
+        ("completed", "counter", "LLM calls that completed."),
+        ("failed", "counter", "LLM calls that raised."),
+        ("rejected", "counter", "LLM calls rejected because they could not meet their deadline."),
+        ("queued", "gauge", "LLM calls waiting for a slot or budget."),
+        ("in_flight", "gauge", "LLM calls currently running."),
+    ):
+        name = f"aischool_llm_{key}" + ("_total" if type_ == "counter" else "")
+        yield family(name, type_, help, [({"priority": priority.name.lower()}, classes[priority.name.lower()][key]) for priority in LLMPriority])
+    yield family("aischool_llm_requests_available", "gauge", "Requests left in the LLM rate budget.", [({}, snapshot["requests_available"])])
+    yield family("aischool_llm_tokens_available", "gauge", "Tokens left in the LLM rate budget.", [({}, snapshot["tokens_available"])])
+
+
+def collect_progress():
+    yield family("aischool_progress_pending_writes", "gauge", "Progress updates held by the write-behind buffer.", [({}, len(progress_write_buffer))])
+    info = cohort_analytics.info()
+    yield family("aischool_cohort_snapshot_rows", "gauge", "Progress rows in the cohort analytics snapshot.", [({}, info.rows)])
+    age = (datetime.utcnow() - info.refreshed_at).total_seconds() if info.refreshed_at else float("nan")
+    yield family("aischool_cohort_snapshot_age_seconds", "gauge", "Seconds since the cohort snapshot was refreshed.", [({}, age)])
+
+
+def collect_pools():
+    snapshots = {name: pool_engine.pool.snapshot() for name, pool_engine in POOLS.items()}
+    for key, type_, help in (
+        ("size", "gauge", "Configured connection pool size."),
+        ("checked_out", "gauge", "Connections currently checked out."),
+        ("overflow", "gauge", "Connections open beyond the pool size."),
+        ("checkouts", "counter", "Connection checkouts."),
+        ("timeouts", "counter", "Checkouts that timed out waiting for a connection."),
+    ):
+        name = f"aischool_db_pool_{key}" + ("_total" if type_ == "counter" else "")
+        yield family(name, type_, help, [({"engine": name_}, snapshot[key]) for name_, snapshot in snapshots.items()])
+
+    samples = []
+    for name, pool_engine in POOLS.items():
+        stats = pool_engine.pool.stats
+        with stats._lock:
+            buckets, total = list(stats.buckets), stats.total_wait
+        samples.extend(histogram_samples({"engine": name}, WAIT_BUCKETS, buckets, total))
+    yield "aischool_db_pool_wait_seconds", "histogram", "Time to check out a connection, including pre-ping.", samples
+
+
+for collector in (collect_catalog, collect_llm_scheduler, collect_progress, collect_pools):
+    registry.register_collector(collector)
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from typing import Dict, Any
+from ..database.database import engine, async_engine
+from ..database.pool import pool_snapshots
+from ..metrics import registry
+from .dependencies import require_internal_access
+from . import metrics  # Registers the collectors scraped by /metrics
+
+router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(require_internal_access)])
+metrics_router = APIRouter(tags=["internal"], dependencies=[Depends(require_internal_access)])
+
+@router.get("/db/pool", response_model=Dict[str, Dict[str, Any]])
+async def get_pool_stats():
+    """Live connection pool statistics for this worker's sync and async engines."""
+    return pool_snapshots({"sync": engine, "async": async_engine.sync_engine})
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """This worker's metrics in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
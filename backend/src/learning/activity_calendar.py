@@ -0,0 +1,123 @@
+import logging
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+from sqlalchemy.orm import Session
+from ..database.database import dialect_insert
+from ..database.models import UserActivityCalendar
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityCalendar:
+    """Days a user was active, one bit per day starting at `start`.
+
+    Bit i (little-endian across the stored bytes) is set when the user was
+    active on `start + i days`, so a year of history takes 46 bytes and
+    streaks are found with a few integer operations.
+    """
+
+    def __init__(self, start: Optional[date] = None, days: bytes = b"", longest_streak: int = 0):
+        self.start = start
+        self.bits = int.from_bytes(days, "little")
+        self.longest_streak = longest_streak
+
+    def to_bytes(self) -> bytes:
+        return self.bits.to_bytes((self.bits.bit_length() + 7) // 8, "little")
+
+    def _index(self, day: date) -> int:
+        return (day - self.start).days
+
+    def is_active(self, day: date) -> bool:
+        if self.start is None or day < self.start:
+            return False
+        return bool(self.bits >> self._index(day) & 1)
+
+    def mark(self, day: date) -> bool:
+        """Mark a day active; returns False if it already was."""
+        if self.start is None:
+            self.start = day
+        elif day < self.start:
+            # Days before the first one shift the whole bitmap up
+            self.bits <<= (self.start - day).days
+            self.start = day
+
+        index = self._index(day)
+        if self.bits >> index & 1:
+            return False
+        self.bits |= 1 << index
+
+        # The new day may join the runs on either side of it
+        run = self._run_ending(index) + self._run_starting(index + 1)
+        self.longest_streak = max(self.longest_streak, run)
+        return True
+
+    def _run_ending(self, index: int) -> int:
+        """Length of the run of active days ending at bit `index`."""
+        if index < 0:
+            return 0
+        gaps = ~self.bits & ((1 << (index + 1)) - 1)
+        return index + 1 - gaps.bit_length()
+
+    def _run_starting(self, index: int) -> int:
+        """Length of the run of active days starting at bit `index`."""
+        rest = self.bits >> index
+        return (~rest & (rest + 1)).bit_length() - 1
+
+    def current_streak(self, today: date) -> int:
+        """Consecutive active days up to today, or up to yesterday while today is still open."""
+        if self.start is None or today < self.start:
+            return 0
+        index = self._index(today)
+        if self.bits >> index & 1:
+            return self._run_ending(index)
+        return self._run_ending(index - 1)
+
+    def active_days(self, since: date, until: date) -> List[date]:
+        """Active days in [since, until]."""
+        if self.start is None:
+            return []
+        first = max(since, self.start)
+        window = self.bits >> self._index(first)
+        days = []
+        for offset in range((until - first).days + 1):
+            if not window:
+                break
+            if window & 1:
+                days.append(first + timedelta(days=offset))
+            window >>= 1
+        return days
+
+
+def load_calendar(db: Session, user_id: str) -> ActivityCalendar:
+    """The user's activity calendar (empty if they have never been active)."""
+    row = db.get(UserActivityCalendar, user_id)
+    if row is None:
+        return ActivityCalendar()
+    return ActivityCalendar(row.start_day, row.days, row.longest_streak)
+
+
+def record_activity(db: Session, user_id: str, days: Iterable[date]):
+    """Mark days active in the user's calendar, within the caller's transaction."""
+    days = set(days)
+    if not days:
+        return
+
+    # Create an empty calendar if there is none (a concurrent first write may do the same),
+    # then lock the row so concurrent writes for the user don't drop each other's days
+    db.execute(dialect_insert(db, UserActivityCalendar).values(
+        user_id=user_id, start_day=min(days), days=b"", longest_streak=0
+    ).on_conflict_do_nothing(index_elements=["user_id"]))
+    row = db.query(UserActivityCalendar).filter(
+        UserActivityCalendar.user_id == user_id
+    ).with_for_update().populate_existing().one()
+    calendar = ActivityCalendar(row.start_day, row.days, row.longest_streak)
+
+    changed = [day for day in sorted(days) if calendar.mark(day)]
+    if not changed:
+        return
+
+    row.start_day = calendar.start
+    row.days = calendar.to_bytes()
+    row.longest_streak = calendar.longest_streak
+    row.last_active_day = max(row.last_active_day or changed[-1], changed[-1])
+    db.flush()
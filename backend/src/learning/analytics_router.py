@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from ..database.database import get_async_db
+from ..auth.dependencies import require_teacher
+from ..auth.schemas import UserResponse
+from .cohort_analytics import cohort_analytics
+from .schemas import ChapterCohortStats, ScoreDistribution, AtRiskStudent, CohortSnapshotInfo
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+@router.get("/chapters", response_model=List[ChapterCohortStats])
+async def get_chapter_stats(
+    subject: Optional[str] = None,
+    teacher: UserResponse = Depends(require_teacher),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Completion distribution per chapter across all students."""
+    try:
+        await cohort_analytics.ensure_fresh()
+        return await db.run_sync(lambda session: cohort_analytics.chapter_stats(session, subject))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/scores", response_model=ScoreDistribution)
+async def get_score_distribution(
+    subject: Optional[str] = None,
+    chapter_id: Optional[str] = None,
+    teacher: UserResponse = Depends(require_teacher),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Test score percentiles and histogram, optionally for a subject or chapter."""
+    try:
+        await cohort_analytics.ensure_fresh()
+        return await db.run_sync(lambda session: cohort_analytics.score_distribution(session, subject, chapter_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/at-risk", response_model=List[AtRiskStudent])
+async def get_at_risk_students(
+    subject: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    teacher: UserResponse = Depends(require_teacher),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Students who have gone inactive or are scoring low, least recently active first."""
+    try:
+        await cohort_analytics.ensure_fresh()
+        return await db.run_sync(lambda session: cohort_analytics.at_risk_students(session, subject, limit))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/snapshot", response_model=CohortSnapshotInfo)
+async def get_snapshot_info(teacher: UserResponse = Depends(require_teacher)):
+    """Size and age of the analytics snapshot."""
+    return cohort_analytics.info()
@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from ..config import CATALOG_VERSION_CHECK_SECONDS
+from ..database.models import Chapter, CatalogVersion
+
+logger = logging.getLogger(__name__)
+
+CATALOG_NAME = "chapters"
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    id: str
+    title: str
+    subject: str
+
+
+class ChapterCatalog:
+    """Process-local cache of chapter id -> title/subject.
+
+    The cache loads lazily on first use. Each worker compares its loaded
+    version against the shared stamp in `catalog_versions` at most once per
+    `check_interval` seconds, so staleness is detected with a single
+    primary-key lookup rather than re-reading the chapters table.
+    """
+
+    def __init__(self, check_interval: float = CATALOG_VERSION_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._by_subject: Dict[str, List[str]] = {}
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        """Drop the loaded catalog; the next access reloads it."""
+        self._version = None
+
+    def get(self, db: Session, chapter_id: str) -> Optional[CatalogEntry]:
+        self._ensure_fresh(db)
+        return self._entries.get(chapter_id)
+
+    def chapter_ids(self, db: Session, subject: str) -> List[str]:
+        self._ensure_fresh(db)
+        return self._by_subject.get(subject, [])
+
+    def total_count(self, db: Session) -> int:
+        self._ensure_fresh(db)
+        return len(self._entries)
+
+    def version(self, db: Session) -> int:
+        """Version of the loaded catalog, after checking it is current."""
+        self._ensure_fresh(db)
+        return self._version
+
+    def _ensure_fresh(self, db: Session):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            self.hits += 1
+            return
+
+        version = db.query(CatalogVersion.version).filter(CatalogVersion.name == CATALOG_NAME).scalar() or 0
+        if version != self._version:
+            self.misses += 1
+            self._load(db, version)
+        else:
+            self.hits += 1
+        self._checked_at = now
+
+    def _load(self, db: Session, version: int):
+        # No lock around the query: under AsyncSession.run_sync it yields to the event loop,
+        # and a request blocked on a thread lock there would stall the loop for good.
+        # Concurrent cold reads may each load; the swap below keeps the newest.
+        entries = {}
+        by_subject: Dict[str, List[str]] = {}
+        for chapter_id, title, subject in db.query(Chapter.id, Chapter.title, Chapter.subject):
+            entries[chapter_id] = CatalogEntry(id=chapter_id, title=title, subject=subject)
+            by_subject.setdefault(subject, []).append(chapter_id)
+
+        # Swap in complete structures so concurrent readers never see a partial load
+        with self._lock:
+            if self._version is not None and self._version > version:
+                return
+            self._entries = entries
+            self._by_subject = by_subject
+            self._version = version
+        logger.info(f"Loaded chapter catalog version {version} with {len(entries)} chapters")
+
+
+def bump_catalog_version(connection):
+    """Increment the shared catalog version so other workers reload."""
+    result = connection.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.name == CATALOG_NAME)
+        .values(version=CatalogVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(CatalogVersion.__table__.insert().values(name=CATALOG_NAME, version=1))
+    chapter_catalog.invalidate()
+
+
+def notify_chapters_changed(db: Session):
+    """Mark the catalog stale after chapters are created or ingested outside the ORM."""
+    try:
+        bump_catalog_version(db.connection())
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error bumping chapter catalog version: {str(e)}")
+        raise
+
+
+@event.listens_for(Chapter, "after_insert")
+@event.listens_for(Chapter, "after_update")
+@event.listens_for(Chapter, "after_delete")
+def _chapter_changed(mapper, connection, target):
+    # Runs inside the flush, so the bump commits or rolls back with the chapter change
+    bump_catalog_version(connection)
+
+
+chapter_catalog = ChapterCatalog()
@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+from .constants import CHUNK_SIZE, CHUNK_OVERLAP
+
+# Preferred chunk boundaries, best first; with none in reach a chunk is cut at CHUNK_SIZE
+SEPARATORS = ("\n\n", "\n", ".", "!", "?", ",", " ")
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A chunk of a document; `start` and `end` are character offsets into the page texts joined together."""
+    text: str
+    start: int
+    end: int
+
+
+def _last_boundary(buffer: str, start: int, covered: int, limit: int, separators: Sequence[str]) -> Tuple[int, Optional[str]]:
+    """End of a chunk starting at `start`: just past the last occurrence of the best separator
+    that ends after `covered` (the previous chunk's end) and before `limit`."""
+    for separator in separators:
+        position = buffer.rfind(separator, max(start + 1, covered - len(separator) + 1), limit)
+        if position != -1:
+            return position + len(separator), separator
+    return limit, None
+
+
+def _overlap_start(buffer: str, start: int, end: int, overlap: int, separator: Optional[str]) -> int:
+    """Start of the next chunk: the earliest boundary of the same kind within `overlap` characters of `end`."""
+    if overlap <= 0:
+        return end
+    if separator is None:
+        return max(start + 1, end - overlap)
+    position = buffer.find(separator, max(start + 1, end - overlap - len(separator)), end - 1)
+    return end if position == -1 else position + len(separator)
+
+
+def stream_chunks(
+    pages: Iterable[str],
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    separators: Sequence[str] = SEPARATORS,
+) -> Iterator[Chunk]:
+    """Split a stream of page texts into chunks of at most `chunk_size` characters, in one pass.
+
+    Boundaries follow the same preference as a recursive character splitter
+    with `separators`: each chunk ends after the last paragraph break that
+    fits, else the last line break, sentence end, comma or space, else at
+    `chunk_size`. The next chunk starts on a boundary of the same kind at
+    most `chunk_overlap` characters back, so chunks overlap by whole words
+    or sentences; punctuation stays with the chunk it ends. Leading and
+    trailing whitespace is dropped and the offsets point at the stripped
+    text.
+
+    Only the unconsumed tail of the text and the next page are held at a
+    time; the document is never joined into one string.
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+
+    pages = iter(pages)
+    buffer = ""
+    offset = 0  # Document offset of buffer[0]
+    start = 0  # Buffer position where the next chunk begins
+    covered = 0  # Document offset where the last chunk emitted ends
+    exhausted = False
+    while True:
+        # Skip leading whitespace, then make sure a whole chunk's worth of text is buffered
+        while True:
+            while start < len(buffer) and buffer[start].isspace():
+                start += 1
+            if exhausted or len(buffer) - start > chunk_size:
+                break
+            page = next(pages, None)
+            if page is None:
+                exhausted = True
+            else:
+                offset += start
+                buffer, start = buffer[start:] + page, 0
+
+        if start >= len(buffer):
+            return
+        limit = start + chunk_size
+        if len(buffer) <= limit:
+            end, separator = len(buffer), None
+        else:
+            end, separator = _last_boundary(buffer, start, covered - offset, limit, separators)
+
+        stop = end
+        while stop > start and buffer[stop - 1].isspace():
+            stop -= 1
+        if offset + stop > covered:
+            yield Chunk(text=buffer[start:stop], start=offset + start, end=offset + stop)
+            covered = offset + stop
+        elif not exhausted or end < len(buffer):
+            # Nothing but the overlap and whitespace: continue after it instead
+            start = end
+            continue
+
+        if end == len(buffer) and exhausted:
+            return
+        start = _overlap_start(buffer, start, end, chunk_overlap, separator)
@@ -0,0 +1,366 @@
+import asyncio
+import logging
+import time
+from copy import copy
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..config import (
+    COHORT_REFRESH_SECONDS,
+    COHORT_FULL_REFRESH_SECONDS,
+    COHORT_AT_RISK_INACTIVE_DAYS,
+    COHORT_AT_RISK_SCORE,
+)
+from ..database.database import SessionLocal
+from ..database.query_metrics import query_scope
+from ..database.models import LearningProgress
+from .chapter_catalog import chapter_catalog
+from .schemas import ChapterCohortStats, ScoreDistribution, AtRiskStudent, CohortSnapshotInfo
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_BINS = 10  # 10-point buckets over 0-100
+REFRESH_OVERLAP = timedelta(seconds=60)  # Re-read rows from transactions that committed late
+REFRESH_CHUNK_ROWS = 10000  # Rows fetched and converted at a time
+
+# Per-row arrays of a snapshot, all indexed by position
+COLUMNS = ("user_idx", "chapter_idx", "completion", "highest_score", "attempts", "is_completed", "last_accessed")
+
+CHANGED_AT = func.coalesce(LearningProgress.updated_at, LearningProgress.created_at)
+
+
+def _utc(value: datetime) -> datetime:
+    """Aware UTC datetime; SQLite returns naive UTC values, PostgreSQL aware ones."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _epoch(value: Optional[datetime]) -> float:
+    """Seconds since the epoch, treating naive datetimes as UTC (NaN for None)."""
+    if value is None:
+        return np.nan
+    return _utc(value).timestamp()
+
+
+class CohortAnalytics:
+    """Columnar snapshot of learning_progress for class-wide statistics.
+
+    Each progress row is one position across parallel NumPy arrays, with
+    users and chapters stored as integer indexes. Refreshes read only rows
+    changed since the last one into copies of the arrays, on a worker
+    thread, and swap them in; a full reload runs every
+    `full_refresh_interval` seconds. Statistics are computed with
+    vectorized group-bys (bincount) over the arrays, never per user.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        refresh_interval: float = COHORT_REFRESH_SECONDS,
+        full_refresh_interval: float = COHORT_FULL_REFRESH_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.full_refresh_interval = full_refresh_interval
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.__dict__.update(self._empty_state())
+        self.refreshed_at: Optional[datetime] = None
+        self._full_refreshed_at = 0.0
+
+    @staticmethod
+    def _empty_state() -> Dict[str, Any]:
+        return {
+            "size": 0,
+            "user_ids": [],
+            "chapter_ids": [],
+            "_user_index": {},
+            "_chapter_index": {},
+            "_positions": {},
+            "user_idx": np.empty(0, dtype=np.int32),
+            "chapter_idx": np.empty(0, dtype=np.int32),
+            "completion": np.empty(0, dtype=np.float32),
+            "highest_score": np.empty(0, dtype=np.float32),
+            "attempts": np.empty(0, dtype=np.int32),
+            "is_completed": np.empty(0, dtype=bool),
+            "last_accessed": np.empty(0, dtype=np.float64),  # Epoch seconds
+            "watermark": None,
+        }
+
+    # Snapshot maintenance
+
+    def refresh(self, db: Session, full: bool = False) -> int:
+        """Load changed progress rows into the arrays; returns how many were read."""
+        count, state = self.load_changes(db, full)
+        self.publish(state)
+        return count
+
+    @query_scope("cohort.refresh")
+    def load_changes(self, db: Session, full: bool = False) -> Tuple[int, Dict[str, Any]]:
+        """Read changed progress rows into a new snapshot state; returns (rows read, state).
+
+        The published arrays are never written: rows are applied to copies
+        (or to fresh arrays on a full reload), so this can run on a worker
+        thread while statistics read the current snapshot, and a failed
+        refresh leaves it untouched. Rows are streamed in chunks and
+        converted with `np.fromiter`.
+        """
+        full = full or self.watermark is None or time.monotonic() - self._full_refreshed_at > self.full_refresh_interval
+        query = select(
+            LearningProgress.user_id,
+            LearningProgress.chapter_id,
+            LearningProgress.completion_percentage,
+            LearningProgress.highest_score,
+            LearningProgress.test_attempts,
+            LearningProgress.is_completed,
+            LearningProgress.last_accessed_at,
+            CHANGED_AT.label("changed_at"),
+        )
+        if full:
+            state = self._empty_state()
+        else:
+            # Range scan over the changed-at expression index
+            query = query.where(CHANGED_AT >= self.watermark - REFRESH_OVERLAP)
+            state = {name: copy(getattr(self, name)) for name in self._empty_state()}
+
+        # Database clock, for the watermark when no rows are read
+        started = _utc(db.execute(select(func.now())).scalar_one())
+        count = 0
+        watermark = state["watermark"]
+        result = db.execute(query, execution_options={"yield_per": REFRESH_CHUNK_ROWS})
+        for chunk in result.tuples().partitions():
+            self._apply(state, chunk)
+            count += len(chunk)
+            changed = max((_utc(row[7]) for row in chunk if row[7] is not None), default=None)
+            if changed is not None and (watermark is None or changed > watermark):
+                watermark = changed
+
+        state["watermark"] = watermark if watermark is not None else started
+        state["refreshed_at"] = datetime.now(timezone.utc)
+        if full:
+            state["_full_refreshed_at"] = time.monotonic()
+        return count, state
+
+    def publish(self, state: Dict[str, Any]):
+        """Make a state from `load_changes` the current snapshot, all attributes at once."""
+        self.__dict__.update(state)
+
+    @classmethod
+    def _apply(cls, state: Dict[str, Any], rows: List[tuple]):
+        positions = np.empty(len(rows), dtype=np.int64)
+        new_keys = []
+        size = state["size"]
+        for i, row in enumerate(rows):
+            key = (cls._index(state["_user_index"], state["user_ids"], row[0]),
+                   cls._index(state["_chapter_index"], state["chapter_ids"], row[1]))
+            position = state["_positions"].get(key)
+            if position is None:
+                position = size + len(new_keys)
+                state["_positions"][key] = position
+                new_keys.append(key)
+            positions[i] = position
+
+        if new_keys:
+            end = size + len(new_keys)
+            if end > len(state["user_idx"]):
+                cls._grow(state, max(end, 2 * len(state["user_idx"])))
+            keys = np.array(new_keys, dtype=np.int32)
+            state["user_idx"][size:end] = keys[:, 0]
+            state["chapter_idx"][size:end] = keys[:, 1]
+            state["size"] = end
+
+        count = len(rows)
+        state["completion"][positions] = np.fromiter((row[2] or 0.0 for row in rows), np.float32, count)
+        state["highest_score"][positions] = np.fromiter((row[3] or 0.0 for row in rows), np.float32, count)
+        state["attempts"][positions] = np.fromiter((row[4] or 0 for row in rows), np.int32, count)
+        state["is_completed"][positions] = np.fromiter((bool(row[5]) for row in rows), bool, count)
+        state["last_accessed"][positions] = np.fromiter((_epoch(row[6]) for row in rows), np.float64, count)
+
+    @staticmethod
+    def _grow(state: Dict[str, Any], capacity: int):
+        for name in COLUMNS:
+            column = state[name]
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            state[name] = grown
+
+    @staticmethod
+    def _index(index: Dict[str, int], values: List[str], value: str) -> int:
+        position = index.get(value)
+        if position is None:
+            position = index[value] = len(values)
+            values.append(value)
+        return position
+
+    def _load_changes(self) -> Tuple[int, Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            return self.load_changes(db)
+        finally:
+            db.close()
+
+    async def ensure_fresh(self):
+        """Refresh the snapshot if it is older than the refresh interval."""
+        if self.refreshed_at is not None and datetime.now(timezone.utc) - self.refreshed_at < timedelta(seconds=self.refresh_interval):
+            return
+        async with self._lock:
+            if self.refreshed_at is not None and datetime.now(timezone.utc) - self.refreshed_at < timedelta(seconds=self.refresh_interval):
+                return
+            # Read and convert the rows on a worker thread; publish back on the loop, between requests' reads
+            count, state = await asyncio.to_thread(self._load_changes)
+            self.publish(state)
+            logger.info(f"Refreshed cohort snapshot with {count} progress rows ({self.size} total)")
+
+    async def start(self):
+        """Start the periodic refresh loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.ensure_fresh()
+            except Exception as e:
+                logger.error(f"Error refreshing cohort snapshot: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
+
+    # Statistics
+
+    def info(self) -> CohortSnapshotInfo:
+        return CohortSnapshotInfo(
+            rows=self.size,
+            students=len(self.user_ids),
+            chapters=len(self.chapter_ids),
+            refreshed_at=self.refreshed_at
+        )
+
+    def _row_mask(self, db: Session, subject: Optional[str] = None, chapter_id: Optional[str] = None) -> np.ndarray:
+        # Read the catalog first: it may query the database, and a refresh can run meanwhile
+        subject_chapters = chapter_catalog.chapter_ids(db, subject) if subject else []
+        mask = np.ones(self.size, dtype=bool)
+        if subject:
+            wanted = [self._chapter_index[c] for c in subject_chapters if c in self._chapter_index]
+            mask &= np.isin(self.chapter_idx[:self.size], wanted)
+        if chapter_id:
+            mask &= self.chapter_idx[:self.size] == self._chapter_index.get(chapter_id, -1)
+        return mask
+
+    def chapter_stats(self, db: Session, subject: Optional[str] = None) -> List[ChapterCohortStats]:
+        """Completion distribution per chapter."""
+        mask = self._row_mask(db, subject)
+        chapter_ids = self.chapter_ids
+        chapters = self.chapter_idx[:self.size][mask]
+        completion = self.completion[:self.size][mask]
+        count = len(chapter_ids)
+
+        students = np.bincount(chapters, minlength=count)
+        completed = np.bincount(chapters, weights=self.is_completed[:self.size][mask], minlength=count)
+        completion_sum = np.bincount(chapters, weights=completion, minlength=count)
+        buckets = np.clip((completion // HISTOGRAM_BINS).astype(np.int64), 0, HISTOGRAM_BINS - 1)
+        histogram = np.bincount(chapters * HISTOGRAM_BINS + buckets, minlength=count * HISTOGRAM_BINS).reshape(count, HISTOGRAM_BINS)
+
+        stats = []
+        for index in np.flatnonzero(students):
+            chapter = chapter_catalog.get(db, chapter_ids[index])
+            if chapter is None:
+                continue
+            stats.append(ChapterCohortStats(
+                chapter_id=chapter.id,
+                title=chapter.title,
+                subject=chapter.subject,
+                students=int(students[index]),
+                completed=int(completed[index]),
+                average_completion=float(completion_sum[index] / students[index]),
+                completion_histogram=histogram[index].tolist()
+            ))
+        return stats
+
+    def score_distribution(self, db: Session, subject: Optional[str] = None, chapter_id: Optional[str] = None) -> ScoreDistribution:
+        """Percentiles and histogram of highest scores over tested chapters."""
+        mask = self._row_mask(db, subject, chapter_id) & (self.attempts[:self.size] > 0)
+        scores = self.highest_score[:self.size][mask]
+        if not len(scores):
+            return ScoreDistribution(
+                attempted=0, average_score=0.0, percentiles={f"p{p}": 0.0 for p in PERCENTILES}, histogram=[0] * HISTOGRAM_BINS
+            )
+
+        buckets = np.clip((scores // HISTOGRAM_BINS).astype(np.int64), 0, HISTOGRAM_BINS - 1)
+        return ScoreDistribution(
+            attempted=int(len(scores)),
+            average_score=float(scores.mean()),
+            percentiles={f"p{p}": float(value) for p, value in zip(PERCENTILES, np.percentile(scores, PERCENTILES))},
+            histogram=np.bincount(buckets, minlength=HISTOGRAM_BINS).tolist()
+        )
+
+    def at_risk_students(
+        self,
+        db: Session,
+        subject: Optional[str] = None,
+        limit: int = 50,
+        inactive_days: int = COHORT_AT_RISK_INACTIVE_DAYS,
+        min_score: float = COHORT_AT_RISK_SCORE
+    ) -> List[AtRiskStudent]:
+        """Students inactive for `inactive_days` or averaging below `min_score`, least active first."""
+        mask = self._row_mask(db, subject)
+        user_ids = self.user_ids
+        users = self.user_idx[:self.size][mask]
+        tested = self.attempts[:self.size][mask] > 0
+        count = len(user_ids)
+
+        started = np.bincount(users, minlength=count)
+        completion_sum = np.bincount(users, weights=self.completion[:self.size][mask], minlength=count)
+        tested_count = np.bincount(users, weights=tested, minlength=count)
+        score_sum = np.bincount(users, weights=np.where(tested, self.highest_score[:self.size][mask], 0.0), minlength=count)
+        last_active = np.full(count, -np.inf)
+        np.fmax.at(last_active, users, self.last_accessed[:self.size][mask])
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            average_score = score_sum / tested_count
+        cutoff = time.time() - inactive_days * 86400
+        inactive = (started > 0) & (last_active < cutoff)
+        low_score = (tested_count > 0) & (average_score < min_score)
+
+        # Least recently active first
+        candidates = np.flatnonzero(inactive | low_score)
+        candidates = candidates[np.argsort(last_active[candidates], kind="stable")][:limit]
+
+        students = []
+        for index in candidates:
+            reasons = []
+            if inactive[index]:
+                reasons.append(f"inactive for {inactive_days}+ days")
+            if low_score[index]:
+                reasons.append(f"average score below {min_score:g}")
+            students.append(AtRiskStudent(
+                user_id=user_ids[index],
+                chapters_started=int(started[index]),
+                average_completion=float(completion_sum[index] / started[index]),
+                average_score=float(average_score[index]) if tested_count[index] else None,
+                last_active_at=(
+                    datetime.fromtimestamp(last_active[index], tz=timezone.utc)
+                    if np.isfinite(last_active[index]) else None
+                ),
+                reasons=reasons
+            ))
+        return students
+
+
+cohort_analytics = CohortAnalytics()
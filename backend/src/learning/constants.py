@@ -9,3 +9,12 @@ VECTOR_QUERY_NAME = "match_documents"
 LLM_MODEL_NAME = "llama3-8b-8192"
 AUDIO_SAMPLE_RATE = 22050
 AUDIO_OUTPUT_DIR = "uploads/audio"
+
+# Progress summary limits
+RECENT_TEST_SCORES_LIMIT = 10
+RECENTLY_COMPLETED_LIMIT = 5
+CHAPTERS_IN_PROGRESS_LIMIT = 10
+
+# Activity heatmap range when none is given
+ACTIVITY_DEFAULT_DAYS = 365
+ACTIVITY_MAX_DAYS = 3 * 366
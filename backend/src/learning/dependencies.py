@@ -1,6 +1,9 @@
 from fastapi import Depends
 from .service import LearningService
 
+# Shared by all requests; its components are loaded on first use
+learning_service = LearningService()
+
 def get_learning_service() -> LearningService:
     """Get learning service instance."""
-    return LearningService()
+    return learning_service
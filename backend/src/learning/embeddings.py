@@ -1,13 +1,15 @@
-import os
+import asyncio
 import logging
-from typing import List, Dict, Any
+import uuid
+from typing import Iterable, List, Dict, Any
 from pathlib import Path
 import fitz  # PyMuPDF
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain_community.vectorstores import SupabaseVectorStore
-from supabase import create_client, Client
+from langchain_core.documents import Document
+from supabase import Client
 from dotenv import load_dotenv
+from ..clients import get_supabase, get_embeddings, get_vector_store
+from ..metrics import track_stage
+from .chunking import Chunk, stream_chunks
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,50 +20,26 @@ load_dotenv()
 
 class PDFEmbedder:
     def __init__(self):
-        # Initialize Supabase client
-        self.supabase: Client = create_client(
-            os.getenv("SUPABASE_URL", ""),
-            os.getenv("SUPABASE_KEY", "")
-        )
-        
-        # Initialize Ollama embeddings
-        self.embeddings = OllamaEmbeddings(
-            model="nomic-embed-text",
-            base_url="http://localhost:11434"
-        )
-        
-        # Initialize vector store
-        self.vector_store = SupabaseVectorStore(
-            client=self.supabase,
-            embedding=self.embeddings,
-            table_name="document_embeddings",
-            query_name="match_documents"
-        )
-        
-        # Initialize text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50,
-            length_function=len,
-            separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
-        )
+        # Shared Supabase client, embeddings and vector store
+        self.supabase: Client = get_supabase()
+        self.embeddings = get_embeddings()
+        self.vector_store = get_vector_store()
 
-    def extract_text_from_pdf(self, pdf_path: Path) -> str:
-        """Extract text from PDF using PyMuPDF."""
+    def extract_pages_from_pdf(self, pdf_path: Path) -> List[str]:
+        """Extract the text of each page using PyMuPDF."""
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            return text
+            with track_stage("pdf_extract"):
+                with fitz.open(pdf_path) as doc:
+                    return [page.get_text() for page in doc]
         except Exception as e:
             logger.error(f"Error extracting text from PDF {pdf_path}: {str(e)}")
             raise
 
-    def create_chunks(self, text: str) -> List[str]:
-        """Split text into chunks."""
+    def create_chunks(self, pages: Iterable[str]) -> List[Chunk]:
+        """Split page texts into overlapping chunks with their character offsets."""
         try:
-            chunks = self.text_splitter.split_text(text)
+            with track_stage("chunking"):
+                chunks = list(stream_chunks(pages))
             return chunks
         except Exception as e:
             logger.error(f"Error creating chunks: {str(e)}")
@@ -71,10 +49,10 @@ class PDFEmbedder:
         """Process PDF file and store embeddings in Supabase."""
         try:
             # Extract text
-            text = self.extract_text_from_pdf(pdf_path)
+            pages = self.extract_pages_from_pdf(pdf_path)
             
             # Create chunks
-            chunks = self.create_chunks(text)
+            chunks = self.create_chunks(pages)
             
             # Prepare metadata for each chunk
             chunk_metadata = []
@@ -83,15 +61,25 @@ class PDFEmbedder:
                     "chunk_id": i,
                     "source": pdf_path.name,
                     "chunk_index": i,
+                    "start_offset": chunk.start,
+                    "end_offset": chunk.end,
                     **(metadata or {})
                 }
                 chunk_metadata.append(chunk_meta)
             
-            # Store in vector database
-            self.vector_store.add_texts(
-                texts=chunks,
-                metadatas=chunk_metadata
-            )
+            # Embed, then store in vector database
+            vectors = await self.embeddings.aembed_documents([chunk.text for chunk in chunks])
+
+            def insert():
+                with track_stage("vector_insert"):
+                    self.vector_store.add_vectors(
+                        vectors,
+                        [Document(page_content=chunk.text, metadata=meta) for chunk, meta in zip(chunks, chunk_metadata)],
+                        [str(uuid.uuid4()) for _ in chunks]
+                    )
+
+            # The vector store client is synchronous
+            await asyncio.to_thread(insert)
             
             return {
                 "status": "success",
@@ -106,10 +94,17 @@ class PDFEmbedder:
     async def search_similar_chunks(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
         """Search for similar chunks using vector similarity."""
         try:
-            results = self.vector_store.similarity_search_with_score(
-                query,
-                k=k
-            )
+            embedding = await self.embeddings.aembed_query(query)
+
+            def search():
+                with track_stage("vector_query"):
+                    return self.vector_store.similarity_search_by_vector_with_relevance_scores(
+                        embedding,
+                        k=k
+                    )
+
+            # The vector store client is synchronous
+            results = await asyncio.to_thread(search)
             
             return [
                 {
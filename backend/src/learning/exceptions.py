@@ -16,3 +16,7 @@ class RAGError(LearningError):
 
 class TestGenerationError(LearningError):
     pass
+
+class LLMRejectedError(LearningError):
+    """Raised when the LLM scheduler cannot serve a call within its deadline."""
+    pass
@@ -0,0 +1,301 @@
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config import (
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_CONCURRENCY_INTERACTIVE,
+    LLM_CONCURRENCY_EXPLANATION,
+    LLM_CONCURRENCY_BACKGROUND,
+    LLM_DEADLINE_INTERACTIVE,
+    LLM_DEADLINE_EXPLANATION,
+    LLM_DEADLINE_BACKGROUND,
+)
+from .exceptions import LLMRejectedError
+
+logger = logging.getLogger(__name__)
+
+
+class LLMPriority(IntEnum):
+    """Priority classes for LLM calls; lower values are served first."""
+    INTERACTIVE = 0  # Chapter Q&A, a student is waiting on the answer
+    EXPLANATION = 1  # Narrated explanations
+    BACKGROUND = 2   # MCQ test generation
+
+
+def estimate_tokens(prompt: str, max_output_tokens: int = 500) -> int:
+    """Rough token estimate for budgeting (about 4 characters per token)."""
+    return len(prompt) // 4 + max_output_tokens
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed rate."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+            self.updated_at = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.refill_per_second
+
+    def consume(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+
+@dataclass
+class LLMClassStats:
+    """Counters and queue-wait metrics for one priority class."""
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    queued: int = 0
+    in_flight: int = 0
+    total_queue_wait: float = 0.0
+    max_queue_wait: float = 0.0
+    avg_service_time: float = 1.0  # Exponentially weighted, seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        started = self.completed + self.failed + self.in_flight
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "avg_queue_wait": self.total_queue_wait / started if started else 0.0,
+            "max_queue_wait": self.max_queue_wait,
+            "avg_service_time": self.avg_service_time,
+        }
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    expiry: Optional[asyncio.TimerHandle] = field(default=None, compare=False)
+
+
+class LLMScheduler:
+    """Coordinates all LLM calls through priority classes and shared budgets.
+
+    Each priority class has its own concurrency cap, while the request and
+    token budgets (per minute) are shared. Waiting calls are admitted in
+    priority order, and a call whose deadline cannot be met is rejected
+    up front instead of sitting in the queue.
+    """
+
+    def __init__(
+        self,
+        concurrency: Dict[LLMPriority, int],
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        deadlines: Optional[Dict[LLMPriority, float]] = None,
+    ):
+        self.concurrency = concurrency
+        self.deadlines = deadlines or {}
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats = {priority: LLMClassStats() for priority in LLMPriority}
+
+    @classmethod
+    def from_settings(cls) -> "LLMScheduler":
+        return cls(
+            concurrency={
+                LLMPriority.INTERACTIVE: LLM_CONCURRENCY_INTERACTIVE,
+                LLMPriority.EXPLANATION: LLM_CONCURRENCY_EXPLANATION,
+                LLMPriority.BACKGROUND: LLM_CONCURRENCY_BACKGROUND,
+            },
+            requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+            deadlines={
+                LLMPriority.INTERACTIVE: LLM_DEADLINE_INTERACTIVE,
+                LLMPriority.EXPLANATION: LLM_DEADLINE_EXPLANATION,
+                LLMPriority.BACKGROUND: LLM_DEADLINE_BACKGROUND,
+            },
+        )
+
+    async def run(
+        self,
+        priority: LLMPriority,
+        call: Callable[[], Any],
+        estimated_tokens: int,
+        deadline: Optional[float] = None,
+    ) -> Any:
+        """Run a blocking LLM call once a slot and budget are available.
+
+        `deadline` is the maximum queue wait in seconds; it defaults to the
+        class deadline from settings. The call itself runs in a worker thread
+        so it does not block the event loop.
+        """
+        await self.acquire(priority, estimated_tokens, deadline)
+        stats = self.stats[priority]
+        started_at = time.monotonic()
+        try:
+            result = await asyncio.to_thread(call)
+            stats.completed += 1
+            return result
+        except Exception:
+            stats.failed += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - started_at
+            stats.avg_service_time = 0.8 * stats.avg_service_time + 0.2 * elapsed
+            self.release(priority)
+
+    async def acquire(self, priority: LLMPriority, estimated_tokens: int, deadline: Optional[float] = None):
+        """Wait for a slot in `priority`'s class; raise LLMRejectedError on timeout."""
+        if deadline is None:
+            deadline = self.deadlines.get(priority)
+        stats = self.stats[priority]
+        stats.submitted += 1
+        now = time.monotonic()
+
+        if deadline is not None:
+            expected_wait = self._estimate_wait(priority, estimated_tokens, now)
+            if expected_wait > deadline:
+                stats.rejected += 1
+                raise LLMRejectedError(
+                    f"LLM {priority.name.lower()} call rejected: expected wait "
+                    f"{expected_wait:.1f}s exceeds deadline {deadline:.1f}s"
+                )
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(
+            priority=int(priority),
+            seq=next(self._seq),
+            tokens=estimated_tokens,
+            enqueued_at=now,
+            future=loop.create_future(),
+        )
+        if deadline is not None:
+            waiter.expiry = loop.call_later(deadline, self._expire, waiter)
+        bisect.insort(self._queue, waiter)
+        stats.queued += 1
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # Caller went away; give back the slot if we had already granted it
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                self.release(priority)
+            else:
+                self._remove(waiter)
+            raise
+
+        wait = time.monotonic() - waiter.enqueued_at
+        stats.total_queue_wait += wait
+        stats.max_queue_wait = max(stats.max_queue_wait, wait)
+
+    def release(self, priority: LLMPriority):
+        """Free a concurrency slot and admit the next waiters."""
+        self.stats[priority].in_flight -= 1
+        self._dispatch()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current queue and budget state, keyed by priority class name."""
+        now = time.monotonic()
+        self._requests._refill(now)
+        self._tokens._refill(now)
+        return {
+            "classes": {priority.name.lower(): self.stats[priority].as_dict() for priority in LLMPriority},
+            "requests_available": self._requests.tokens,
+            "tokens_available": self._tokens.tokens,
+        }
+
+    def _estimate_wait(self, priority: LLMPriority, estimated_tokens: int, now: float) -> float:
+        """Estimate queue wait for a new call from the budget and the class backlog."""
+        ahead = [w for w in self._queue if w.priority <= priority]
+        budget_wait = max(
+            self._requests.time_until(len(ahead) + 1, now),
+            self._tokens.time_until(sum(w.tokens for w in ahead) + estimated_tokens, now),
+        )
+
+        stats = self.stats[priority]
+        cap = self.concurrency[priority]
+        same_class = sum(1 for w in ahead if w.priority == priority)
+        backlog = stats.in_flight + same_class + 1 - cap
+        concurrency_wait = backlog / cap * stats.avg_service_time if backlog > 0 else 0.0
+
+        return max(budget_wait, concurrency_wait)
+
+    def _dispatch(self):
+        """Admit waiters in priority order while slots and budget allow."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = time.monotonic()
+        for waiter in list(self._queue):
+            if waiter.future.done():
+                # Cancelled (or expired) before its turn: drop it without spending a slot or budget
+                self._remove(waiter)
+                continue
+            priority = LLMPriority(waiter.priority)
+            stats = self.stats[priority]
+            if stats.in_flight >= self.concurrency[priority]:
+                continue
+
+            budget_wait = max(
+                self._requests.time_until(1, now),
+                self._tokens.time_until(waiter.tokens, now),
+            )
+            if budget_wait > 0:
+                # Don't let lower classes drain the budget this waiter needs
+                self._timer = asyncio.get_running_loop().call_later(budget_wait, self._dispatch)
+                return
+
+            self._requests.consume(1, now)
+            self._tokens.consume(waiter.tokens, now)
+            self._remove(waiter)
+            stats.in_flight += 1
+            waiter.future.set_result(None)
+
+    def _expire(self, waiter: _Waiter):
+        if waiter.future.done():
+            return
+        self._remove(waiter)
+        priority = LLMPriority(waiter.priority)
+        self.stats[priority].rejected += 1
+        waiter.future.set_exception(
+            LLMRejectedError(f"LLM {priority.name.lower()} call timed out waiting in queue")
+        )
+
+    def _remove(self, waiter: _Waiter):
+        index = bisect.bisect_left(self._queue, waiter)
+        if index < len(self._queue) and self._queue[index] is waiter:
+            del self._queue[index]
+            self.stats[LLMPriority(waiter.priority)].queued -= 1
+        if waiter.expiry is not None:
+            waiter.expiry.cancel()
+
+
+llm_scheduler = LLMScheduler.from_settings()
@@ -1,13 +1,14 @@
-import os
+import asyncio
 import logging
+import threading
 from typing import Optional, Dict, Any
 from pathlib import Path
-import sounddevice as sd
-import soundfile as sf
 import numpy as np
-from groq import Groq
-from TTS.api import TTS
 from dotenv import load_dotenv
+from ..clients import get_groq_client, get_inference_client
+from ..config import INFERENCE_SOCKET, TTS_MODEL_NAME
+from ..metrics import track_stage
+from .llm_scheduler import llm_scheduler, LLMPriority, estimate_tokens
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,19 +17,37 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+def load_tts_model():
+    """Load the Coqui TTS model (imports torch; takes seconds and hundreds of MB)."""
+    from TTS.api import TTS
+
+    return TTS(model_name=TTS_MODEL_NAME)
+
 class Narrator:
     def __init__(self):
-        # Initialize Groq client
-        self.groq_client = Groq(
-            api_key=os.getenv("GROQ_API_KEY", "")
-        )
+        # Shared Groq client
+        self.groq_client = get_groq_client()
         
-        # Initialize TTS
-        self.tts = TTS(model_name="tts_models/en/ljspeech/tacotron2-DDC")
+        # TTS model (and torch) is loaded on first use, or served by the inference sidecar
+        self._tts = None
+        self._tts_lock = threading.Lock()
         
         # Audio settings
         self.sample_rate = 22050  # TTS default sample rate
 
+    @property
+    def tts(self):
+        if self._tts is None:
+            with self._tts_lock:
+                if self._tts is None:
+                    if INFERENCE_SOCKET:
+                        from ..inference.client import RemoteTTS
+
+                        self._tts = RemoteTTS(get_inference_client())
+                    else:
+                        self._tts = load_tts_model()
+        return self._tts
+
     async def generate_explanation(self, text: str) -> str:
         """Generate a simplified explanation using Groq's Llama3-8B."""
         try:
@@ -39,14 +58,22 @@ class Narrator:
 
             Explanation:"""
             
-            response = self.groq_client.chat.completions.create(
-                model="llama3-8b-8192",
-                messages=[
-                    {"role": "system", "content": "You are a helpful educational assistant that explains concepts clearly and concisely."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
+            def explain():
+                with track_stage("llm"):
+                    return self.groq_client.chat.completions.create(
+                        model="llama3-8b-8192",
+                        messages=[
+                            {"role": "system", "content": "You are a helpful educational assistant that explains concepts clearly and concisely."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=0.7,
+                        max_tokens=500
+                    )
+
+            response = await llm_scheduler.run(
+                LLMPriority.EXPLANATION,
+                explain,
+                estimated_tokens=estimate_tokens(prompt, max_output_tokens=500)
             )
             
             return response.choices[0].message.content.strip()
@@ -58,17 +85,21 @@ class Narrator:
     async def text_to_speech(self, text: str, output_path: Optional[Path] = None) -> str:
         """Convert text to speech and optionally save to file."""
         try:
-            if output_path:
-                # Generate and save audio file
-                self.tts.tts_to_file(
-                    text=text,
-                    file_path=str(output_path)
-                )
-                return str(output_path)
-            else:
-                # Generate audio in memory
-                audio = self.tts.tts(text=text)
-                return audio
+            def synthesize():
+                with track_stage("tts"):
+                    if output_path:
+                        # Generate and save audio file
+                        self.tts.tts_to_file(
+                            text=text,
+                            file_path=str(output_path)
+                        )
+                        return str(output_path)
+                    else:
+                        # Generate audio in memory
+                        return self.tts.tts(text=text)
+
+            # Synthesis (and loading the model, or waiting on the sidecar) blocks for seconds
+            return await asyncio.to_thread(synthesize)
                 
         except Exception as e:
             logger.error(f"Error in text-to-speech: {str(e)}")
@@ -77,8 +108,10 @@ class Narrator:
     async def play_audio(self, audio_data: np.ndarray):
         """Play audio data using sounddevice."""
         try:
+            import sounddevice as sd
+
             sd.play(audio_data, self.sample_rate)
-            sd.wait()  # Wait until audio is finished playing
+            await asyncio.to_thread(sd.wait)  # Wait until audio is finished playing
         except Exception as e:
             logger.error(f"Error playing audio: {str(e)}")
             raise
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy.exc import InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import (
+    PROGRESS_WRITE_BEHIND,
+    PROGRESS_FLUSH_INTERVAL_SECONDS,
+    PROGRESS_FLUSH_MAX_PENDING,
+    PROGRESS_FLUSH_MAX_ATTEMPTS,
+)
+from ..database.database import AsyncSessionLocal
+from ..database.models import LearningProgress
+from .schemas import LearningProgressUpdate, LearningProgressResponse
+
+logger = logging.getLogger(__name__)
+
+# The database is unreachable, busy or out of connections: no entry is at fault
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError)
+
+
+@dataclass
+class PendingProgress:
+    """Coalesced, not yet written progress for one (user, chapter)."""
+    user_id: str
+    chapter_id: str
+    last_accessed_at: datetime
+    is_completed: Optional[bool] = None
+    completion_percentage: Optional[float] = None
+    completed_sections: Optional[int] = None
+    base: Dict[str, Any] = field(default_factory=dict)  # Stored row the pending values apply to
+    failures: int = 0  # Flushes that failed on this entry alone
+
+    def merge(self, update_data: LearningProgressUpdate, at: datetime):
+        """Fold in a newer update: latest values win, completion only goes up."""
+        if update_data.is_completed is not None:
+            self.is_completed = update_data.is_completed
+        if update_data.completion_percentage is not None:
+            self.completion_percentage = max(self.completion_percentage or 0.0, update_data.completion_percentage)
+        if update_data.completed_sections is not None:
+            self.completed_sections = update_data.completed_sections
+        self.last_accessed_at = at
+
+    def absorb(self, newer: "PendingProgress"):
+        """Fold in an entry that was queued after this one."""
+        self.merge(
+            LearningProgressUpdate(
+                is_completed=newer.is_completed,
+                completion_percentage=newer.completion_percentage,
+                completed_sections=newer.completed_sections
+            ),
+            newer.last_accessed_at
+        )
+
+    def view(self) -> Dict[str, Any]:
+        """The stored row with the pending values applied."""
+        view = dict(self.base)
+        for name in ("is_completed", "completion_percentage", "completed_sections", "last_accessed_at"):
+            value = getattr(self, name)
+            if value is not None:
+                view[name] = value
+        return view
+
+
+class ProgressWriteBuffer:
+    """Write-behind buffer for high-frequency progress updates.
+
+    Updates are coalesced per (user, chapter) in memory and written by
+    `apply` in one batched transaction every `flush_interval` seconds, when
+    `max_pending` keys are waiting, before a read of the same user, and on
+    shutdown. The buffer is per process, so read-your-writes holds within
+    the worker that accepted the update.
+
+    A batch that fails is retried in halves, so one entry the database
+    rejects doesn't hold back the rest; an entry that fails on its own is
+    requeued and dropped, with an error logged, after `max_attempts`
+    flushes. When the database itself is unavailable the batch is requeued
+    as is.
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[Session, List[PendingProgress]], int],
+        session_factory=AsyncSessionLocal,
+        enabled: bool = PROGRESS_WRITE_BEHIND,
+        flush_interval: float = PROGRESS_FLUSH_INTERVAL_SECONDS,
+        max_pending: int = PROGRESS_FLUSH_MAX_PENDING,
+        max_attempts: int = PROGRESS_FLUSH_MAX_ATTEMPTS,
+    ):
+        self.apply = apply
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max(1, max_attempts)
+        self._pending: Dict[Tuple[str, str], PendingProgress] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._threshold_flush: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def add(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        chapter_id: str,
+        update_data: LearningProgressUpdate
+    ) -> Optional[Dict[str, Any]]:
+        """Buffer an update and return the resulting progress view.
+
+        Returns None when the user has no row for the chapter yet; the caller
+        writes that first update through so the row gets its id.
+        """
+        key = (user_id, chapter_id)
+        entry = self._pending.get(key)
+        if entry is None:
+            row = await db.run_sync(
+                lambda session: session.query(LearningProgress).filter(
+                    LearningProgress.user_id == user_id,
+                    LearningProgress.chapter_id == chapter_id
+                ).first()
+            )
+            if row is None:
+                return None
+            base = {name: getattr(row, name, None) for name in LearningProgressResponse.model_fields}
+            entry = self._pending.setdefault(
+                key, PendingProgress(user_id=user_id, chapter_id=chapter_id, last_accessed_at=datetime.utcnow(), base=base)
+            )
+
+        entry.merge(update_data, datetime.utcnow())
+
+        if len(self._pending) >= self.max_pending and (self._threshold_flush is None or self._threshold_flush.done()):
+            self._threshold_flush = asyncio.create_task(self.flush())
+        return entry.view()
+
+    async def flush(self, user_id: Optional[str] = None, chapter_id: Optional[str] = None) -> int:
+        """Write pending updates (optionally only one user's or one key's)."""
+        async with self._flush_lock:
+            keys = [
+                key for key in self._pending
+                if (user_id is None or key[0] == user_id) and (chapter_id is None or key[1] == chapter_id)
+            ]
+            if not keys:
+                return 0
+
+            return await self._write([self._pending.pop(key) for key in keys])
+
+    async def _write(self, batch: List[PendingProgress]) -> int:
+        """Write a batch in one transaction, splitting it on failure; returns how many entries were written."""
+        try:
+            async with self.session_factory() as db:
+                return await db.run_sync(lambda session: self.apply(session, batch))
+        except TRANSIENT_ERRORS as e:
+            logger.error(f"Error flushing {len(batch)} pending progress updates: {str(e)}")
+            self._requeue(batch)
+            return 0
+        except Exception as e:
+            if len(batch) > 1:
+                logger.error(f"Error flushing {len(batch)} pending progress updates, retrying in halves: {str(e)}")
+                middle = len(batch) // 2
+                return await self._write(batch[:middle]) + await self._write(batch[middle:])
+
+            entry = batch[0]
+            entry.failures += 1
+            if entry.failures >= self.max_attempts:
+                logger.error(
+                    f"Dropping pending progress for user {entry.user_id}, chapter {entry.chapter_id} "
+                    f"after {entry.failures} failed flushes: {str(e)}"
+                )
+                return 0
+            logger.error(
+                f"Error flushing pending progress for user {entry.user_id}, chapter {entry.chapter_id} "
+                f"(attempt {entry.failures} of {self.max_attempts}): {str(e)}"
+            )
+            self._requeue(batch)
+            return 0
+
+    async def start(self):
+        """Start the periodic flush loop (no-op when write-behind is disabled)."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write everything still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _requeue(self, batch: List[PendingProgress]):
+        """Put a failed batch back, keeping anything that arrived meanwhile on top."""
+        for entry in batch:
+            key = (entry.user_id, entry.chapter_id)
+            newer = self._pending.get(key)
+            if newer is not None:
+                entry.absorb(newer)
+            self._pending[key] = entry
@@ -0,0 +1,293 @@
+import logging
+import sys
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, select, delete, update, Select
+from ..database.database import dialect_insert
+from ..database.models import LearningProgress, Chapter, UserProgressRollup, UserSubjectRollup
+
+logger = logging.getLogger(__name__)
+
+USER_ROLLUP_FIELDS = ("chapters_started", "completed_chapters", "total_completion", "current_streak", "longest_streak")
+SUBJECT_ROLLUP_FIELDS = ("chapters_started", "completed_chapters", "total_completion", "total_score", "test_count")
+
+
+def _user_aggregates(*criteria) -> Select:
+    return select(
+        LearningProgress.user_id,
+        func.count(LearningProgress.id).label("chapters_started"),
+        func.sum(case((LearningProgress.is_completed.is_(True), 1), else_=0)).label("completed_chapters"),
+        func.coalesce(func.sum(LearningProgress.completion_percentage), 0.0).label("total_completion"),
+        func.coalesce(func.max(LearningProgress.current_streak), 0).label("current_streak"),
+        func.coalesce(func.max(LearningProgress.longest_streak), 0).label("longest_streak"),
+        func.max(LearningProgress.last_accessed_at).label("last_activity_at")
+    ).where(*criteria).group_by(LearningProgress.user_id)
+
+
+def _subject_aggregates(*criteria) -> Select:
+    return select(
+        LearningProgress.user_id,
+        Chapter.subject,
+        func.count(LearningProgress.id).label("chapters_started"),
+        func.sum(case((LearningProgress.is_completed.is_(True), 1), else_=0)).label("completed_chapters"),
+        func.coalesce(func.sum(LearningProgress.completion_percentage), 0.0).label("total_completion"),
+        func.sum(case((LearningProgress.test_attempts > 0, LearningProgress.highest_score), else_=0.0)).label("total_score"),
+        func.sum(case((LearningProgress.test_attempts > 0, 1), else_=0)).label("test_count")
+    ).join(
+        Chapter, Chapter.id == LearningProgress.chapter_id
+    ).where(*criteria).group_by(LearningProgress.user_id, Chapter.subject)
+
+
+def _upsert_from(db: Session, model, aggregates: Select, key_columns: List[str], **extra_set):
+    """INSERT ... SELECT the aggregates, overwriting existing rollup rows."""
+    columns = [column.name for column in aggregates.selected_columns]
+    stmt = dialect_insert(db, model).from_select(columns, aggregates)
+    return db.execute(stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            **{column: stmt.excluded[column] for column in columns if column not in key_columns},
+            "updated_at": func.now(),
+            **extra_set
+        }
+    ))
+
+
+def progress_states(db: Session, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Any]:
+    """The stored values the rollups depend on, by (user_id, chapter_id).
+
+    Read before the rows are written, with the rows locked (FOR UPDATE)
+    until the caller's transaction ends, so no concurrent write can change
+    them between this read and the caller's upsert.
+    """
+    keys = set(keys)
+    if not keys:
+        return {}
+    rows = db.execute(
+        select(
+            LearningProgress.user_id,
+            LearningProgress.chapter_id,
+            LearningProgress.is_completed,
+            LearningProgress.completion_percentage,
+            LearningProgress.current_streak,
+            LearningProgress.test_attempts,
+            LearningProgress.highest_score
+        ).where(
+            LearningProgress.user_id.in_({user_id for user_id, _ in keys}),
+            LearningProgress.chapter_id.in_({chapter_id for _, chapter_id in keys})
+        ).order_by(
+            # One lock order for every writer
+            LearningProgress.user_id, LearningProgress.chapter_id
+        ).with_for_update()
+    )
+    return {(row.user_id, row.chapter_id): row for row in rows if (row.user_id, row.chapter_id) in keys}
+
+
+def _contribution(progress) -> Tuple[int, int, float, float, int]:
+    """(chapters_started, completed_chapters, total_completion, total_score, test_count) of one row."""
+    if progress is None:
+        return 0, 0, 0.0, 0.0, 0
+    tested = (progress.test_attempts or 0) > 0
+    return (
+        1,
+        1 if progress.is_completed else 0,
+        progress.completion_percentage or 0.0,
+        (progress.highest_score or 0.0) if tested else 0.0,
+        1 if tested else 0
+    )
+
+
+def _greater(stored, value):
+    return case((stored > value, stored), else_=value)
+
+
+def _upsert_deltas(db: Session, model, rows: List[Dict[str, Any]], key_columns: List[str], added: Tuple[str, ...], maxima: Tuple[str, ...] = (), **extra_set):
+    """INSERT the rows; on existing rollup rows add the `added` columns and keep the larger `maxima`."""
+    stmt = dialect_insert(db, model).values(rows)
+    return db.execute(stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            **{column: getattr(model, column) + stmt.excluded[column] for column in added},
+            **{column: _greater(getattr(model, column), stmt.excluded[column]) for column in maxima},
+            "updated_at": func.now(),
+            **extra_set
+        }
+    ))
+
+
+def apply_rollup_deltas(db: Session, changes: Iterable[Tuple[Any, LearningProgress, str]]):
+    """Move the rollups by what the written progress rows changed.
+
+    `changes` holds (stored values from `progress_states`, or None for a row
+    this transaction inserted; the row as written; its chapter's subject). Runs inside the caller's
+    transaction as one upsert per rollup table, adding the differences onto
+    the stored rollups instead of re-aggregating the users' progress rows.
+    The streak maxima only move up, except when a written row's streak
+    restarted: those users' `current_streak` is recomputed in one more
+    statement. `rebuild_rollups` and `check_rollups` still do the full
+    aggregation.
+    """
+    users: Dict[str, Dict[str, Any]] = {}
+    subjects: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    restarted = set()
+    for before, after, subject in changes:
+        old, new = _contribution(before), _contribution(after)
+        started, completed, completion, score, tested = (n - o for n, o in zip(new, old))
+
+        user = users.setdefault(after.user_id, {
+            "user_id": after.user_id, "chapters_started": 0, "completed_chapters": 0, "total_completion": 0.0,
+            "current_streak": 0, "longest_streak": 0, "last_activity_at": None, "version": 1
+        })
+        user["chapters_started"] += started
+        user["completed_chapters"] += completed
+        user["total_completion"] += completion
+        user["current_streak"] = max(user["current_streak"], after.current_streak or 0)
+        user["longest_streak"] = max(user["longest_streak"], after.longest_streak or 0)
+        user["last_activity_at"] = max(filter(None, (user["last_activity_at"], after.last_accessed_at)), default=None)
+        if before is not None and (after.current_streak or 0) < (before.current_streak or 0):
+            restarted.add(after.user_id)
+
+        if subject is None:
+            continue
+        totals = subjects.setdefault((after.user_id, subject), {
+            "user_id": after.user_id, "subject": subject, "chapters_started": 0, "completed_chapters": 0,
+            "total_completion": 0.0, "total_score": 0.0, "test_count": 0
+        })
+        totals["chapters_started"] += started
+        totals["completed_chapters"] += completed
+        totals["total_completion"] += completion
+        totals["total_score"] += score
+        totals["test_count"] += tested
+
+    if not users:
+        return
+
+    _upsert_deltas(
+        db, UserProgressRollup, list(users.values()), ["user_id"],
+        ("chapters_started", "completed_chapters", "total_completion"),
+        ("current_streak", "longest_streak", "last_activity_at"),
+        version=UserProgressRollup.version + 1
+    )
+    if subjects:
+        _upsert_deltas(
+            db, UserSubjectRollup, list(subjects.values()), ["user_id", "subject"],
+            ("chapters_started", "completed_chapters", "total_completion", "total_score", "test_count")
+        )
+
+    if restarted:
+        # A restarted streak can lower the maximum, which no delta expresses
+        db.execute(
+            update(UserProgressRollup)
+            .where(UserProgressRollup.user_id.in_(restarted))
+            .values(current_streak=select(func.coalesce(func.max(LearningProgress.current_streak), 0)).where(
+                LearningProgress.user_id == UserProgressRollup.user_id
+            ).scalar_subquery())
+        )
+
+
+def _aggregate_user_rows(db: Session, user_id: Optional[str] = None) -> List[Any]:
+    criteria = [LearningProgress.user_id == user_id] if user_id else []
+    return db.execute(_user_aggregates(*criteria)).all()
+
+
+def _aggregate_subject_rows(db: Session, user_id: Optional[str] = None) -> List[Any]:
+    criteria = [LearningProgress.user_id == user_id] if user_id else []
+    return db.execute(_subject_aggregates(*criteria)).all()
+
+
+def rebuild_rollups(db: Session, user_id: Optional[str] = None) -> int:
+    """Recompute rollups from the raw progress rows; returns the number of users rebuilt.
+
+    User rollups are upserted rather than recreated so their versions keep
+    increasing and cached ETags stay invalidated. Users left with no
+    progress rows keep their rollup row, zeroed, for the same reason.
+    """
+    try:
+        criteria = [LearningProgress.user_id == user_id] if user_id else []
+        subject_filter = [UserSubjectRollup.user_id == user_id] if user_id else []
+        user_filter = [UserProgressRollup.user_id == user_id] if user_id else []
+        db.execute(delete(UserSubjectRollup).where(*subject_filter))
+
+        result = _upsert_from(
+            db, UserProgressRollup, _user_aggregates(*criteria), ["user_id"],
+            version=UserProgressRollup.version + 1
+        )
+        db.execute(
+            update(UserProgressRollup)
+            .where(*user_filter, ~select(LearningProgress.id).where(
+                LearningProgress.user_id == UserProgressRollup.user_id
+            ).exists())
+            .values(
+                **dict.fromkeys(USER_ROLLUP_FIELDS, 0),
+                last_activity_at=None,
+                version=UserProgressRollup.version + 1,
+                updated_at=func.now()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        _upsert_from(db, UserSubjectRollup, _subject_aggregates(*criteria), ["user_id", "subject"])
+
+        db.commit()
+        return result.rowcount
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error rebuilding progress rollups: {str(e)}")
+        raise
+
+
+def check_rollups(db: Session, user_id: Optional[str] = None, tolerance: float = 1e-6) -> List[str]:
+    """Compare stored rollups with fresh aggregates; returns a list of mismatches."""
+    mismatches = []
+
+    stored_users = {r.user_id: r for r in db.query(UserProgressRollup).filter(
+        *([UserProgressRollup.user_id == user_id] if user_id else [])
+    )}
+    stored_subjects = {(r.user_id, r.subject): r for r in db.query(UserSubjectRollup).filter(
+        *([UserSubjectRollup.user_id == user_id] if user_id else [])
+    )}
+
+    def compare(key, stored, expected: Dict[str, Any], fields):
+        if stored is None:
+            if expected.get("chapters_started"):
+                mismatches.append(f"{key}: rollup missing")
+            return
+        for field in fields:
+            actual = getattr(stored, field) or 0
+            if abs(actual - (expected[field] or 0)) > tolerance:
+                mismatches.append(f"{key}.{field}: stored {actual}, expected {expected[field]}")
+
+    for row in _aggregate_user_rows(db, user_id):
+        compare(row.user_id, stored_users.pop(row.user_id, None), row._asdict(), USER_ROLLUP_FIELDS)
+    for row in _aggregate_subject_rows(db, user_id):
+        key = (row.user_id, row.subject)
+        compare(key, stored_subjects.pop(key, None), row._asdict(), SUBJECT_ROLLUP_FIELDS)
+
+    # Anything left over has no progress rows behind it
+    empty = dict.fromkeys(USER_ROLLUP_FIELDS + SUBJECT_ROLLUP_FIELDS, 0)
+    for key, stored in stored_users.items():
+        compare(key, stored, empty, USER_ROLLUP_FIELDS)
+    for key, stored in stored_subjects.items():
+        compare(key, stored, empty, SUBJECT_ROLLUP_FIELDS)
+
+    return mismatches
+
+
+if __name__ == "__main__":
+    # Usage: python -m src.learning.progress_rollups [rebuild|check] [user_id]
+    from ..database.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    target_user = sys.argv[2] if len(sys.argv) > 2 else None
+
+    session = SessionLocal()
+    try:
+        if command == "rebuild":
+            count = rebuild_rollups(session, target_user)
+            logger.info(f"Rebuilt progress rollups for {count} users")
+        problems = check_rollups(session, target_user)
+        for problem in problems:
+            logger.warning(problem)
+        logger.info(f"Rollup consistency check found {len(problems)} mismatches")
+        sys.exit(1 if problems else 0)
+    finally:
+        session.close()
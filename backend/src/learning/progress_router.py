@@ -1,33 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import Dict, Any
-from ..database.database import get_db
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any, Literal, Optional
+from ..config import PROGRESS_CACHE_MAX_AGE_SECONDS
+from ..database.database import get_async_db
+from ..exceptions import ValidationError
+from ..metrics import Counter
+from ..pagination import PaginatedResponse
 from ..auth.dependencies import get_current_user
 from ..auth.schemas import UserResponse
-from .progress_service import ProgressService
+from .constants import ACTIVITY_MAX_DAYS
+from .progress_service import AsyncProgressService, progress_write_buffer
 from .schemas import (
     LearningProgressUpdate,
     LearningProgressResponse,
     UserProgressSummary,
-    SubjectProgress
+    SubjectProgress,
+    TestAttemptResponse,
+    ActivityHeatmap,
+    ProgressSyncRequest,
+    ProgressSyncResponse
 )
 
 router = APIRouter(prefix="/progress", tags=["progress"])
 
-def get_progress_service(db: Session = Depends(get_db)) -> ProgressService:
+CONDITIONAL_REQUESTS = Counter(
+    "aischool_progress_conditional_requests_total",
+    "Progress reads by whether the client's cached copy was still current.",
+    ["result"]
+)
+_not_modified = CONDITIONAL_REQUESTS.labels("not_modified")
+_modified = CONDITIONAL_REQUESTS.labels("modified")
+
+def get_progress_service(db: AsyncSession = Depends(get_async_db)) -> AsyncProgressService:
     """Get progress service instance."""
-    return ProgressService(db)
+    return AsyncProgressService(db, progress_write_buffer)
+
+async def check_not_modified(
+    request: Request,
+    response: Response,
+    user_id: str,
+    progress_service: AsyncProgressService
+) -> Optional[Response]:
+    """Set the ETag and caching headers; return a 304 if the client's copy is current."""
+    etag = f'"{await progress_service.get_progress_version(user_id)}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={PROGRESS_CACHE_MAX_AGE_SECONDS}",
+        "Vary": "Authorization"
+    }
+    response.headers.update(headers)
+
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            _not_modified.inc()
+            return Response(status_code=304, headers=headers)
+    _modified.inc()
+    return None
 
 @router.put("/chapters/{chapter_id}", response_model=LearningProgressResponse)
 async def update_chapter_progress(
     chapter_id: str,
     update_data: LearningProgressUpdate,
     current_user: UserResponse = Depends(get_current_user),
-    progress_service: ProgressService = Depends(get_progress_service)
+    progress_service: AsyncProgressService = Depends(get_progress_service)
 ):
     """Update learning progress for a specific chapter."""
     try:
-        progress = progress_service.update_progress(
+        progress = await progress_service.update_progress(
             user_id=current_user.id,
             chapter_id=chapter_id,
             update_data=update_data
@@ -36,14 +79,102 @@ async def update_chapter_progress(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/sync", response_model=ProgressSyncResponse)
+async def sync_progress(
+    sync_request: ProgressSyncRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    progress_service: AsyncProgressService = Depends(get_progress_service)
+):
+    """Apply progress updates and test attempts queued offline, in one transaction."""
+    try:
+        return await progress_service.sync_progress(current_user.id, sync_request.items)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/chapters", response_model=PaginatedResponse[LearningProgressResponse])
+async def list_chapter_progress(
+    subject: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    size: int = Query(20, ge=1, le=100),
+    count: Literal["none", "exact", "estimate"] = "none",
+    current_user: UserResponse = Depends(get_current_user),
+    progress_service: AsyncProgressService = Depends(get_progress_service)
+):
+    """List per-chapter progress, most recently accessed first."""
+    try:
+        return await progress_service.list_chapter_progress(
+            current_user.id,
+            subject=subject,
+            since=since,
+            until=until,
+            cursor=cursor,
+            size=size,
+            count=count
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/attempts", response_model=PaginatedResponse[TestAttemptResponse])
+async def list_test_attempts(
+    subject: Optional[str] = None,
+    chapter_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    size: int = Query(20, ge=1, le=100),
+    count: Literal["none", "exact", "estimate"] = "none",
+    current_user: UserResponse = Depends(get_current_user),
+    progress_service: AsyncProgressService = Depends(get_progress_service)
+):
+    """List test attempts, newest first."""
+    try:
+        return await progress_service.list_test_attempts(
+            current_user.id,
+            subject=subject,
+            chapter_id=chapter_id,
+            since=since,
+            until=until,
+            cursor=cursor,
+            size=size,
+            count=count
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/activity", response_model=ActivityHeatmap)
+async def get_activity(
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    current_user: UserResponse = Depends(get_current_user),
+    progress_service: AsyncProgressService = Depends(get_progress_service)
+):
+    """Get the days the current user was active, for an activity heatmap."""
+    if since and ((until or datetime.utcnow().date()) - since).days >= ACTIVITY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {ACTIVITY_MAX_DAYS} days")
+    try:
+        return await progress_service.get_activity(current_user.id, since, until)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/summary", response_model=UserProgressSummary)
 async def get_progress_summary(
+    request: Request,
+    response: Response,
     current_user: UserResponse = Depends(get_current_user),
-    progress_service: ProgressService = Depends(get_progress_service)
+    progress_service: AsyncProgressService = Depends(get_progress_service)
 ):
     """Get overall learning progress summary for the current user."""
     try:
-        summary = progress_service.get_user_progress_summary(current_user.id)
+        not_modified = await check_not_modified(request, response, current_user.id, progress_service)
+        if not_modified:
+            return not_modified
+        summary = await progress_service.get_user_progress_summary(current_user.id)
         return summary
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -51,24 +182,34 @@ async def get_progress_summary(
 @router.get("/subjects/{subject}", response_model=SubjectProgress)
 async def get_subject_progress(
     subject: str,
+    request: Request,
+    response: Response,
     current_user: UserResponse = Depends(get_current_user),
-    progress_service: ProgressService = Depends(get_progress_service)
+    progress_service: AsyncProgressService = Depends(get_progress_service)
 ):
     """Get detailed progress for a specific subject."""
     try:
-        progress = progress_service.get_subject_progress(current_user.id, subject)
+        not_modified = await check_not_modified(request, response, current_user.id, progress_service)
+        if not_modified:
+            return not_modified
+        progress = await progress_service.get_subject_progress(current_user.id, subject)
         return progress
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/subjects", response_model=Dict[str, Dict[str, Any]])
 async def get_all_subjects_progress(
+    request: Request,
+    response: Response,
     current_user: UserResponse = Depends(get_current_user),
-    progress_service: ProgressService = Depends(get_progress_service)
+    progress_service: AsyncProgressService = Depends(get_progress_service)
 ):
     """Get progress summary for all subjects."""
     try:
-        summary = progress_service.get_user_progress_summary(current_user.id)
+        not_modified = await check_not_modified(request, response, current_user.id, progress_service)
+        if not_modified:
+            return not_modified
+        summary = await progress_service.get_user_progress_summary(current_user.id)
         return summary.subject_progress
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
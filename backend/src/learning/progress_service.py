@@ -1,53 +1,105 @@
+import itertools
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from ..database.models import LearningProgress, Chapter, User
-from .schemas import LearningProgressUpdate, TestAttempt, UserProgressSummary, SubjectProgress
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, case, insert
+from ..database.database import dialect_insert
+from ..database.query_metrics import query_scope
+from ..database.models import (
+    generate_uuid,
+    LearningProgress,
+    ChapterTestAttempt,
+    TestAttemptQuestion,
+    UserProgressRollup,
+    UserSubjectRollup
+)
+from .schemas import (
+    LearningProgressUpdate,
+    LearningProgressResponse,
+    TestAttempt,
+    UserProgressSummary,
+    SubjectProgress,
+    TestAttemptResponse,
+    ActivityHeatmap,
+    ProgressSyncItem,
+    ProgressSyncItemResult,
+    ProgressSyncResponse
+)
+from .constants import (
+    RECENT_TEST_SCORES_LIMIT,
+    RECENTLY_COMPLETED_LIMIT,
+    CHAPTERS_IN_PROGRESS_LIMIT,
+    ACTIVITY_DEFAULT_DAYS
+)
+from .progress_rollups import apply_rollup_deltas, progress_states
+from .progress_buffer import PendingProgress, ProgressWriteBuffer
+from .chapter_catalog import chapter_catalog
+from .activity_calendar import load_calendar, record_activity
+from ..pagination import PaginatedResponse, paginate_keyset
 
 logger = logging.getLogger(__name__)
 
+PROGRESS_FIELDS = ("is_completed", "completion_percentage", "completed_sections")
+
+
+def _utc(value: datetime) -> datetime:
+    """Naive UTC datetime, matching how progress timestamps are stored."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class _SyncStep:
+    """Consecutive same-day sync items for one chapter, applied as one write."""
+
+    def __init__(self, item: ProgressSyncItem, at: datetime):
+        self.chapter_id = item.chapter_id
+        self.is_completed = None
+        self.completion_percentage = None
+        self.completed_sections = None
+        self.test_attempt = None
+        self.merge(item, at)
+
+    def can_merge(self, item: ProgressSyncItem, at: datetime) -> bool:
+        # The streak only moves on a new day, and each step holds one test attempt
+        return at.date() == self.at.date() and not (item.test_attempt and self.test_attempt)
+
+    def merge(self, item: ProgressSyncItem, at: datetime):
+        for name in PROGRESS_FIELDS:
+            value = getattr(item, name)
+            if value is not None:
+                setattr(self, name, value)
+        self.test_attempt = self.test_attempt or item.test_attempt
+        self.at = at
+
 class ProgressService:
     def __init__(self, db: Session):
         self.db = db
 
+    @query_scope("progress.update_progress")
     def update_progress(self, user_id: str, chapter_id: str, update_data: LearningProgressUpdate) -> LearningProgress:
         """Update learning progress for a user and chapter."""
         try:
-            # Get or create progress record
-            progress = self.db.query(LearningProgress).filter(
-                LearningProgress.user_id == user_id,
-                LearningProgress.chapter_id == chapter_id
-            ).first()
-
-            if not progress:
-                progress = LearningProgress(
-                    user_id=user_id,
-                    chapter_id=chapter_id
-                )
-                self.db.add(progress)
+            now = datetime.utcnow()
+            test_attempt = update_data.test_attempt
 
-            # Update progress fields
-            if update_data.is_completed is not None:
-                progress.is_completed = update_data.is_completed
-            if update_data.completion_percentage is not None:
-                progress.completion_percentage = update_data.completion_percentage
-            if update_data.completed_sections is not None:
-                progress.completed_sections = update_data.completed_sections
+            # Record test attempt if provided; a retried request carries one already stored, which must not count twice
+            if test_attempt and not self._record_test_attempts(user_id, [(chapter_id, test_attempt)]):
+                test_attempt = None
 
-            # Update test attempt if provided
-            if update_data.test_attempt:
-                self._update_test_attempt(progress, update_data.test_attempt)
+            # Lock the stored row, then insert or update it, streak included, in a single statement
+            before = progress_states(self.db, [(user_id, chapter_id)])
+            progress = self._write_progress(
+                [self._progress_values(user_id, chapter_id, update_data, now, test_attempt)], before, set(before)
+            )[0]
 
-            # Update streak
-            self._update_streak(progress)
-
-            # Update last accessed timestamp
-            progress.last_accessed_at = datetime.utcnow()
+            # Keep the activity calendar and rollups in step within the same transaction
+            record_activity(self.db, user_id, [now.date()])
+            self._update_rollups(before, [progress])
 
             self.db.commit()
-            self.db.refresh(progress)
             return progress
 
         except Exception as e:
@@ -55,68 +107,364 @@ class ProgressService:
             logger.error(f"Error updating progress: {str(e)}")
             raise
 
-    def _update_test_attempt(self, progress: LearningProgress, test_attempt: TestAttempt):
-        """Update test attempt history and statistics."""
-        # Add to test history
-        if not progress.test_history:
-            progress.test_history = []
-        progress.test_history.append(test_attempt.dict())
+    def _record_test_attempts(self, user_id: str, attempts: List[Tuple[str, TestAttempt]]) -> int:
+        """Store test attempts with their per-question detail.
+
+        Attempts already stored (same chapter and attempt time) are skipped
+        with ON CONFLICT DO NOTHING; returns how many were inserted.
+        """
+        rows = {}
+        for chapter_id, test_attempt in attempts:
+            rows[(chapter_id, _utc(test_attempt.attempted_at))] = (generate_uuid(), test_attempt)
+        stmt = dialect_insert(self.db, ChapterTestAttempt).values([
+            {
+                "id": attempt_id,
+                "user_id": user_id,
+                "chapter_id": chapter_id,
+                "attempted_at": attempted_at,
+                "score": test_attempt.score,
+                "total_questions": test_attempt.total_questions,
+                "correct_answers": test_attempt.correct_answers
+            }
+            for (chapter_id, attempted_at), (attempt_id, test_attempt) in rows.items()
+        ]).on_conflict_do_nothing(
+            index_elements=[ChapterTestAttempt.user_id, ChapterTestAttempt.chapter_id, ChapterTestAttempt.attempted_at]
+        ).returning(ChapterTestAttempt.id)
+        inserted = set(self.db.scalars(stmt))
+
+        questions = [
+            {"attempt_id": attempt_id, "position": position, "detail": detail}
+            for attempt_id, test_attempt in rows.values() if attempt_id in inserted
+            for position, detail in enumerate(test_attempt.questions_attempted)
+        ]
+        if questions:
+            self.db.execute(insert(TestAttemptQuestion), questions)
+        return len(inserted)
+
+    def _progress_values(
+        self,
+        user_id: str,
+        chapter_id: str,
+        source: Any,
+        at: datetime,
+        test_attempt: Optional[TestAttempt] = None
+    ) -> Dict[str, Any]:
+        """Insert values for one progress row; only fields set on `source` are included."""
+        values = {
+            "user_id": user_id,
+            "chapter_id": chapter_id,
+            "last_accessed_at": at,
+            "current_streak": 1,
+            "longest_streak": 1,
+            "last_streak_date": at
+        }
+        for name in PROGRESS_FIELDS:
+            value = getattr(source, name)
+            if value is not None:
+                values[name] = value
+        if test_attempt is not None:
+            values["test_attempts"] = 1
+            values["highest_score"] = test_attempt.score
+        return values
+
+    def _previous_day(self, timestamp):
+        """SQL expression for the calendar day before `timestamp`."""
+        if self.db.get_bind().dialect.name == "postgresql":
+            return func.date(timestamp) - 1
+        return func.date(timestamp, "-1 day")
+
+    def _write_progress(
+        self,
+        rows: List[Dict[str, Any]],
+        before: Dict[Tuple[str, str], Any],
+        stored: set
+    ) -> List[LearningProgress]:
+        """Write rows that carry the same keys; returns the rows as written.
+
+        `before` holds the locked states from `progress_states` and `stored`
+        the keys known to have a row. Rows without one are inserted with ON
+        CONFLICT DO NOTHING, so a row this transaction did not create is
+        never taken for new; the rest are upserted. A row a concurrent
+        request inserted after the lock was taken is locked and read into
+        `before`, then upserted. Both arguments are updated in place.
+        """
+        def key(values: Dict[str, Any]) -> Tuple[str, str]:
+            return values["user_id"], values["chapter_id"]
+
+        written = []
+        missing = [values for values in rows if key(values) not in stored]
+        if missing:
+            written = self._insert_progress(missing)
+            inserted = {(progress.user_id, progress.chapter_id) for progress in written}
+            raced = [key(values) for values in missing if key(values) not in inserted]
+            if raced:
+                before.update(progress_states(self.db, raced))
+            stored.update(inserted, raced)
+            rows = [values for values in rows if key(values) not in inserted]
+        if rows:
+            written.extend(self._upsert_progress(rows))
+        return written
+
+    def _insert_progress(self, rows: List[Dict[str, Any]]) -> List[LearningProgress]:
+        """INSERT ... ON CONFLICT (user_id, chapter_id) DO NOTHING ... RETURNING the rows inserted."""
+        stmt = dialect_insert(self.db, LearningProgress).values(rows).on_conflict_do_nothing(
+            index_elements=[LearningProgress.user_id, LearningProgress.chapter_id]
+        ).returning(LearningProgress)
+        return self.db.scalars(stmt, execution_options={"populate_existing": True}).all()
+
+    def _upsert_progress(self, rows: List[Dict[str, Any]]) -> List[LearningProgress]:
+        """INSERT ... ON CONFLICT (user_id, chapter_id) DO UPDATE ... RETURNING.
+
+        All rows must carry the same keys, and rows with a test attempt carry
+        `highest_score`. The streak is advanced in SQL from the stored
+        `last_streak_date` and the row's new `last_accessed_at`; an update
+        older than the stored activity never moves the dates backwards.
+        """
+        stmt = dialect_insert(self.db, LearningProgress).values(rows)
+        at = stmt.excluded.last_accessed_at
+
+        # Update streak: continue it from yesterday, restart it after a gap
+        last_day = func.date(LearningProgress.last_streak_date)
+        current = func.coalesce(LearningProgress.current_streak, 0)
+        longest = func.coalesce(LearningProgress.longest_streak, 0)
+        streak = case(
+            (LearningProgress.last_streak_date.is_(None), 1),
+            (last_day == self._previous_day(at), current + 1),
+            (last_day < self._previous_day(at), 1),
+            else_=current
+        )
+
+        set_ = {name: stmt.excluded[name] for name in PROGRESS_FIELDS if name in rows[0]}
+        set_.update(
+            last_accessed_at=case(
+                (LearningProgress.last_accessed_at > at, LearningProgress.last_accessed_at), else_=at
+            ),
+            last_streak_date=case(
+                (LearningProgress.last_streak_date > at, LearningProgress.last_streak_date), else_=at
+            ),
+            current_streak=streak,
+            longest_streak=case((streak > longest, streak), else_=longest),
+            updated_at=func.now()
+        )
 
         # Update test statistics
-        progress.test_attempts += 1
-        if test_attempt.score > progress.highest_score:
-            progress.highest_score = test_attempt.score
+        if "highest_score" in rows[0]:
+            highest = func.coalesce(LearningProgress.highest_score, 0.0)
+            set_.update(
+                test_attempts=func.coalesce(LearningProgress.test_attempts, 0) + 1,
+                highest_score=case((stmt.excluded.highest_score > highest, stmt.excluded.highest_score), else_=highest)
+            )
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LearningProgress.user_id, LearningProgress.chapter_id],
+            set_=set_
+        ).returning(LearningProgress)
+        return self.db.scalars(stmt, execution_options={"populate_existing": True}).all()
+
+    def _update_rollups(self, before: Dict[Tuple[str, str], Any], rows: List[LearningProgress]):
+        """Apply what the written rows changed, against their states in `before`, to the rollups."""
+        written = {(progress.user_id, progress.chapter_id): progress for progress in rows}
+        changes = []
+        for key, progress in written.items():
+            chapter = chapter_catalog.get(self.db, progress.chapter_id)
+            changes.append((before.get(key), progress, chapter.subject if chapter is not None else None))
+        apply_rollup_deltas(self.db, changes)
+
+    @query_scope("progress.apply_pending_updates")
+    def apply_pending_updates(self, pending: List[PendingProgress]) -> int:
+        """Write a batch of coalesced progress updates in one transaction.
+
+        Entries are upserted with one multi-row statement per set of provided
+        fields, and the rollups are updated once for the whole batch.
+        """
+        if not pending:
+            return 0
+
+        try:
+            # Rows in one statement need the same columns
+            groups: Dict[tuple, List[Dict[str, Any]]] = {}
+            for update in pending:
+                values = self._progress_values(update.user_id, update.chapter_id, update, update.last_accessed_at)
+                groups.setdefault(tuple(sorted(values)), []).append(values)
+
+            before = progress_states(self.db, [(update.user_id, update.chapter_id) for update in pending])
+            stored = set(before)
+            written = []
+            for rows in groups.values():
+                written.extend(self._write_progress(rows, before, stored))
+
+            active_days: Dict[str, set] = {}
+            for update in pending:
+                active_days.setdefault(update.user_id, set()).add(update.last_accessed_at.date())
+            for user_id, days in active_days.items():
+                record_activity(self.db, user_id, days)
+
+            self._update_rollups(before, written)
+            self.db.commit()
+            return len(pending)
 
-    def _update_streak(self, progress: LearningProgress):
-        """Update user's learning streak."""
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error applying pending progress updates: {str(e)}")
+            raise
+
+    @query_scope("progress.sync_progress")
+    def sync_progress(self, user_id: str, items: List[ProgressSyncItem]) -> ProgressSyncResponse:
+        """Apply a batch of offline progress updates in one transaction.
+
+        Items are replayed in client timestamp order so streaks advance as
+        they did on the device. Same-day updates to a chapter are merged, and
+        each round of the remaining per-chapter steps is one multi-row upsert.
+        A test attempt that is already stored (same chapter and attempt time)
+        marks its item as a duplicate, so replaying a batch is safe.
+        """
+        results: List[Optional[ProgressSyncItemResult]] = [None] * len(items)
         now = datetime.utcnow()
-        
-        if not progress.last_streak_date:
-            progress.current_streak = 1
-            progress.last_streak_date = now
-            return
-
-        # Check if last activity was yesterday
-        if (now.date() - progress.last_streak_date.date()) == timedelta(days=1):
-            progress.current_streak += 1
-            if progress.current_streak > progress.longest_streak:
-                progress.longest_streak = progress.current_streak
-        # If more than a day has passed, reset streak
-        elif (now.date() - progress.last_streak_date.date()) > timedelta(days=1):
-            progress.current_streak = 1
-        
-        progress.last_streak_date = now
 
+        try:
+            # Find test attempts that were already synced
+            attempted = {
+                (item.chapter_id, _utc(item.test_attempt.attempted_at))
+                for item in items if item.test_attempt
+            }
+            stored = set()
+            if attempted:
+                rows = self.db.query(ChapterTestAttempt.chapter_id, ChapterTestAttempt.attempted_at).filter(
+                    ChapterTestAttempt.user_id == user_id,
+                    ChapterTestAttempt.chapter_id.in_({chapter_id for chapter_id, _ in attempted}),
+                    ChapterTestAttempt.attempted_at.in_({attempted_at for _, attempted_at in attempted})
+                )
+                stored = {(row.chapter_id, _utc(row.attempted_at)) for row in rows}
+
+            # Order the accepted items per chapter and merge same-day updates
+            steps: Dict[str, List[_SyncStep]] = {}
+            ordered = sorted(enumerate(items), key=lambda pair: (_utc(pair[1].client_timestamp), pair[0]))
+            for index, item in ordered:
+                def result(status, detail=None):
+                    results[index] = ProgressSyncItemResult(
+                        index=index, chapter_id=item.chapter_id, status=status, detail=detail
+                    )
+
+                if chapter_catalog.get(self.db, item.chapter_id) is None:
+                    result("rejected", "Chapter not found")
+                    continue
+                if item.test_attempt:
+                    key = (item.chapter_id, _utc(item.test_attempt.attempted_at))
+                    if key in stored:
+                        result("duplicate", "Test attempt already recorded")
+                        continue
+                    stored.add(key)
+
+                at = min(_utc(item.client_timestamp), now)  # Don't trust device clocks running ahead
+                chapter_steps = steps.setdefault(item.chapter_id, [])
+                if chapter_steps and chapter_steps[-1].can_merge(item, at):
+                    chapter_steps[-1].merge(item, at)
+                else:
+                    chapter_steps.append(_SyncStep(item, at))
+                result("applied")
+
+            # Step n of every chapter goes into round n
+            before = progress_states(self.db, [(user_id, chapter_id) for chapter_id in steps])
+            stored = set(before)
+            written: Dict[str, LearningProgress] = {}
+            attempts = []
+            for round_steps in itertools.zip_longest(*steps.values()):
+                groups: Dict[tuple, List[Dict[str, Any]]] = {}
+                for step in filter(None, round_steps):
+                    values = self._progress_values(user_id, step.chapter_id, step, step.at, step.test_attempt)
+                    groups.setdefault(tuple(sorted(values)), []).append(values)
+                    if step.test_attempt:
+                        attempts.append((step.chapter_id, step.test_attempt))
+                for rows in groups.values():
+                    for progress in self._write_progress(rows, before, stored):
+                        written[progress.chapter_id] = progress
+
+            if attempts:
+                self._record_test_attempts(user_id, attempts)
+            record_activity(self.db, user_id, [step.at.date() for chapter_steps in steps.values() for step in chapter_steps])
+            self._update_rollups(before, list(written.values()))
+
+            # Serialize before commit expires the returned rows
+            response = ProgressSyncResponse(
+                results=results,
+                progress=[LearningProgressResponse.model_validate(progress) for progress in written.values()]
+            )
+            self.db.commit()
+            return response
+
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error syncing progress: {str(e)}")
+            raise
+
+    @query_scope("progress.get_progress_version")
+    def get_progress_version(self, user_id: str) -> str:
+        """Version stamp of everything the user's progress reads depend on.
+
+        Combines the user's rollup version, bumped by every progress write,
+        with the chapter catalog version, which covers titles and totals, and
+        the current day, since the current streak lapses without any write.
+        """
+        version = self.db.query(UserProgressRollup.version).filter(
+            UserProgressRollup.user_id == user_id
+        ).scalar() or 0
+        today = datetime.utcnow().date()
+        return f"{user_id}.{version}.{chapter_catalog.version(self.db)}.{today:%Y%m%d}"
+
+    @query_scope("progress.get_activity")
+    def get_activity(self, user_id: str, since: Optional[date] = None, until: Optional[date] = None) -> ActivityHeatmap:
+        """Active days in a date range (the last year by default), for a heatmap."""
+        try:
+            today = datetime.utcnow().date()
+            until = until or today
+            since = since or until - timedelta(days=ACTIVITY_DEFAULT_DAYS - 1)
+
+            calendar = load_calendar(self.db, user_id)
+            return ActivityHeatmap(
+                since=since,
+                until=until,
+                active_days=calendar.active_days(since, until),
+                current_streak=calendar.current_streak(today),
+                longest_streak=calendar.longest_streak
+            )
+
+        except Exception as e:
+            logger.error(f"Error getting activity calendar: {str(e)}")
+            raise
+
+    @query_scope("progress.get_user_progress_summary")
     def get_user_progress_summary(self, user_id: str) -> UserProgressSummary:
         """Get overall progress summary for a user."""
         try:
-            # Get all progress records for the user
-            progress_records = self.db.query(LearningProgress).filter(
-                LearningProgress.user_id == user_id
+            # Aggregates are maintained incrementally, so these are primary-key lookups
+            rollup = self.db.get(UserProgressRollup, user_id)
+            subject_rollups = self.db.query(UserSubjectRollup).filter(
+                UserSubjectRollup.user_id == user_id
             ).all()
 
             # Get all chapters
-            total_chapters = self.db.query(Chapter).count()
-            completed_chapters = sum(1 for p in progress_records if p.is_completed)
+            total_chapters = chapter_catalog.total_count(self.db)
+            completed_chapters = rollup.completed_chapters if rollup else 0
 
             # Calculate overall completion percentage
-            if total_chapters > 0:
-                overall_completion = sum(p.completion_percentage for p in progress_records) / total_chapters
+            if total_chapters > 0 and rollup:
+                overall_completion = rollup.total_completion / total_chapters
             else:
                 overall_completion = 0.0
 
-            # Get current and longest streak
-            current_streak = max((p.current_streak for p in progress_records), default=0)
-            longest_streak = max((p.longest_streak for p in progress_records), default=0)
+            # Get current and longest streak from the activity calendar
+            calendar = load_calendar(self.db, user_id)
+            current_streak = calendar.current_streak(datetime.utcnow().date())
+            longest_streak = calendar.longest_streak
 
             # Get subject-wise progress
-            subject_progress = self._get_subject_progress(progress_records)
+            subject_progress = self._get_subject_progress(user_id, subject_rollups)
 
             # Get recent test scores
-            recent_test_scores = self._get_recent_test_scores(progress_records)
+            recent_test_scores = self._get_recent_test_scores(user_id)
 
             # Get last activity date
-            last_activity = max((p.last_accessed_at for p in progress_records), default=datetime.utcnow())
+            last_activity = (rollup.last_activity_at if rollup else None) or datetime.utcnow()
 
             return UserProgressSummary(
                 total_chapters=total_chapters,
@@ -133,146 +481,138 @@ class ProgressService:
             logger.error(f"Error getting user progress summary: {str(e)}")
             raise
 
-    def _get_subject_progress(self, progress_records: List[LearningProgress]) -> Dict[str, Dict[str, Any]]:
-        """Calculate progress for each subject."""
+    def _get_subject_progress(self, user_id: str, subject_rollups: List[UserSubjectRollup]) -> Dict[str, Dict[str, Any]]:
+        """Build subject-wise progress from the rollups plus one chapter listing query."""
         subject_stats = {}
-        
-        for progress in progress_records:
-            chapter = self.db.query(Chapter).get(progress.chapter_id)
-            if not chapter:
-                continue
-
-            if chapter.subject not in subject_stats:
-                subject_stats[chapter.subject] = {
-                    "total_chapters": 0,
-                    "completed_chapters": 0,
-                    "total_completion": 0.0,
-                    "total_score": 0.0,
-                    "test_count": 0,
-                    "chapters_in_progress": [],
-                    "recently_completed": []
-                }
 
+        for rollup in subject_rollups:
+            if rollup.chapters_started <= 0:
+                continue
+            subject_stats[rollup.subject] = {
+                "total_chapters": rollup.chapters_started,
+                "completed_chapters": rollup.completed_chapters,
+                "completion_percentage": rollup.total_completion / rollup.chapters_started,
+                "average_test_score": rollup.total_score / rollup.test_count if rollup.test_count > 0 else 0.0,
+                "chapters_in_progress": [],
+                "recently_completed": []
+            }
+
+        # Fetch the chapter listings for every subject in one statement
+        progress_rows = self.db.query(
+            LearningProgress.chapter_id,
+            LearningProgress.is_completed,
+            LearningProgress.completion_percentage,
+            func.coalesce(LearningProgress.updated_at, LearningProgress.created_at).label("updated_at")
+        ).filter(
+            LearningProgress.user_id == user_id
+        ).all()
+
+        for row in progress_rows:
+            chapter = chapter_catalog.get(self.db, row.chapter_id)
+            if chapter is None or chapter.subject not in subject_stats:
+                continue
             stats = subject_stats[chapter.subject]
-            stats["total_chapters"] += 1
-            
-            if progress.is_completed:
-                stats["completed_chapters"] += 1
+
+            if row.is_completed:
                 stats["recently_completed"].append({
                     "chapter_id": chapter.id,
                     "title": chapter.title,
-                    "completed_at": progress.updated_at
+                    "completed_at": row.updated_at
                 })
             else:
                 stats["chapters_in_progress"].append({
                     "chapter_id": chapter.id,
                     "title": chapter.title,
-                    "completion_percentage": progress.completion_percentage
+                    "completion_percentage": row.completion_percentage
                 })
 
-            stats["total_completion"] += progress.completion_percentage
-            if progress.test_attempts > 0:
-                stats["total_score"] += progress.highest_score
-                stats["test_count"] += 1
-
-        # Calculate final statistics for each subject
-        for subject, stats in subject_stats.items():
-            if stats["total_chapters"] > 0:
-                stats["completion_percentage"] = stats["total_completion"] / stats["total_chapters"]
-            else:
-                stats["completion_percentage"] = 0.0
-
-            if stats["test_count"] > 0:
-                stats["average_test_score"] = stats["total_score"] / stats["test_count"]
-            else:
-                stats["average_test_score"] = 0.0
-
-            # Sort and limit recently completed and in-progress chapters
+        # Sort and limit recently completed and in-progress chapters
+        for stats in subject_stats.values():
             stats["recently_completed"] = sorted(
                 stats["recently_completed"],
                 key=lambda x: x["completed_at"],
                 reverse=True
-            )[:5]
-            
+            )[:RECENTLY_COMPLETED_LIMIT]
+
             stats["chapters_in_progress"] = sorted(
                 stats["chapters_in_progress"],
                 key=lambda x: x["completion_percentage"],
                 reverse=True
-            )
-
-            # Remove temporary fields
-            del stats["total_completion"]
-            del stats["total_score"]
-            del stats["test_count"]
+            )[:CHAPTERS_IN_PROGRESS_LIMIT]
 
         return subject_stats
 
-    def _get_recent_test_scores(self, progress_records: List[LearningProgress]) -> List[Dict[str, Any]]:
-        """Get recent test scores across all chapters."""
-        recent_scores = []
-        
-        for progress in progress_records:
-            if not progress.test_history:
-                continue
+    def _get_recent_test_scores(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get the user's most recent test attempts across all chapters."""
+        # Range scan over the (user_id, attempted_at) index
+        rows = self.db.query(
+            ChapterTestAttempt.chapter_id,
+            ChapterTestAttempt.score,
+            ChapterTestAttempt.attempted_at
+        ).filter(
+            ChapterTestAttempt.user_id == user_id
+        ).order_by(
+            ChapterTestAttempt.attempted_at.desc()
+        ).limit(RECENT_TEST_SCORES_LIMIT).all()
 
-            chapter = self.db.query(Chapter).get(progress.chapter_id)
+        recent_scores = []
+        for row in rows:
+            chapter = chapter_catalog.get(self.db, row.chapter_id)
             if not chapter:
                 continue
 
-            # Get the most recent test attempt
-            latest_attempt = max(
-                progress.test_history,
-                key=lambda x: x["attempted_at"]
-            )
-
             recent_scores.append({
                 "chapter_id": chapter.id,
                 "chapter_title": chapter.title,
                 "subject": chapter.subject,
-                "score": latest_attempt["score"],
-                "attempted_at": latest_attempt["attempted_at"]
+                "score": row.score,
+                "attempted_at": row.attempted_at
             })
 
-        # Sort by attempt date and return most recent 10
-        return sorted(
-            recent_scores,
-            key=lambda x: x["attempted_at"],
-            reverse=True
-        )[:10]
+        return recent_scores
 
+    @query_scope("progress.get_subject_progress")
     def get_subject_progress(self, user_id: str, subject: str) -> SubjectProgress:
         """Get detailed progress for a specific subject."""
         try:
             # Get all chapters for the subject
-            chapters = self.db.query(Chapter).filter(
-                Chapter.subject == subject
-            ).all()
+            chapter_ids = chapter_catalog.chapter_ids(self.db, subject)
+            total_chapters = len(chapter_ids)
 
             # Get progress for all chapters in the subject
-            progress_records = self.db.query(LearningProgress).filter(
+            progress_rows = self.db.query(
+                LearningProgress.chapter_id,
+                LearningProgress.is_completed,
+                LearningProgress.completion_percentage,
+                LearningProgress.highest_score,
+                LearningProgress.last_accessed_at,
+                func.coalesce(LearningProgress.updated_at, LearningProgress.created_at).label("updated_at")
+            ).filter(
                 LearningProgress.user_id == user_id,
-                LearningProgress.chapter_id.in_([c.id for c in chapters])
-            ).all()
+                LearningProgress.chapter_id.in_(chapter_ids)
+            ).all() if chapter_ids else []
 
-            # Calculate subject statistics
-            total_chapters = len(chapters)
-            completed_chapters = sum(1 for p in progress_records if p.is_completed)
+            # Subject statistics come from the maintained rollup
+            rollup = self.db.get(UserSubjectRollup, (user_id, subject))
+            completed_chapters = rollup.completed_chapters if rollup else 0
             
-            if total_chapters > 0:
-                completion_percentage = sum(p.completion_percentage for p in progress_records) / total_chapters
+            if total_chapters > 0 and rollup:
+                completion_percentage = rollup.total_completion / total_chapters
             else:
                 completion_percentage = 0.0
 
             # Calculate average test score
-            test_scores = [p.highest_score for p in progress_records if p.test_attempts > 0]
-            average_test_score = sum(test_scores) / len(test_scores) if test_scores else 0.0
+            if rollup and rollup.test_count > 0:
+                average_test_score = rollup.total_score / rollup.test_count
+            else:
+                average_test_score = 0.0
 
             # Get chapters in progress and recently completed
             chapters_in_progress = []
             recently_completed = []
 
-            for progress in progress_records:
-                chapter = next(c for c in chapters if c.id == progress.chapter_id)
+            for progress in progress_rows:
+                chapter = chapter_catalog.get(self.db, progress.chapter_id)
                 if progress.is_completed:
                     recently_completed.append({
                         "chapter_id": chapter.id,
@@ -288,9 +628,11 @@ class ProgressService:
                         "last_accessed": progress.last_accessed_at
                     })
 
-            # Sort lists
+            # Sort and limit lists; the full lists are served by the paginated listings
             recently_completed.sort(key=lambda x: x["completed_at"], reverse=True)
             chapters_in_progress.sort(key=lambda x: x["completion_percentage"], reverse=True)
+            recently_completed = recently_completed[:RECENTLY_COMPLETED_LIMIT]
+            chapters_in_progress = chapters_in_progress[:CHAPTERS_IN_PROGRESS_LIMIT]
 
             return SubjectProgress(
                 subject=subject,
@@ -304,4 +646,168 @@ class ProgressService:
 
         except Exception as e:
             logger.error(f"Error getting subject progress: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    @query_scope("progress.list_chapter_progress")
+    def list_chapter_progress(
+        self,
+        user_id: str,
+        subject: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        size: int = 20,
+        count: str = "none"
+    ) -> PaginatedResponse[LearningProgressResponse]:
+        """List per-chapter progress, most recently accessed first."""
+        try:
+            query = self.db.query(LearningProgress).filter(LearningProgress.user_id == user_id)
+            if subject:
+                query = query.filter(LearningProgress.chapter_id.in_(chapter_catalog.chapter_ids(self.db, subject)))
+            query = self._filter_dates(query, LearningProgress.last_accessed_at, since, until)
+
+            # Range scan over the (user_id, last_accessed_at) index
+            items, page_info, next_cursor = paginate_keyset(
+                query, [LearningProgress.last_accessed_at, LearningProgress.id], cursor, size, count=count
+            )
+            return PaginatedResponse[LearningProgressResponse](
+                items=[LearningProgressResponse.model_validate(item) for item in items],
+                page_info=page_info,
+                next_cursor=next_cursor
+            )
+
+        except Exception as e:
+            logger.error(f"Error listing chapter progress: {str(e)}")
+            raise
+
+    @query_scope("progress.list_test_attempts")
+    def list_test_attempts(
+        self,
+        user_id: str,
+        subject: Optional[str] = None,
+        chapter_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        size: int = 20,
+        count: str = "none"
+    ) -> PaginatedResponse[TestAttemptResponse]:
+        """List test attempts, newest first."""
+        try:
+            query = self.db.query(ChapterTestAttempt).filter(ChapterTestAttempt.user_id == user_id)
+            if subject:
+                query = query.filter(ChapterTestAttempt.chapter_id.in_(chapter_catalog.chapter_ids(self.db, subject)))
+            if chapter_id:
+                query = query.filter(ChapterTestAttempt.chapter_id == chapter_id)
+            query = self._filter_dates(query, ChapterTestAttempt.attempted_at, since, until)
+
+            # Range scan over the (user_id, attempted_at) index
+            items, page_info, next_cursor = paginate_keyset(
+                query, [ChapterTestAttempt.attempted_at, ChapterTestAttempt.id], cursor, size, count=count
+            )
+            return PaginatedResponse[TestAttemptResponse](
+                items=[TestAttemptResponse.model_validate(item) for item in items],
+                page_info=page_info,
+                next_cursor=next_cursor
+            )
+
+        except Exception as e:
+            logger.error(f"Error listing test attempts: {str(e)}")
+            raise
+
+    def _filter_dates(self, query, column, since: Optional[datetime], until: Optional[datetime]):
+        """Restrict `column` to [since, until)."""
+        if since is not None:
+            query = query.filter(column >= _utc(since))
+        if until is not None:
+            query = query.filter(column < _utc(until))
+        return query
+
+
+class AsyncProgressService:
+    """Async counterpart of ProgressService.
+
+    The ORM logic is shared with ProgressService and runs through
+    `AsyncSession.run_sync`, so every statement goes over the async driver
+    and a slow database no longer blocks the event loop. With a write-behind
+    buffer, plain progress updates are coalesced in memory and test attempts
+    are still written synchronously.
+    """
+
+    def __init__(self, db: AsyncSession, buffer: Optional[ProgressWriteBuffer] = None):
+        self.db = db
+        self.buffer = buffer if buffer is not None and buffer.enabled else None
+
+    async def update_progress(self, user_id: str, chapter_id: str, update_data: LearningProgressUpdate):
+        """Update learning progress for a user and chapter."""
+        if self.buffer is not None:
+            if update_data.test_attempt is None:
+                buffered = await self.buffer.add(self.db, user_id, chapter_id, update_data)
+                if buffered is not None:
+                    return buffered
+            else:
+                # Keep the attempt ordered after any buffered updates for the chapter
+                await self.buffer.flush(user_id, chapter_id)
+
+        return await self.db.run_sync(
+            lambda session: ProgressService(session).update_progress(user_id, chapter_id, update_data)
+        )
+
+    async def sync_progress(self, user_id: str, items: List[ProgressSyncItem]) -> ProgressSyncResponse:
+        """Apply a batch of offline progress updates in one transaction."""
+        # Buffered updates happened before the client reconnected and synced
+        await self._flush_pending(user_id)
+        return await self.db.run_sync(
+            lambda session: ProgressService(session).sync_progress(user_id, items)
+        )
+
+    async def get_progress_version(self, user_id: str) -> str:
+        """Version stamp of the user's progress data, for ETags."""
+        await self._flush_pending(user_id)
+        return await self.db.run_sync(
+            lambda session: ProgressService(session).get_progress_version(user_id)
+        )
+
+    async def get_activity(self, user_id: str, since: Optional[date] = None, until: Optional[date] = None) -> ActivityHeatmap:
+        """Active days in a date range, for a heatmap."""
+        await self._flush_pending(user_id)
+        return await self.db.run_sync(
+            lambda session: ProgressService(session).get_activity(user_id, since, until)
+        )
+
+    async def get_user_progress_summary(self, user_id: str) -> UserProgressSummary:
+        """Get overall progress summary for a user."""
+        await self._flush_pending(user_id)
+        return await self.db.run_sync(
+            lambda session: ProgressService(session).get_user_progress_summary(user_id)
+        )
+
+    async def get_subject_progress(self, user_id: str, subject: str) -> SubjectProgress:
+        """Get detailed progress for a specific subject."""
+        await self._flush_pending(user_id)
+        return await self.db.run_sync(
+            lambda session: ProgressService(session).get_subject_progress(user_id, subject)
+        )
+
+    async def list_chapter_progress(self, user_id: str, **filters) -> PaginatedResponse[LearningProgressResponse]:
+        """List per-chapter progress, most recently accessed first."""
+        await self._flush_pending(user_id)
+        return await self.db.run_sync(
+            lambda session: ProgressService(session).list_chapter_progress(user_id, **filters)
+        )
+
+    async def list_test_attempts(self, user_id: str, **filters) -> PaginatedResponse[TestAttemptResponse]:
+        """List test attempts, newest first."""
+        return await self.db.run_sync(
+            lambda session: ProgressService(session).list_test_attempts(user_id, **filters)
+        )
+
+    async def _flush_pending(self, user_id: str):
+        """Write the user's buffered updates so reads reflect them."""
+        if self.buffer is not None:
+            await self.buffer.flush(user_id)
+
+
+progress_write_buffer = ProgressWriteBuffer(
+    apply=lambda session, pending: ProgressService(session).apply_pending_updates(pending)
+)
@@ -1,13 +1,14 @@
-import os
+import asyncio
 import logging
 from typing import List, Dict, Any
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain_community.vectorstores import SupabaseVectorStore
-from langchain_groq import ChatGroq
-from supabase import create_client, Client
+from langchain_core.documents import Document
+from supabase import Client
 from dotenv import load_dotenv
+from ..clients import get_supabase, get_embeddings, get_vector_store, get_chat_llm
+from ..metrics import track_stage
+from .llm_scheduler import llm_scheduler, LLMPriority, estimate_tokens
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,31 +19,13 @@ load_dotenv()
 
 class RAGChatbot:
     def __init__(self):
-        # Initialize Supabase client
-        self.supabase: Client = create_client(
-            os.getenv("SUPABASE_URL", ""),
-            os.getenv("SUPABASE_KEY", "")
-        )
-        
-        # Initialize Ollama embeddings
-        self.embeddings = OllamaEmbeddings(
-            model="nomic-embed-text",
-            base_url="http://localhost:11434"
-        )
+        # Shared Supabase client, embeddings and vector store
+        self.supabase: Client = get_supabase()
+        self.embeddings = get_embeddings()
+        self.vector_store = get_vector_store()
         
-        # Initialize vector store
-        self.vector_store = SupabaseVectorStore(
-            client=self.supabase,
-            embedding=self.embeddings,
-            table_name="document_embeddings",
-            query_name="match_documents"
-        )
-        
-        # Initialize Groq LLM
-        self.llm = ChatGroq(
-            api_key=os.getenv("GROQ_API_KEY", ""),
-            model_name="llama3-8b-8192"
-        )
+        # Shared Groq LLM
+        self.llm = get_chat_llm()
         
         # Initialize prompt template
         self.qa_prompt = PromptTemplate(
@@ -64,14 +47,25 @@ class RAGChatbot:
             prompt=self.qa_prompt
         )
 
+    async def search_documents(self, query: str, k: int = 3) -> List[Document]:
+        """Retrieve the documents most similar to the query."""
+        embedding = await self.embeddings.aembed_query(query)
+
+        def search():
+            with track_stage("vector_query"):
+                return self.vector_store.similarity_search_by_vector(
+                    embedding,
+                    k=k
+                )
+
+        # The vector store client is synchronous
+        return await asyncio.to_thread(search)
+
     async def get_relevant_context(self, query: str, k: int = 3) -> str:
         """Retrieve relevant context from vector store."""
         try:
             # Search for relevant documents
-            docs = self.vector_store.similarity_search(
-                query,
-                k=k
-            )
+            docs = await self.search_documents(query, k)
             
             # Combine document contents
             context = "\n\n".join([doc.page_content for doc in docs])
@@ -84,10 +78,15 @@ class RAGChatbot:
     async def generate_answer(self, question: str, context: str) -> str:
         """Generate answer using LLM with context."""
         try:
-            # Generate answer using QA chain
-            response = self.qa_chain.run(
-                context=context,
-                question=question
+            def answer():
+                with track_stage("llm"):
+                    return self.qa_chain.run(context=context, question=question)
+
+            # Generate answer using QA chain, scheduled as interactive traffic
+            response = await llm_scheduler.run(
+                LLMPriority.INTERACTIVE,
+                answer,
+                estimated_tokens=estimate_tokens(context + question)
             )
             return response.strip()
             
@@ -98,8 +97,9 @@ class RAGChatbot:
     async def ask_question(self, question: str, k: int = 3) -> Dict[str, Any]:
         """Complete RAG pipeline: retrieve context and generate answer."""
         try:
-            # Get relevant context
-            context = await self.get_relevant_context(question, k)
+            # Get relevant context; the same documents are returned as sources
+            docs = await self.search_documents(question, k)
+            context = "\n\n".join([doc.page_content for doc in docs])
             
             # Generate answer
             answer = await self.generate_answer(question, context)
@@ -112,7 +112,7 @@ class RAGChatbot:
                         "content": doc.page_content,
                         "metadata": doc.metadata
                     }
-                    for doc in self.vector_store.similarity_search(question, k=k)
+                    for doc in docs
                 ]
             }
             
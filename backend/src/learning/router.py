@@ -7,6 +7,7 @@ import os
 
 from .service import LearningService
 from .dependencies import get_learning_service
+from .exceptions import LLMRejectedError
 
 router = APIRouter(prefix="/learning", tags=["learning"])
 
@@ -43,6 +44,8 @@ async def ask_chapter_question(
     try:
         result = await learning_service.get_chapter_answer(question, chapter_id)
         return result
+    except LLMRejectedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -56,6 +59,8 @@ async def explain_text(
     try:
         result = await learning_service.explain_text(text, save_audio)
         return result
+    except LLMRejectedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -69,6 +74,8 @@ async def generate_chapter_test(
     try:
         result = await learning_service.generate_test(chapter_id, num_questions)
         return result
+    except LLMRejectedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from datetime import date, datetime
+from ..config import PROGRESS_SYNC_MAX_ITEMS
 
 # Existing schemas
 # ... (keep existing schemas like ChunkMetadata, ChapterProcessResponse, etc.)
@@ -19,7 +20,6 @@ class LearningProgressBase(BaseModel):
     completed_sections: int = 0
     test_attempts: int = 0
     highest_score: float = Field(0.0, ge=0.0, le=100.0)
-    test_history: List[TestAttempt] = []
     current_streak: int = 0
     longest_streak: int = 0
 
@@ -38,11 +38,46 @@ class LearningProgressResponse(LearningProgressBase):
     last_accessed_at: datetime
     last_streak_date: Optional[datetime]
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None  # Unset until the row is first updated
 
     class Config:
         from_attributes = True
 
+class TestAttemptResponse(BaseModel):
+    id: str
+    chapter_id: str
+    score: float
+    total_questions: int
+    correct_answers: int
+    attempted_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ActivityHeatmap(BaseModel):
+    since: date
+    until: date
+    active_days: List[date]
+    current_streak: int
+    longest_streak: int
+
+class ProgressSyncItem(LearningProgressUpdate):
+    chapter_id: str
+    client_timestamp: datetime  # When the update happened on the device
+
+class ProgressSyncRequest(BaseModel):
+    items: List[ProgressSyncItem] = Field(..., max_length=PROGRESS_SYNC_MAX_ITEMS)
+
+class ProgressSyncItemResult(BaseModel):
+    index: int  # Position of the item in the request
+    chapter_id: str
+    status: str  # "applied", "duplicate" or "rejected"
+    detail: Optional[str] = None
+
+class ProgressSyncResponse(BaseModel):
+    results: List[ProgressSyncItemResult]
+    progress: List[LearningProgressResponse]  # Resulting rows for the synced chapters
+
 class UserProgressSummary(BaseModel):
     total_chapters: int
     completed_chapters: int
@@ -60,4 +95,33 @@ class SubjectProgress(BaseModel):
     completion_percentage: float
     average_test_score: float
     chapters_in_progress: List[Dict[str, Any]]
-    recently_completed: List[Dict[str, Any]] 
\ No newline at end of file
+    recently_completed: List[Dict[str, Any]] 
+
+class ChapterCohortStats(BaseModel):
+    chapter_id: str
+    title: str
+    subject: str
+    students: int  # Students with progress on the chapter
+    completed: int
+    average_completion: float
+    completion_histogram: List[int]  # Students per 10-point completion bucket, 0-10 through 90-100
+
+class ScoreDistribution(BaseModel):
+    attempted: int  # Progress rows with at least one test attempt
+    average_score: float
+    percentiles: Dict[str, float]  # "p10" through "p90" of highest scores
+    histogram: List[int]  # Rows per 10-point score bucket
+
+class AtRiskStudent(BaseModel):
+    user_id: str
+    chapters_started: int
+    average_completion: float
+    average_score: Optional[float]  # None when no tests were taken
+    last_active_at: Optional[datetime]
+    reasons: List[str]
+
+class CohortSnapshotInfo(BaseModel):
+    rows: int
+    students: int
+    chapters: int
+    refreshed_at: Optional[datetime]
@@ -1,25 +1,106 @@
+import asyncio
 import logging
-from typing import Dict, Any, List
+import threading
+from typing import TYPE_CHECKING, Dict, Any, List
 from pathlib import Path
-from .embeddings import PDFEmbedder
-from .narration import Narrator
-from .rag import RAGChatbot
-from .test_generation import TestGenerator
+from .chapter_catalog import notify_chapters_changed
+from ..database.database import SessionLocal
+
+if TYPE_CHECKING:
+    from .embeddings import PDFEmbedder
+    from .narration import Narrator
+    from .rag import RAGChatbot
+    from .test_generation import TestGenerator
 
 logger = logging.getLogger(__name__)
 
+
+def _notify_chapters_changed():
+    db = SessionLocal()
+    try:
+        notify_chapters_changed(db)
+    finally:
+        db.close()
+
 class LearningService:
+    """Learning features over components that are imported and built on first use.
+
+    The components pull in LangChain, PyMuPDF, Groq and the TTS stack, so
+    importing this module (and the learning router) stays cheap and workers
+    only pay for the features they actually serve.
+    """
+
     def __init__(self):
-        self.embedder = PDFEmbedder()
-        self.narrator = Narrator()
-        self.rag = RAGChatbot()
-        self.test_generator = TestGenerator()
+        self._components: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _component(self, name: str, factory):
+        component = self._components.get(name)
+        if component is None:
+            # One lock per component: building one never holds up requests for another
+            with self._locks_lock:
+                lock = self._locks.setdefault(name, threading.Lock())
+            with lock:
+                component = self._components.get(name)
+                if component is None:
+                    component = factory()
+                    self._components[name] = component
+                    logger.info(f"Loaded learning component {name}")
+        return component
+
+    async def _ready(self, name: str):
+        """The component behind property `name`, built on a worker thread if this is its first use."""
+        component = self._components.get(name)
+        if component is None:
+            component = await asyncio.to_thread(getattr, self, name)
+        return component
+
+    @property
+    def embedder(self) -> "PDFEmbedder":
+        def create():
+            from .embeddings import PDFEmbedder
+            return PDFEmbedder()
+        return self._component("embedder", create)
+
+    @property
+    def narrator(self) -> "Narrator":
+        def create():
+            from .narration import Narrator
+            return Narrator()
+        return self._component("narrator", create)
+
+    @property
+    def rag(self) -> "RAGChatbot":
+        def create():
+            from .rag import RAGChatbot
+            return RAGChatbot()
+        return self._component("rag", create)
+
+    @property
+    def test_generator(self) -> "TestGenerator":
+        def create():
+            from .test_generation import TestGenerator
+            return TestGenerator()
+        return self._component("test_generator", create)
+
+    def preload(self):
+        """Build every component now (and load the TTS model), instead of on the first requests."""
+        self.embedder
+        self.rag
+        self.test_generator
+        self.narrator.tts
 
     async def process_chapter(self, pdf_path: Path, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
         """Process a new chapter PDF and prepare it for all learning features."""
         try:
             # Process PDF and store embeddings
-            result = await self.embedder.process_pdf(pdf_path, metadata)
+            embedder = await self._ready("embedder")
+            result = await embedder.process_pdf(pdf_path, metadata)
+
+            # Ingested content can introduce chapters; have every worker refresh its catalog.
+            # The session is synchronous, so it runs in a worker thread.
+            await asyncio.to_thread(_notify_chapters_changed)
             return result
         except Exception as e:
             logger.error(f"Error processing chapter: {str(e)}")
@@ -30,7 +111,8 @@ class LearningService:
         try:
             # Add chapter context to the question
             context_question = f"Regarding chapter {chapter_id}: {question}"
-            result = await self.rag.ask_question(context_question)
+            rag = await self._ready("rag")
+            result = await rag.ask_question(context_question)
             return result
         except Exception as e:
             logger.error(f"Error getting chapter answer: {str(e)}")
@@ -39,7 +121,8 @@ class LearningService:
     async def explain_text(self, text: str, save_audio: bool = False) -> Dict[str, Any]:
         """Generate explanation and optionally convert to speech."""
         try:
-            result = await self.narrator.narrate_text(text, save_to_file=save_audio)
+            narrator = await self._ready("narrator")
+            result = await narrator.narrate_text(text, save_to_file=save_audio)
             return result
         except Exception as e:
             logger.error(f"Error explaining text: {str(e)}")
@@ -48,7 +131,8 @@ class LearningService:
     async def generate_test(self, chapter_id: str, num_questions: int = 5) -> Dict[str, Any]:
         """Generate a test for a specific chapter."""
         try:
-            result = await self.test_generator.generate_chapter_test(chapter_id, num_questions)
+            test_generator = await self._ready("test_generator")
+            result = await test_generator.generate_chapter_test(chapter_id, num_questions)
             return result
         except Exception as e:
             logger.error(f"Error generating test: {str(e)}")
@@ -57,7 +141,8 @@ class LearningService:
     async def validate_test_answer(self, question: Dict[str, Any], user_answer: str) -> Dict[str, Any]:
         """Validate a user's answer to a test question."""
         try:
-            result = await self.test_generator.validate_answer(question, user_answer)
+            test_generator = await self._ready("test_generator")
+            result = await test_generator.validate_answer(question, user_answer)
             return result
         except Exception as e:
             logger.error(f"Error validating answer: {str(e)}")
@@ -66,7 +151,8 @@ class LearningService:
     async def search_chapter_content(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
         """Search for relevant content across chapters."""
         try:
-            results = await self.embedder.search_similar_chunks(query, k)
+            embedder = await self._ready("embedder")
+            results = await embedder.search_similar_chunks(query, k)
             return results
         except Exception as e:
             logger.error(f"Error searching chapter content: {str(e)}")
@@ -1,14 +1,14 @@
-import os
+import asyncio
 import logging
 import json
 from typing import List, Dict, Any
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain_community.vectorstores import SupabaseVectorStore
-from langchain_groq import ChatGroq
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
-from supabase import create_client, Client
+from supabase import Client
 from dotenv import load_dotenv
+from ..clients import get_supabase, get_embeddings, get_vector_store, get_chat_llm
+from ..metrics import track_stage
+from .llm_scheduler import llm_scheduler, LLMPriority, estimate_tokens
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,31 +19,13 @@ load_dotenv()
 
 class TestGenerator:
     def __init__(self):
-        # Initialize Supabase client
-        self.supabase: Client = create_client(
-            os.getenv("SUPABASE_URL", ""),
-            os.getenv("SUPABASE_KEY", "")
-        )
-        
-        # Initialize Ollama embeddings
-        self.embeddings = OllamaEmbeddings(
-            model="nomic-embed-text",
-            base_url="http://localhost:11434"
-        )
-        
-        # Initialize vector store
-        self.vector_store = SupabaseVectorStore(
-            client=self.supabase,
-            embedding=self.embeddings,
-            table_name="document_embeddings",
-            query_name="match_documents"
-        )
+        # Shared Supabase client, embeddings and vector store
+        self.supabase: Client = get_supabase()
+        self.embeddings = get_embeddings()
+        self.vector_store = get_vector_store()
         
-        # Initialize Groq LLM
-        self.llm = ChatGroq(
-            api_key=os.getenv("GROQ_API_KEY", ""),
-            model_name="llama3-8b-8192"
-        )
+        # Shared Groq LLM
+        self.llm = get_chat_llm()
         
         # Initialize MCQ generation prompt
         self.mcq_prompt = PromptTemplate(
@@ -82,10 +64,17 @@ class TestGenerator:
         """Retrieve relevant content for a chapter."""
         try:
             # Search for chapter content
-            docs = self.vector_store.similarity_search(
-                f"chapter {chapter_id}",
-                k=k
-            )
+            embedding = await self.embeddings.aembed_query(f"chapter {chapter_id}")
+
+            def search():
+                with track_stage("vector_query"):
+                    return self.vector_store.similarity_search_by_vector(
+                        embedding,
+                        k=k
+                    )
+
+            # The vector store client is synchronous
+            docs = await asyncio.to_thread(search)
             
             # Combine document contents
             content = "\n\n".join([doc.page_content for doc in docs])
@@ -98,25 +87,31 @@ class TestGenerator:
     async def generate_mcqs(self, content: str, num_questions: int = 5) -> List[Dict[str, Any]]:
         """Generate MCQs using LLM."""
         try:
-            # Generate MCQs using chain
-            response = self.mcq_chain.run(
-                context=content,
-                num_questions=num_questions
+            def generate():
+                with track_stage("llm"):
+                    return self.mcq_chain.run(context=content, num_questions=num_questions)
+
+            # Generate MCQs using chain, scheduled as background traffic
+            response = await llm_scheduler.run(
+                LLMPriority.BACKGROUND,
+                generate,
+                estimated_tokens=estimate_tokens(content, max_output_tokens=300 * num_questions)
             )
             
             # Parse JSON response
-            try:
-                questions = json.loads(response)
-                return questions
-            except json.JSONDecodeError as e:
-                logger.error(f"Error parsing MCQ response: {str(e)}")
-                # Try to extract JSON from the response if it's wrapped in markdown or other text
-                import re
-                json_match = re.search(r'\[.*\]', response, re.DOTALL)
-                if json_match:
-                    questions = json.loads(json_match.group())
+            with track_stage("json_parse"):
+                try:
+                    questions = json.loads(response)
                     return questions
-                raise
+                except json.JSONDecodeError as e:
+                    logger.error(f"Error parsing MCQ response: {str(e)}")
+                    # Try to extract JSON from the response if it's wrapped in markdown or other text
+                    import re
+                    json_match = re.search(r'\[.*\]', response, re.DOTALL)
+                    if json_match:
+                        questions = json.loads(json_match.group())
+                        return questions
+                    raise
                 
         except Exception as e:
             logger.error(f"Error generating MCQs: {str(e)}")
@@ -1,13 +1,23 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import logging
 from pathlib import Path
+from typing import Optional
 from src.auth.dependencies import get_current_user
 from src.auth.router import router as auth_router
 from src.learning.router import router as learning_router
+from src.learning.dependencies import learning_service
 from src.learning.progress_router import router as progress_router
+from src.learning.analytics_router import router as analytics_router
+from src.internal.router import router as internal_router, metrics_router
+from src.learning.progress_service import progress_write_buffer
+from src.learning.cohort_analytics import cohort_analytics
+from src.clients import close_clients
+from src.profiling import ServerTimingMiddleware, event_loop_monitor
 from src.auth.config import get_settings
+from src.config import API_ONLY, LEARNING_PRELOAD
 
 # Configure logging
 logging.basicConfig(
@@ -36,6 +46,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing header with per-stage durations; sampled requests are profiled
+app.add_middleware(ServerTimingMiddleware)
+
 # Create necessary directories
 BASE_DIR = Path(__file__).resolve().parent
 UPLOAD_DIR = BASE_DIR / "uploads"
@@ -53,9 +66,45 @@ settings = get_settings()
 logger.info("Initialized settings with Supabase configuration")
 
 # Include routers
-app.include_router(learning_router)
+if API_ONLY:
+    logger.info("API-only worker: learning routes are not served")
+else:
+    app.include_router(learning_router)
 app.include_router(auth_router)
 app.include_router(progress_router)
+app.include_router(analytics_router)
+app.include_router(internal_router)
+app.include_router(metrics_router)
+
+# The loop only keeps weak references to tasks; hold the preload task until it finishes
+preload_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_background_tasks():
+    global preload_task
+    await progress_write_buffer.start()
+    await cohort_analytics.start()
+    await event_loop_monitor.start()
+    if LEARNING_PRELOAD and not API_ONLY:
+        preload_task = asyncio.create_task(preload_learning())
+
+async def preload_learning():
+    try:
+        await asyncio.to_thread(learning_service.preload)
+        logger.info("Preloaded learning components")
+    except Exception as e:
+        logger.error(f"Error preloading learning components: {str(e)}")
+
+@app.on_event("shutdown")
+async def flush_pending_writes():
+    if preload_task is not None and not preload_task.done():
+        preload_task.cancel()
+    await event_loop_monitor.stop()
+    await cohort_analytics.stop()
+    # Write out any progress updates still held by the write-behind buffer
+    await progress_write_buffer.stop()
+    # Close the shared Supabase/embedding/LLM connection pools
+    await close_clients()
 
 @app.get("/")
 async def root():
@@ -0,0 +1,260 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# A collected metric family: (name, type, help, [(suffix, labels, value), ...])
+Family = Tuple[str, str, str, List[Tuple[str, Dict[str, str], float]]]
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value != value:
+        return "NaN"
+    if isinstance(value, bool):
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """A named metric with one child per combination of label values."""
+
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """The child for these label values; callers on hot paths should keep it."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+    def collect(self) -> Family:
+        return self.name, self.type, self.help, list(self._samples())
+
+
+class _Value:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield "", dict(zip(self.labelnames, key)), child.value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0):
+        self._children[()].dec(amount)
+
+    def set(self, value: float):
+        self._children[()].set(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self.bounds = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last bucket is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, key))
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            yield from histogram_samples(labels, self.buckets, counts, total)
+
+
+def histogram_samples(labels: Dict[str, str], bounds: Sequence[float], counts: Sequence[int], total: float):
+    """Prometheus bucket/sum/count samples from per-bucket (non-cumulative) counts."""
+    cumulative = 0
+    for bound, count in zip(list(bounds) + [float("inf")], counts):
+        cumulative += count
+        yield "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+    yield "_sum", labels, total
+    yield "_count", labels, cumulative
+
+
+class Registry:
+    """Metrics of this worker plus collectors that read other components' state at scrape time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        families = [metric.collect() for metric in list(self._metrics.values())]
+        for collector in list(self._collectors):
+            families.extend(collector())
+
+        lines = []
+        for name, type_, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type_}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class RequestTimings:
+    """Stage durations accumulated for one HTTP request, for its Server-Timing header."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, List[float]] = {}  # stage -> [seconds, calls]
+        self.threads: Set[int] = set()  # Threads that ran stages, for the sampling profiler
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            totals = self.stages.get(stage)
+            if totals is None:
+                self.stages[stage] = [seconds, 1]
+            else:
+                totals[0] += seconds
+                totals[1] += 1
+
+
+# Set by the request middleware; copied into worker threads with the rest of the context
+current_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record_request_stage(stage: str, seconds: float):
+    """Add time to the current request's Server-Timing totals, if there is a request."""
+    timings = current_request_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+# Learning pipeline stages (pdf_extract, chunking, embedding, vector_query, llm, json_parse, tts, ...)
+STAGE_SECONDS = Histogram("aischool_stage_duration_seconds", "Time spent in a learning pipeline stage.", ["stage"])
+STAGE_ERRORS = Counter("aischool_stage_errors_total", "Learning pipeline stage calls that raised.", ["stage"])
+STAGE_IN_FLIGHT = Gauge("aischool_stage_in_flight", "Learning pipeline stage calls currently running.", ["stage"])
+
+_stages: Dict[str, Tuple[_HistogramValue, _Value, _Value]] = {}
+
+
+@contextmanager
+def track_stage(stage: str):
+    """Time a pipeline stage and count it as in flight while it runs."""
+    children = _stages.get(stage)
+    if children is None:
+        children = _stages.setdefault(
+            stage, (STAGE_SECONDS.labels(stage), STAGE_ERRORS.labels(stage), STAGE_IN_FLIGHT.labels(stage))
+        )
+    seconds, errors, in_flight = children
+    timings = current_request_timings.get()
+    if timings is not None:
+        timings.threads.add(threading.get_ident())
+
+    in_flight.inc()
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        errors.inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        seconds.observe(elapsed)
+        in_flight.dec()
+        if timings is not None:
+            timings.add(stage, elapsed)
+
+
+def family(name: str, type: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> Family:
+    """A collector family from (labels, value) pairs."""
+    return name, type, help, [("", labels, value) for labels, value in samples]
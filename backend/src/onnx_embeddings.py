@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from .config import (
+    EMBEDDING_ONNX_DIR,
+    EMBEDDING_ONNX_THREADS,
+    EMBEDDING_MAX_TOKENS,
+    EMBEDDING_DOCUMENT_PREFIX,
+    EMBEDDING_QUERY_PREFIX,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_BATCH_WAIT_MS,
+)
+from .exceptions import EmbeddingError
+from .inference.batching import MicroBatcher
+from .metrics import track_stage
+
+logger = logging.getLogger(__name__)
+
+
+class OnnxEmbeddings(Embeddings):
+    """nomic-embed-compatible sentence embeddings computed in-process on CPU with ONNX Runtime.
+
+    `model_dir` holds an exported encoder (model.onnx, or onnx/model.onnx as
+    in the Hugging Face repository) and its tokenizer.json. Concurrent calls
+    from different handlers and threads are grouped by a MicroBatcher into
+    one forward pass of up to `batch_size` texts, padded to the longest text
+    in the batch. Pooling follows nomic-embed-text v1.5: mean over tokens,
+    layer norm, then L2 normalization.
+    """
+
+    def __init__(
+        self,
+        model_dir: Path = EMBEDDING_ONNX_DIR,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        batch_wait_ms: float = EMBEDDING_BATCH_WAIT_MS,
+        threads: int = EMBEDDING_ONNX_THREADS,
+        max_tokens: int = EMBEDDING_MAX_TOKENS,
+        document_prefix: str = EMBEDDING_DOCUMENT_PREFIX,
+        query_prefix: str = EMBEDDING_QUERY_PREFIX,
+    ):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise EmbeddingError("EMBEDDING_BACKEND=onnx needs the onnxruntime and tokenizers packages") from e
+
+        model_dir = Path(model_dir)
+        model_path = next((path for path in (model_dir / "model.onnx", model_dir / "onnx" / "model.onnx") if path.exists()), None)
+        if model_path is None or not (model_dir / "tokenizer.json").exists():
+            raise EmbeddingError(f"Expected model.onnx and tokenizer.json in {model_dir}")
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model_path), sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_tokens)
+        self.tokenizer.no_padding()
+
+        self.batch_size = batch_size
+        self.document_prefix = document_prefix
+        self.query_prefix = query_prefix
+        self.batcher = MicroBatcher(self._forward, max_batch_size=batch_size, max_wait_ms=batch_wait_ms, name="onnx-embeddings")
+        logger.info(f"Loaded ONNX embedding model {model_path} (inputs: {', '.join(sorted(self.input_names))})")
+
+    def _forward(self, texts: List[str]) -> np.ndarray:
+        """One forward pass over a batch; returns unit-length float32 rows."""
+        encodings = self.tokenizer.encode_batch(texts)
+        length = max(len(encoding.ids) for encoding in encodings)
+        input_ids = np.zeros((len(texts), length), dtype=np.int64)
+        attention_mask = np.zeros((len(texts), length), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            input_ids[row, :len(encoding.ids)] = encoding.ids
+            attention_mask[row, :len(encoding.ids)] = 1
+
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.zeros_like(input_ids)
+        output = self.session.run(None, {name: value for name, value in feed.items() if name in self.input_names})[0]
+
+        if output.ndim == 3:
+            # Token states: mean over real tokens, then layer norm
+            mask = attention_mask[:, :, None].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            output = (output - output.mean(axis=1, keepdims=True)) / np.sqrt(output.var(axis=1, keepdims=True) + 1e-5)
+        output = output.astype(np.float32)
+        return output / np.maximum(np.linalg.norm(output, axis=1, keepdims=True), 1e-12)
+
+    def _submit(self, texts: Sequence[str]) -> List[Future]:
+        # Large inputs are split so each forward pass stays bounded
+        return [
+            self.batcher.submit(texts[start:start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed already-prefixed texts, blocking until their batches have run."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack([np.asarray(future.result()) for future in self._submit(texts)])
+
+    async def aembed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed already-prefixed texts without blocking the event loop.
+
+        Requests awaiting here leave the loop free to submit others, so the
+        batcher can group concurrent requests into one forward pass.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        results = await asyncio.gather(*(asyncio.wrap_future(future) for future in self._submit(texts)))
+        return np.vstack([np.asarray(result) for result in results])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with track_stage("embedding"):
+            return self.embed([self.document_prefix + text for text in texts]).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        with track_stage("embedding"):
+            return self.embed([self.query_prefix + text])[0].tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        with track_stage("embedding"):
+            return (await self.aembed([self.document_prefix + text for text in texts])).tolist()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        with track_stage("embedding"):
+            return (await self.aembed([self.query_prefix + text]))[0].tolist()
+
+    def close(self):
+        self.batcher.close()
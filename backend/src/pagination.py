@@ -1,5 +1,10 @@
-from typing import TypeVar, Generic, List, Optional
-from pydantic import BaseModel, Field
+import base64
+import json
+from datetime import datetime
+from typing import TypeVar, Generic, List, Optional, Sequence, Any, Tuple, Union, Literal
+from pydantic import BaseModel
+from sqlalchemy import tuple_, literal
+from .exceptions import ValidationError
 
 T = TypeVar('T')
 
@@ -10,10 +15,17 @@ class PageInfo(BaseModel):
     size: int
     pages: int
 
+class CursorPageInfo(BaseModel):
+    """Keyset pagination metadata."""
+    size: int
+    total: Optional[int] = None  # Only when a count was requested
+    total_is_estimate: bool = False  # True when taken from planner statistics
+
 class PaginatedResponse(BaseModel, Generic[T]):
     """Generic paginated response model."""
     items: List[T]
-    page_info: PageInfo
+    page_info: Union[PageInfo, CursorPageInfo]
+    next_cursor: Optional[str] = None  # Pass back as `cursor` for the next page; None on the last page
 
 def get_page_info(total: int, page: int, size: int) -> PageInfo:
     """Calculate pagination metadata."""
@@ -36,3 +48,96 @@ def paginate_query(query, page: int = 1, size: int = 10):
     items = query.offset((page - 1) * size).limit(size).all()
     
     return items, get_page_info(total, page, size)
+
+def _encode_value(value: Any):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+def _decode_value(value: dict):
+    if "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    payload = json.dumps(list(values), default=_encode_value, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, width: int) -> List[Any]:
+    """Decode a cursor produced by `encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded), object_hook=_decode_value)
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid pagination cursor")
+    if not isinstance(values, list) or len(values) != width:
+        raise ValidationError("Invalid pagination cursor")
+    return values
+
+def explain_statement(query, dialect) -> str:
+    """EXPLAIN (FORMAT JSON) for a query, with its parameters rendered inline.
+
+    Inlining expands `IN` lists (compiled as post-compile parameters) and
+    keeps the statement independent of the driver's paramstyle, e.g.
+    asyncpg's `$1` under `AsyncSession.run_sync`.
+    """
+    compiled = query.order_by(None).statement.compile(
+        dialect=dialect, compile_kwargs={"render_postcompile": True, "literal_binds": True}
+    )
+    return f"EXPLAIN (FORMAT JSON) {compiled}"
+
+def estimate_count(query) -> int:
+    """Row count estimate from the PostgreSQL planner statistics."""
+    session = query.session
+    plan = session.connection().exec_driver_sql(explain_statement(query, session.get_bind().dialect)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+def paginate_keyset(
+    query,
+    order_by: Sequence[Any],
+    cursor: Optional[str] = None,
+    size: int = 10,
+    descending: bool = True,
+    count: Literal["none", "exact", "estimate"] = "none"
+) -> Tuple[List[Any], CursorPageInfo, Optional[str]]:
+    """Apply keyset pagination to a SQLAlchemy query.
+
+    `order_by` columns must form a unique key (end with the primary key) and
+    should match an index so each page is a range scan. Rows are read by
+    their column keys, so selected columns must keep their names. Returns
+    the items, page info and the cursor for the next page.
+    """
+    if size < 1:
+        size = 10
+
+    # Planner estimates are only available on PostgreSQL
+    if count == "estimate" and query.session.get_bind().dialect.name != "postgresql":
+        count = "exact"
+
+    total = None
+    if count == "exact":
+        total = query.order_by(None).count()
+    elif count == "estimate":
+        total = estimate_count(query)
+
+    if cursor:
+        key = tuple_(*order_by)
+        values = tuple_(*(
+            literal(value, column.type) for value, column in zip(decode_cursor(cursor, len(order_by)), order_by)
+        ))
+        query = query.filter(key < values if descending else key > values)
+
+    ordering = [column.desc() if descending else column.asc() for column in order_by]
+    rows = query.order_by(*ordering).limit(size + 1).all()
+
+    # The extra row only tells whether another page exists
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in order_by])
+
+    page_info = CursorPageInfo(size=size, total=total, total_is_estimate=count == "estimate")
+    return rows, page_info, next_cursor
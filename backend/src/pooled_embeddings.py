@@ -0,0 +1,50 @@
+from typing import List
+
+import requests
+from langchain_community.embeddings import OllamaEmbeddings
+
+from .clients import embedding_session
+from .config import HTTP_CONNECT_TIMEOUT, EMBEDDING_TIMEOUT
+from .metrics import track_stage
+
+
+class PooledOllamaEmbeddings(OllamaEmbeddings):
+    """OllamaEmbeddings over a shared keep-alive session, with timeouts.
+
+    The upstream class opens a new connection per text and waits forever
+    on a stuck server.
+    """
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with track_stage("embedding"):
+            return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with track_stage("embedding"):
+            return super().embed_query(text)
+
+    def _process_emb_response(self, input: str) -> List[float]:
+        headers = {
+            "Content-Type": "application/json",
+            **(self.headers or {}),
+        }
+
+        try:
+            res = embedding_session().post(
+                f"{self.base_url}/api/embeddings",
+                headers=headers,
+                json={"model": self.model, "prompt": input, **self._default_params},
+                timeout=(HTTP_CONNECT_TIMEOUT, EMBEDDING_TIMEOUT),
+            )
+        except requests.exceptions.RequestException as e:
+            raise ValueError(f"Error raised by inference endpoint: {e}")
+
+        if res.status_code != 200:
+            raise ValueError(
+                "Error raised by inference API HTTP code: %s, %s"
+                % (res.status_code, res.text)
+            )
+        try:
+            return res.json()["embedding"]
+        except requests.exceptions.JSONDecodeError as e:
+            raise ValueError(f"Error raised by inference API: {e}.\nResponse: {res.text}")
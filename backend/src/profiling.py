@@ -0,0 +1,215 @@
+import asyncio
+import itertools
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional, Set
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from .config import (
+    SERVER_TIMING_ENABLED,
+    PROFILE_EVERY_N_REQUESTS,
+    PROFILE_SLOW_MS,
+    PROFILE_INTERVAL_MS,
+    PROFILE_DIR,
+    EVENT_LOOP_MONITOR_INTERVAL_MS,
+)
+from .internal.dependencies import is_internal_caller
+from .metrics import Gauge, Histogram, RequestTimings, current_request_timings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+
+class StackSampler:
+    """Samples the Python stacks of a set of threads at a fixed interval.
+
+    Stacks are counted in the folded format ("outer;inner;leaf count"),
+    which flame graph tools (flamegraph.pl, speedscope) read directly.
+    `threads` may grow while sampling, as work moves to worker threads.
+    """
+
+    def __init__(self, threads: Set[int], interval: float):
+        self.threads = threads
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in list(self.threads):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.samples[_fold(frame)] += 1
+
+    def folded(self) -> Iterable[str]:
+        for stack, count in self.samples.most_common():
+            yield f"{stack} {count}"
+
+
+def _fold(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def server_timing_header(timings: RequestTimings, total: float) -> str:
+    """Server-Timing value: one entry per stage plus the total, durations in milliseconds."""
+    with timings._lock:
+        stages = sorted(timings.stages.items())
+    entries = [
+        f'{stage};desc="{calls} call{"s" if calls != 1 else ""}";dur={seconds * 1000:.1f}'
+        for stage, (seconds, calls) in stages
+    ]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def _write_profile(sampler: StackSampler, method: str, path: str, elapsed: float, directory: Path) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:80] or "root"
+    target = directory / f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{method}-{slug}-{elapsed * 1000:.0f}ms.folded"
+    target.write_text("\n".join(sampler.folded()) + "\n")
+    return target
+
+
+class ServerTimingMiddleware:
+    """Adds a Server-Timing header with per-stage durations and samples selected requests.
+
+    Stage time comes from `track_stage` and database statements, collected
+    through a context variable, so it includes work done in worker threads.
+    A request is profiled when it is the Nth one (`every_n`) or when an
+    internal caller sends "X-Profile: 1"; the profile is written to
+    `profile_dir` if the request took at least `slow_ms` (always, for the
+    header). Profiles cover the event loop thread, which other requests
+    share, plus the threads that ran this request's stages.
+    """
+
+    def __init__(
+        self,
+        app,
+        enabled: bool = SERVER_TIMING_ENABLED,
+        every_n: int = PROFILE_EVERY_N_REQUESTS,
+        slow_ms: float = PROFILE_SLOW_MS,
+        interval_ms: float = PROFILE_INTERVAL_MS,
+        profile_dir: Path = PROFILE_DIR,
+    ):
+        self.app = app
+        self.enabled = enabled
+        self.every_n = every_n
+        self.slow_ms = slow_ms
+        self.interval = interval_ms / 1000
+        self.profile_dir = Path(profile_dir)
+        self._requests = itertools.count(1)
+
+    def _requested_profile(self, scope) -> bool:
+        headers = Headers(scope=scope)
+        if headers.get(PROFILE_HEADER) != "1":
+            return False
+        client = scope.get("client")
+        return is_internal_caller(client[0] if client else None, headers.get("x-internal-token"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        forced = self._requested_profile(scope)
+        sampled = forced or (self.every_n > 0 and next(self._requests) % self.every_n == 0)
+        if not self.enabled and not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_request_timings.set(timings)
+        sampler: Optional[StackSampler] = None
+        if sampled:
+            timings.threads.add(threading.get_ident())
+            sampler = StackSampler(timings.threads, self.interval)
+            sampler.start()
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.enabled:
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing_header(timings, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_timings.reset(token)
+            if sampler is not None:
+                sampler.stop()
+                elapsed = time.perf_counter() - started
+                if forced or elapsed * 1000 >= self.slow_ms:
+                    try:
+                        target = await asyncio.to_thread(
+                            _write_profile, sampler, scope["method"], scope["path"], elapsed, self.profile_dir
+                        )
+                        logger.info(f"Wrote request profile {target}")
+                    except Exception as e:
+                        logger.error(f"Error writing request profile: {str(e)}")
+
+
+EVENT_LOOP_LAG = Histogram(
+    "aischool_event_loop_lag_seconds",
+    "How late the event loop woke a timer; sustained lag means handlers are blocking the loop.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+EVENT_LOOP_MAX_LAG = Gauge("aischool_event_loop_max_lag_seconds", "Largest event loop lag since the worker started.")
+
+
+class EventLoopMonitor:
+    """Measures event loop lag by timing a periodic sleep against its deadline."""
+
+    def __init__(self, interval_ms: float = EVENT_LOOP_MONITOR_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            deadline = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - deadline)
+            EVENT_LOOP_LAG.observe(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+                EVENT_LOOP_MAX_LAG.set(lag)
+
+
+event_loop_monitor = EventLoopMonitor()
@@ -0,0 +1,184 @@
+"""Compact codes for chunk embeddings and the first-pass search over them.
+
+Two schemes, both derived from the full-precision vector:
+
+- int8: each vector scaled so its largest component maps to 127 and rounded;
+  the per-vector scale is kept so scores stay comparable across rows. One
+  byte per dimension (4x smaller than float32), plus the codes' sign bits.
+- binary: one sign bit per dimension, packed eight to a byte (32x smaller).
+  Vectors are compared by Hamming distance.
+
+NumPy has no int8 matrix-vector kernel, so scoring every int8 code is no
+faster than exact float32 search. The int8 pass therefore ranks all rows
+by the Hamming distance of their sign bits (a uint64 popcount over 1/8 of
+the bytes) and only scores a shortlist with the int8 codes.
+
+Codes only pick candidates; callers rescore the best of them with the
+full-precision vectors.
+"""
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+QUANTIZATION_MODES = ("int8", "binary")
+
+# Set bits per byte, for packed codes whose width is not a multiple of 8 bytes
+_BYTE_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+# SWAR popcount masks for 64-bit words
+_M1, _M2, _M4, _H01 = (np.uint64(mask) for mask in (0x5555555555555555, 0x3333333333333333, 0x0F0F0F0F0F0F0F0F, 0x0101010101010101))
+# Rows scored with int8 codes after the sign-bit pass: at least this many, or count * factor
+INT8_SHORTLIST_MIN = 1024
+INT8_SHORTLIST_FACTOR = 32
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(codes, scales) with vectors[i] ~= codes[i] * scales[i]."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Sign bits of each vector, packed into dim / 8 bytes."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    return np.packbits(vectors > 0, axis=1)
+
+
+def _popcount64(words: np.ndarray) -> np.ndarray:
+    """Set bits in each uint64 (in place)."""
+    words -= (words >> np.uint64(1)) & _M1
+    words = (words & _M2) + ((words >> np.uint64(2)) & _M2)
+    words += words >> np.uint64(4)
+    words &= _M4
+    words *= _H01
+    words >>= np.uint64(56)
+    return words
+
+
+def hamming_distances(query_code: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Differing bits between one packed query code and each packed row."""
+    if codes.shape[1] % 8 == 0:
+        # Eight bytes per word: one XOR and a branch-free popcount per 64 bits
+        words = np.bitwise_xor(codes.view(np.uint64), query_code.view(np.uint64))
+        return _popcount64(words).sum(axis=1, dtype=np.int32)
+    return _BYTE_POPCOUNT[np.bitwise_xor(codes, query_code)].sum(axis=1, dtype=np.int32)
+
+
+def int8_scores(query_code: np.ndarray, codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Approximate dot products between one int8 query code and each row.
+
+    Rows are widened to float32 for BLAS; the integer sums stay exact there
+    (at most 768 * 127 * 127 < 2**24 for 768-dimension codes).
+    """
+    return codes.astype(np.float32) @ query_code.astype(np.float32) * scales
+
+
+def top_indices(scores: np.ndarray, count: int) -> np.ndarray:
+    """Indices of the `count` highest scores, best first."""
+    if count >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, count - 1)[:count]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def code_to_hex(code: np.ndarray) -> str:
+    """PostgREST literal for a bytea column."""
+    return "\\x" + code.tobytes().hex()
+
+
+def code_from_hex(value: str, dtype) -> np.ndarray:
+    return np.frombuffer(bytes.fromhex(value[2:] if value.startswith("\\x") else value), dtype=dtype)
+
+
+class QuantizedIndex:
+    """In-memory codes for every stored chunk, in one scheme.
+
+    Only the codes for `mode` are held: 1 byte per dimension plus a scale and
+    the sign bits for int8, 1 bit per dimension for binary. Rows are appended under a lock and
+    searches read a consistent snapshot, so ingestion and search can overlap.
+    """
+
+    def __init__(self, mode: str, dim: Optional[int] = None):
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode {mode!r}; expected one of {', '.join(QUANTIZATION_MODES)}")
+        self.mode = mode
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._positions = {}
+        self._codes = np.empty((0, 0), dtype=np.uint8 if mode == "binary" else np.int8)
+        self._scales = np.empty(0, dtype=np.float32)
+        self._signs = np.empty((0, 0), dtype=np.uint8)  # int8 only
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, row_id: str) -> bool:
+        return row_id in self._positions
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the codes (and int8 scales and sign bits)."""
+        return self._codes.nbytes + self._scales.nbytes + self._signs.nbytes
+
+    def encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """(codes, scales) for vectors in this index's scheme; binary codes have no scales."""
+        if self.mode == "binary":
+            return quantize_binary(vectors), None
+        return quantize_int8(vectors)
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray):
+        codes, scales = self.encode(vectors)
+        self.add_codes(ids, codes, scales)
+
+    def add_codes(self, ids: Sequence[str], codes: np.ndarray, scales: Optional[np.ndarray] = None):
+        """Add or replace rows from codes already in this index's scheme."""
+        if not len(ids):
+            return
+        codes = np.atleast_2d(codes)
+        scales = np.asarray(scales, dtype=np.float32) if self.mode == "int8" else np.empty(0, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = codes.shape[1] * (8 if self.mode == "binary" else 1)
+            # Copy-on-write: searches keep reading the arrays they started with
+            all_codes, all_scales = self._codes.reshape(-1, codes.shape[1]), self._scales
+            all_signs = self._signs.reshape(-1, (codes.shape[1] + 7) // 8)
+            replaced = [(row, self._positions[row_id]) for row, row_id in enumerate(ids) if row_id in self._positions]
+            if replaced:
+                all_codes, all_scales, all_signs = all_codes.copy(), all_scales.copy(), all_signs.copy()
+                for row, position in replaced:
+                    all_codes[position] = codes[row]
+                    if self.mode == "int8":
+                        all_scales[position] = scales[row]
+                        all_signs[position] = np.packbits(codes[row] > 0)
+            new_rows = [row for row, row_id in enumerate(ids) if row_id not in self._positions]
+            for row in new_rows:
+                self._positions[ids[row]] = len(self._ids)
+                self._ids.append(ids[row])
+            self._codes = np.concatenate([all_codes, codes[new_rows]])
+            if self.mode == "int8":
+                self._scales = np.concatenate([all_scales, scales[new_rows]])
+                self._signs = np.concatenate([all_signs, np.packbits(codes[new_rows] > 0, axis=1)])
+
+    def candidates(self, query: Sequence[float], count: int) -> List[str]:
+        """Ids of the `count` rows nearest the query by their codes, nearest first."""
+        with self._lock:
+            ids, codes, scales, signs = self._ids, self._codes, self._scales, self._signs
+        if not ids or count <= 0:
+            return []
+        query_code, _ = self.encode(np.asarray(query, dtype=np.float32))
+        if self.mode == "binary":
+            return [ids[i] for i in top_indices(-hamming_distances(query_code[0], codes), count)]
+
+        shortlist = np.arange(len(ids))
+        if len(ids) > max(count * INT8_SHORTLIST_FACTOR, INT8_SHORTLIST_MIN):
+            query_signs = np.packbits(query_code[0] > 0)
+            shortlist = top_indices(-hamming_distances(query_signs, signs), max(count * INT8_SHORTLIST_FACTOR, INT8_SHORTLIST_MIN))
+        scores = int8_scores(query_code[0], codes[shortlist], scales[shortlist])
+        return [ids[i] for i in shortlist[top_indices(scores, count)]]
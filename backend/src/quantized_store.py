@@ -0,0 +1,261 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import SupabaseVectorStore
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from supabase import Client
+
+from .config import VECTOR_QUANTIZATION, VECTOR_RESCORE_FACTOR, VECTOR_CODES_REFRESH_SECONDS
+from .exceptions import VectorDBError
+from .quantization import QuantizedIndex, code_from_hex, code_to_hex, quantize_binary, quantize_int8
+
+logger = logging.getLogger(__name__)
+
+# Rows per page when loading codes, and per request when fetching full-precision vectors
+LOAD_PAGE_SIZE = 1000
+FETCH_BATCH_SIZE = 100
+# A refresh re-reads rows created this long before the newest one loaded, for inserts that committed late
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+def code_columns(vectors: np.ndarray) -> List[Dict[str, Any]]:
+    """Both codes of each vector, as document_embeddings column values."""
+    int8_codes, scales = quantize_int8(vectors)
+    binary_codes = quantize_binary(vectors)
+    return [
+        {
+            "embedding_int8": code_to_hex(int8_codes[i]),
+            "embedding_int8_scale": float(scales[i]),
+            "embedding_binary": code_to_hex(binary_codes[i]),
+        }
+        for i in range(len(int8_codes))
+    ]
+
+
+def _vector(value: Any) -> List[float]:
+    # PostgREST returns pgvector columns as text, e.g. "[0.1,0.2]"
+    return json.loads(value) if isinstance(value, str) else value
+
+
+class QuantizedVectorStore(SupabaseVectorStore):
+    """Supabase vector store that searches compact codes held in memory.
+
+    Every chunk is stored with its full-precision embedding and both codes
+    (int8 and binary). Each worker keeps only the codes for `mode` in memory;
+    a search ranks them all by int8 dot product or Hamming distance, fetches
+    the full-precision vectors of the best `k * rescore_factor` candidates,
+    and returns the top `k` by exact cosine similarity.
+
+    Codes are loaded on the first search. Every `refresh_seconds` a
+    background thread fetches the codes of chunks that other workers
+    stored since (`created_at` past the newest loaded, less
+    REFRESH_OVERLAP), and compares the stored row count with the index to
+    catch deletions, which trigger a full reload. Searches keep using the
+    loaded codes meanwhile. Rows stored before quantization was enabled
+    get their codes written when first loaded.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        embedding: Embeddings,
+        table_name: str,
+        query_name: str,
+        mode: str = VECTOR_QUANTIZATION,
+        rescore_factor: int = VECTOR_RESCORE_FACTOR,
+        refresh_seconds: float = VECTOR_CODES_REFRESH_SECONDS,
+    ):
+        super().__init__(client=client, embedding=embedding, table_name=table_name, query_name=query_name)
+        self.mode = mode
+        self.rescore_factor = max(1, rescore_factor)
+        self.refresh_seconds = refresh_seconds
+        self.index = QuantizedIndex(mode)
+        self._load_lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._watermark: Optional[datetime] = None  # Newest created_at loaded
+
+    def add_vectors(self, vectors: List[List[float]], documents: List[Document], ids: List[str]) -> List[str]:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        rows = [
+            {
+                "id": row_id,
+                "content": document.page_content,
+                "embedding": vector,
+                "metadata": document.metadata,
+                **codes,
+            }
+            for row_id, document, vector, codes in zip(ids, documents, vectors, code_columns(matrix))
+        ]
+
+        id_list = []
+        for start in range(0, len(rows), self.chunk_size):
+            result = self._client.from_(self.table_name).upsert(rows[start:start + self.chunk_size]).execute()
+            if len(result.data) == 0:
+                raise VectorDBError("Error inserting: No rows added")
+            id_list.extend(str(row.get("id")) for row in result.data if row.get("id"))
+
+        self.index.add(ids, matrix)
+        return id_list
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self,
+        query: List[float],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        postgrest_filter: Optional[str] = None,
+        score_threshold: Optional[float] = None,
+    ) -> List[Tuple[Document, float]]:
+        if filter or postgrest_filter:
+            # Codes carry no metadata, so filtered searches stay in the database
+            return super().similarity_search_by_vector_with_relevance_scores(
+                query, k, filter=filter, postgrest_filter=postgrest_filter, score_threshold=score_threshold
+            )
+
+        self._ensure_loaded()
+        candidate_ids = self.index.candidates(query, k * self.rescore_factor)
+        rows = self._fetch_rows(candidate_ids)
+        if not rows:
+            return []
+
+        # Rescore with the full-precision vectors: cosine similarity, as match_documents reports
+        query_vector = np.asarray(query, dtype=np.float32)
+        vectors = np.array([_vector(row["embedding"]) for row in rows], dtype=np.float32)
+        norms = np.maximum(np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector), 1e-12)
+        scores = vectors @ query_vector / norms
+        results = [
+            (Document(page_content=rows[i]["content"], metadata=rows[i].get("metadata") or {}), float(scores[i]))
+            for i in np.argsort(-scores, kind="stable")[:k]
+            if rows[i].get("content")
+        ]
+        if score_threshold is not None:
+            results = [(doc, score) for doc, score in results if score >= score_threshold]
+        return results
+
+    def _fetch_rows(self, ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """Full rows, with their full-precision embeddings, for the given ids."""
+        rows = []
+        for start in range(0, len(ids), FETCH_BATCH_SIZE):
+            batch = ids[start:start + FETCH_BATCH_SIZE]
+            result = (
+                self._client.table(self.table_name)
+                .select("id, content, metadata, embedding")
+                .in_("id", batch)
+                .execute()
+            )
+            rows.extend(result.data)
+        return rows
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            # Only the first load makes searches wait
+            with self._load_lock:
+                if self._loaded_at is None:
+                    try:
+                        self.index = self._load_index()
+                    except Exception as e:
+                        logger.error(f"Error loading {self.mode} vector codes: {str(e)}")
+                        raise VectorDBError(f"Failed to load vector codes: {str(e)}")
+                    self._loaded_at = time.monotonic()
+            return
+        if time.monotonic() - self._loaded_at >= self.refresh_seconds and self._load_lock.acquire(blocking=False):
+            threading.Thread(target=self._refresh_in_background, name="vector-codes-refresh", daemon=True).start()
+
+    def _refresh_in_background(self):
+        """Runs with the load lock held; releases it when done."""
+        try:
+            self._refresh_index()
+        except Exception as e:
+            # Keep searching the codes already loaded; retry after another interval
+            logger.error(f"Error refreshing {self.mode} vector codes: {str(e)}")
+        finally:
+            self._loaded_at = time.monotonic()
+            self._load_lock.release()
+
+    def _code_columns(self) -> Tuple[str, str]:
+        """(column holding this mode's codes, columns to select for them)."""
+        if self.mode == "binary":
+            return "embedding_binary", "id, created_at, embedding_binary"
+        return "embedding_int8", "id, created_at, embedding_int8, embedding_int8_scale"
+
+    def _pages(self, columns: str, since: Optional[datetime] = None) -> Iterator[List[Dict[str, Any]]]:
+        start = 0
+        while True:
+            query = self._client.table(self.table_name).select(columns)
+            if since is not None:
+                # Range scan over the created_at index
+                query = query.gte("created_at", since.isoformat())
+            page = query.order("id").range(start, start + LOAD_PAGE_SIZE - 1).execute().data
+            yield page
+            if len(page) < LOAD_PAGE_SIZE:
+                return
+            start += LOAD_PAGE_SIZE
+
+    def _add_codes(self, index: QuantizedIndex, rows: List[Dict[str, Any]]) -> List[str]:
+        """Add rows' stored codes to the index; returns the ids of rows that have none yet."""
+        code_column, _ = self._code_columns()
+        dtype = np.uint8 if self.mode == "binary" else np.int8
+        with_codes = [row for row in rows if row.get(code_column) is not None]
+        if with_codes:
+            index.add_codes(
+                [str(row["id"]) for row in with_codes],
+                np.vstack([code_from_hex(row[code_column], dtype) for row in with_codes]),
+                np.array([row.get("embedding_int8_scale") for row in with_codes], dtype=np.float32) if self.mode == "int8" else None,
+            )
+        created = [datetime.fromisoformat(row["created_at"]) for row in rows if row.get("created_at")]
+        if created:
+            self._watermark = max([self._watermark, *created] if self._watermark else created)
+        return [str(row["id"]) for row in rows if row.get(code_column) is None]
+
+    def _load_index(self) -> QuantizedIndex:
+        index = QuantizedIndex(self.mode)
+        self._watermark = None
+        _, columns = self._code_columns()
+        missing = []
+        for page in self._pages(columns):
+            missing.extend(self._add_codes(index, page))
+        if missing:
+            self._backfill(index, missing)
+        logger.info(f"Loaded {len(index)} {self.mode} vector codes ({index.nbytes / 1024 / 1024:.1f} MB)")
+        return index
+
+    def _stored_count(self) -> int:
+        return self._client.table(self.table_name).select("id", count="exact").limit(1).execute().count or 0
+
+    def _refresh_index(self):
+        """Add the chunks other workers stored since the last load; reload when any were deleted."""
+        if self._watermark is None:
+            self.index = self._load_index()
+            return
+
+        _, columns = self._code_columns()
+        before = len(self.index)
+        missing = []
+        for page in self._pages(columns, since=self._watermark - REFRESH_OVERLAP):
+            missing.extend(self._add_codes(self.index, [row for row in page if str(row["id"]) not in self.index]))
+        if missing:
+            self._backfill(self.index, missing)
+        if len(self.index) > before:
+            logger.info(f"Added {len(self.index) - before} {self.mode} vector codes ({len(self.index)} total)")
+
+        # Fewer stored rows than loaded codes: some were deleted
+        if self._stored_count() < len(self.index):
+            self.index = self._load_index()
+
+    def _backfill(self, index: QuantizedIndex, ids: List[str]):
+        """Write codes for rows stored before quantization was enabled."""
+        logger.info(f"Writing vector codes for {len(ids)} stored chunks without them")
+        for start in range(0, len(ids), FETCH_BATCH_SIZE):
+            rows = self._fetch_rows(ids[start:start + FETCH_BATCH_SIZE])
+            if not rows:
+                continue
+            vectors = np.array([_vector(row["embedding"]) for row in rows], dtype=np.float32)
+            for row, vector, codes in zip(rows, vectors, code_columns(vectors)):
+                row.update(embedding=vector.tolist(), **codes)
+            self._client.table(self.table_name).upsert(rows).execute()
+            index.add([str(row["id"]) for row in rows], vectors)
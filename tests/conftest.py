@@ -0,0 +1,36 @@
+"""Shared test setup: puts backend/ on the path and points the settings at local
+stand-ins. Settings are read when `src` is first imported, so this runs first."""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{Path(tempfile.mkdtemp(prefix='aischool-tests-')) / 'test.db'}",
+    SUPABASE_URL="http://127.0.0.1:9",
+    SUPABASE_KEY="test.test.test",
+    SUPABASE_JWT_SECRET="test",
+    SECRET_KEY="test",
+    GROQ_API_KEY="test",
+)
+
+
+@pytest.fixture
+def db():
+    """A session on a fresh schema (SQLite)."""
+    from src.database.database import Base, SessionLocal, engine
+    from src.learning.chapter_catalog import chapter_catalog
+
+    Base.metadata.create_all(engine)
+    chapter_catalog.invalidate()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
@@ -0,0 +1,123 @@
+import threading
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from src.database.database import SessionLocal, engine
+from src.database.models import User, UserActivityCalendar
+from src.learning.activity_calendar import ActivityCalendar, load_calendar, record_activity
+
+DAY = date(2026, 3, 1)
+
+
+def days(*offsets: int):
+    return [DAY + timedelta(days=offset) for offset in offsets]
+
+
+def brute_force_longest(active) -> int:
+    longest = run = 0
+    previous = None
+    for day in sorted(active):
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+    return longest
+
+
+def test_marking_days_in_any_order_matches_a_day_by_day_count():
+    offsets = [5, 3, 4, 10, 0, 1, 11, 12, 13, 2, -2, -1]
+    calendar = ActivityCalendar()
+    marked = []
+    for offset in offsets:
+        assert calendar.mark(DAY + timedelta(days=offset))
+        marked.append(DAY + timedelta(days=offset))
+        assert calendar.longest_streak == brute_force_longest(marked)
+
+    assert calendar.start == DAY - timedelta(days=2)
+    assert not calendar.mark(DAY)  # Already active
+    assert calendar.active_days(DAY + timedelta(days=4), DAY + timedelta(days=12)) == days(4, 5, 10, 11, 12)
+
+
+def test_current_streak_counts_back_from_today_or_yesterday():
+    calendar = ActivityCalendar()
+    for day in days(0, 1, 2, 4, 5):
+        calendar.mark(day)
+
+    assert calendar.current_streak(DAY + timedelta(days=5)) == 2
+    assert calendar.current_streak(DAY + timedelta(days=6)) == 2  # Today not active yet
+    assert calendar.current_streak(DAY + timedelta(days=7)) == 0
+    assert calendar.current_streak(DAY + timedelta(days=2)) == 3
+    assert calendar.current_streak(DAY - timedelta(days=1)) == 0
+    assert ActivityCalendar().current_streak(DAY) == 0
+
+
+def test_bitmap_round_trips_through_bytes():
+    calendar = ActivityCalendar()
+    for day in days(0, 8, 9, 40, 365):
+        calendar.mark(day)
+
+    restored = ActivityCalendar(calendar.start, calendar.to_bytes(), calendar.longest_streak)
+
+    assert len(calendar.to_bytes()) == 46
+    assert restored.active_days(DAY, DAY + timedelta(days=400)) == days(0, 8, 9, 40, 365)
+    assert restored.longest_streak == 2
+
+
+def test_record_activity_stores_and_extends_the_calendar(db):
+    db.add(User(id="calendar-user", email="calendar@example.com", hashed_password="-"))
+    db.commit()
+
+    record_activity(db, "calendar-user", days(1, 2))
+    db.commit()
+    record_activity(db, "calendar-user", days(0, 2, 3))
+    db.commit()
+    record_activity(db, "calendar-user", [])
+
+    calendar = load_calendar(db, "calendar-user")
+    assert calendar.start == DAY
+    assert calendar.active_days(DAY, DAY + timedelta(days=10)) == days(0, 1, 2, 3)
+    assert calendar.longest_streak == 4
+    assert calendar.current_streak(DAY + timedelta(days=4)) == 4
+    assert db.get(UserActivityCalendar, "calendar-user").last_active_day == DAY + timedelta(days=3)
+    assert load_calendar(db, "nobody").start is None
+
+
+def test_concurrent_first_writes_for_a_user_both_land(db):
+    db.add(User(id="calendar-user", email="calendar@example.com", hashed_password="-"))
+    db.commit()
+    # Hold each writer after its calendar read until the other has read too (or a second passes),
+    # so both read before either has written when the code allows it
+    barrier = threading.Barrier(2)
+    errors = []
+
+    def meet(conn, cursor, statement, *args):
+        if statement.startswith("SELECT") and "FROM user_activity_calendars" in statement:
+            try:
+                barrier.wait(timeout=1)
+            except threading.BrokenBarrierError:
+                pass
+
+    def write(offsets):
+        session = SessionLocal()
+        try:
+            record_activity(session, "calendar-user", days(*offsets))
+            session.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    event.listen(engine, "after_cursor_execute", meet)
+    try:
+        writers = [threading.Thread(target=write, args=(offsets,)) for offsets in ((0, 1), (2,))]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+    finally:
+        event.remove(engine, "after_cursor_execute", meet)
+
+    assert errors == []
+    calendar = load_calendar(db, "calendar-user")
+    assert calendar.active_days(DAY, DAY + timedelta(days=10)) == days(0, 1, 2)
+    assert calendar.longest_streak == 3
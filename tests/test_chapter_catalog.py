@@ -0,0 +1,50 @@
+import asyncio
+import threading
+
+from src.database.database import AsyncSessionLocal, async_engine
+from src.database.models import Chapter
+from src.learning.chapter_catalog import chapter_catalog, notify_chapters_changed
+
+
+def seed(db, count: int):
+    db.add_all(Chapter(id=f"chapter-{i}", title=f"Chapter {i}", subject=f"subject-{i % 2}") for i in range(count))
+    db.commit()
+
+
+def test_catalog_reloads_after_version_bump(db):
+    seed(db, 3)
+    assert chapter_catalog.total_count(db) == 3
+
+    db.add(Chapter(id="chapter-new", title="New", subject="subject-0"))
+    db.commit()
+    chapter_catalog._checked_at = 0.0  # Skip the check interval
+    assert chapter_catalog.get(db, "chapter-new").subject == "subject-0"
+    assert "chapter-new" in chapter_catalog.chapter_ids(db, "subject-0")
+
+    notify_chapters_changed(db)
+    chapter_catalog._checked_at = 0.0
+    assert chapter_catalog.total_count(db) == 4
+
+
+def test_concurrent_cold_reads_through_run_sync_do_not_block_the_loop(db):
+    seed(db, 20)
+    chapter_catalog.invalidate()
+
+    async def read():
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(chapter_catalog.total_count)
+
+    async def main():
+        try:
+            return await asyncio.gather(*(read() for _ in range(10)))
+        finally:
+            await async_engine.dispose()
+
+    # A deadlocked loop can't time itself out, so run it in a thread and give up on it
+    results = []
+    worker = threading.Thread(target=lambda: results.append(asyncio.run(main())), daemon=True)
+    worker.start()
+    worker.join(timeout=20)
+
+    assert not worker.is_alive(), "event loop stalled on a cold catalog"
+    assert results == [[20] * 10]
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from src.learning.chunking import Chunk, stream_chunks
+
+SENTENCES = [
+    "Force is mass times acceleration.",
+    "A body at rest stays at rest unless a force acts on it!",
+    "Why does the Moon not fall to Earth?",
+    "Its sideways speed, which is large, keeps it in orbit.",
+]
+
+
+def document(paragraphs: int, seed: int = 0) -> str:
+    rng = np.random.default_rng(seed)
+    return "\n\n".join(
+        "\n".join(" ".join(rng.choice(SENTENCES, rng.integers(1, 4))) for _ in range(rng.integers(1, 3)))
+        for _ in range(paragraphs)
+    )
+
+
+def split_pages(text: str, size: int):
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("page_size", [37, 250, 10000])
+def test_chunks_point_back_into_the_joined_text(page_size):
+    text = document(30)
+    chunks = list(stream_chunks(split_pages(text, page_size), chunk_size=200, chunk_overlap=40))
+
+    assert chunks
+    for chunk in chunks:
+        assert text[chunk.start:chunk.end] == chunk.text
+        assert chunk.text == chunk.text.strip()
+        assert 0 < len(chunk.text) <= 200
+    # Every non-space character is in some chunk
+    covered = set()
+    for chunk in chunks:
+        covered.update(range(chunk.start, chunk.end))
+    assert all(i in covered for i, character in enumerate(text) if not character.isspace())
+
+
+def test_chunking_does_not_depend_on_page_boundaries():
+    text = document(30, seed=1)
+    whole = list(stream_chunks([text], chunk_size=300, chunk_overlap=60))
+
+    assert list(stream_chunks(split_pages(text, 41), chunk_size=300, chunk_overlap=60)) == whole
+
+
+def test_consecutive_chunks_overlap_by_at_most_the_overlap():
+    chunks = list(stream_chunks([document(30, seed=2)], chunk_size=200, chunk_overlap=50))
+
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous.start < chunk.start
+        assert previous.end < chunk.end
+        assert previous.end - chunk.start <= 50
+
+
+def test_chunks_end_on_the_best_boundary_in_reach():
+    text = "First paragraph line one.\nLine two.\n\nSecond paragraph that is a little longer than the rest."
+    chunks = list(stream_chunks([text], chunk_size=50, chunk_overlap=0))
+
+    assert chunks[0] == Chunk(text="First paragraph line one.\nLine two.", start=0, end=35)
+    assert chunks[1].text.startswith("Second paragraph")
+
+
+def test_text_without_separators_is_cut_at_the_chunk_size():
+    chunks = list(stream_chunks(["x" * 250], chunk_size=100, chunk_overlap=10))
+
+    assert [(chunk.start, chunk.end) for chunk in chunks] == [(0, 100), (90, 190), (180, 250)]
+
+
+def test_blank_pages_give_no_chunks():
+    assert list(stream_chunks(["", "  \n\n ", ""])) == []
+
+
+def test_overlap_must_be_smaller_than_the_chunk_size():
+    with pytest.raises(ValueError):
+        list(stream_chunks(["text"], chunk_size=100, chunk_overlap=100))
@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from src.database.database import SessionLocal
+from src.database.models import Chapter, LearningProgress, User
+from src.learning.cohort_analytics import CohortAnalytics
+
+
+def seed(db):
+    db.add_all(User(id=f"user-{i}", email=f"user{i}@example.com", hashed_password="-") for i in range(3))
+    db.add_all([
+        Chapter(id="chapter-a", title="A", subject="physics"),
+        Chapter(id="chapter-b", title="B", subject="maths"),
+    ])
+    db.add_all([
+        LearningProgress(user_id="user-0", chapter_id="chapter-a", completion_percentage=100.0, is_completed=True,
+                         test_attempts=1, highest_score=90.0, last_accessed_at=datetime.utcnow()),
+        LearningProgress(user_id="user-1", chapter_id="chapter-a", completion_percentage=40.0,
+                         test_attempts=1, highest_score=30.0, last_accessed_at=datetime.utcnow()),
+        LearningProgress(user_id="user-2", chapter_id="chapter-b", completion_percentage=10.0,
+                         last_accessed_at=datetime.utcnow() - timedelta(days=60)),
+    ])
+    db.commit()
+
+
+def stats_by_chapter(analytics, db):
+    return {stats.chapter_id: (stats.students, stats.completed, stats.average_completion) for stats in analytics.chapter_stats(db)}
+
+
+def test_incremental_refresh_updates_rows_in_a_new_snapshot(db):
+    seed(db)
+    analytics = CohortAnalytics(refresh_interval=0)
+    assert analytics.refresh(db) == 3
+    assert stats_by_chapter(analytics, db) == {"chapter-a": (2, 1, 70.0), "chapter-b": (1, 0, 10.0)}
+    published = analytics.completion
+
+    row = db.query(LearningProgress).filter_by(user_id="user-1").one()
+    row.completion_percentage, row.is_completed, row.updated_at = 100.0, True, datetime.utcnow() + timedelta(minutes=5)
+    db.add(LearningProgress(user_id="user-2", chapter_id="chapter-a", completion_percentage=20.0,
+                            test_attempts=1, highest_score=50.0, updated_at=datetime.utcnow() + timedelta(minutes=5)))
+    db.commit()
+
+    assert analytics.refresh(db) >= 2
+    assert analytics.size == 4
+    stats = stats_by_chapter(analytics, db)
+    assert stats["chapter-a"][:2] == (3, 2) and abs(stats["chapter-a"][2] - 220.0 / 3) < 1e-4
+    # The arrays a reader already held were not written to
+    assert sorted(published[:3].tolist()) == [10.0, 40.0, 100.0]
+
+    distribution = analytics.score_distribution(db, subject="physics")
+    assert distribution.attempted == 3
+    assert abs(distribution.average_score - (90.0 + 30.0 + 50.0) / 3) < 1e-4
+    at_risk = {student.user_id: student.reasons for student in analytics.at_risk_students(db)}
+    # user-2 came back to a new chapter; user-1 still averages a low score
+    assert list(at_risk) == ["user-1"]
+
+
+def test_ensure_fresh_loads_on_a_worker_thread(db):
+    seed(db)
+    analytics = CohortAnalytics(session_factory=SessionLocal, refresh_interval=60)
+
+    asyncio.run(analytics.ensure_fresh())
+
+    assert analytics.info().rows == 3
+    assert analytics.info().students == 3
+
+
+def test_refresh_after_an_empty_table_picks_up_new_rows(db):
+    analytics = CohortAnalytics(refresh_interval=0)
+    assert analytics.refresh(db) == 0
+    # Database clock in UTC, comparable with the changed-at values read later
+    assert analytics.watermark.tzinfo is not None
+
+    seed(db)
+    assert analytics.refresh(db) == 3
+    assert analytics.size == 3
+    assert analytics.watermark.tzinfo is not None and analytics.refreshed_at.tzinfo is not None
@@ -0,0 +1,124 @@
+import asyncio
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from src.exceptions import InferenceError
+from src.inference.batching import MicroBatcher
+from src.inference.client import InferenceClient
+from src.inference.embeddings import SidecarEmbeddings
+from src.inference.server import InferenceServer
+
+
+class PrefixedEmbeddings(Embeddings):
+    """Fake model that embeds the task prefix it would add, so queries and documents differ."""
+
+    def __init__(self):
+        self.document_calls: List[List[str]] = []
+
+    @staticmethod
+    def vector(text: str) -> List[float]:
+        return [float(len(text)), float(sum(map(ord, text)) % 997), 1.0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.document_calls.append(list(texts))
+        return [self.vector("search_document: " + text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if text == "fail":
+            raise ValueError("model error")
+        return self.vector("search_query: " + text)
+
+
+def test_embeddings_round_trip_through_the_sidecar():
+    model = PrefixedEmbeddings()
+    socket_path = str(Path(tempfile.mkdtemp(prefix="aischool-sidecar-")) / "inference.sock")
+    server = InferenceServer(socket_path, serve_tts=False, serve_embeddings=True, batch_size=8, batch_wait_ms=20, embeddings=model)
+
+    def use_client():
+        client = InferenceClient(socket_path, timeout=5)
+        embeddings = SidecarEmbeddings(client)
+        try:
+            results = {
+                "ping": client.ping(),
+                "documents": embeddings.embed_documents(["force", "motion"]),
+                "query": embeddings.embed_query("force"),
+                "empty": client.embed([]).shape,
+            }
+            with pytest.raises(InferenceError, match="model error"):
+                embeddings.embed_query("fail")
+            # Concurrent workers' requests are served on their own connections and batched together
+            threads = [threading.Thread(target=lambda i=i: embeddings.embed_documents([f"text {i}"])) for i in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            results["stats"] = client.call({"op": "stats"})[0]
+            return results
+        finally:
+            client.close()
+
+    async def scenario():
+        listener = await asyncio.start_unix_server(server._serve_connection, path=socket_path)
+        try:
+            return await asyncio.to_thread(use_client)
+        finally:
+            listener.close()
+            server.embedder.close()
+
+    results = asyncio.run(scenario())
+
+    assert results["ping"]["embeddings"] is True and results["ping"]["tts"] is False
+    assert results["documents"] == [model.vector("search_document: force"), model.vector("search_document: motion")]
+    assert results["query"] == model.vector("search_query: force")
+    assert results["empty"] == (0, 0)
+    # The query never went through embed_documents
+    assert model.document_calls[0] == ["force", "motion"]
+    assert all("force" not in call for call in model.document_calls[1:])
+    assert results["stats"]["embeddings"]["items"] == 2 + 1 + 6
+
+
+def test_micro_batcher_coalesces_concurrent_submissions():
+    started = threading.Event()
+    release = threading.Event()
+    batches = []
+
+    def run(items):
+        batches.append(list(items))
+        if len(batches) == 1:
+            started.set()
+            release.wait(5)
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(run, max_batch_size=10, max_wait_ms=50)
+    try:
+        first = batcher.submit([1])
+        started.wait(5)
+        # Queued while the first batch runs: they form the next batch together
+        waiting = [batcher.submit([value, value + 1]) for value in (2, 4, 6)]
+        time.sleep(0.05)
+        release.set()
+
+        assert first.result(5) == [10]
+        assert [future.result(5) for future in waiting] == [[20, 30], [40, 50], [60, 70]]
+        assert batches == [[1], [2, 3, 4, 5, 6, 7]]
+        assert (batcher.batches, batcher.items) == (2, 7)
+    finally:
+        batcher.close()
+
+
+def test_micro_batcher_fails_every_submission_in_a_failed_batch():
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=4, max_wait_ms=0)
+    try:
+        with pytest.raises(RuntimeError, match="returned 1 results for 2 items"):
+            batcher([1, 2])
+        assert batcher.batches == 0
+    finally:
+        batcher.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit([1])
@@ -0,0 +1,45 @@
+import asyncio
+import threading
+
+from src.learning.service import LearningService
+
+
+def test_building_one_component_does_not_block_another():
+    service = LearningService()
+    building, release = threading.Event(), threading.Event()
+
+    def slow():
+        building.set()
+        release.wait(timeout=10)
+        return "slow"
+
+    worker = threading.Thread(target=service._component, args=("slow", slow))
+    worker.start()
+    try:
+        assert building.wait(timeout=10)
+        assert service._component("fast", lambda: "fast") == "fast"
+    finally:
+        release.set()
+        worker.join()
+    assert service._component("slow", lambda: "rebuilt") == "slow"
+
+
+def test_components_are_built_off_the_event_loop():
+    built_on = []
+
+    class Service(LearningService):
+        @property
+        def embedder(self):
+            def create():
+                built_on.append(threading.get_ident())
+                return object()
+            return self._component("embedder", create)
+
+    async def main():
+        service = Service()
+        first = await service._ready("embedder")
+        return first, await service._ready("embedder"), threading.get_ident()
+
+    first, second, loop_thread = asyncio.run(main())
+    assert first is second
+    assert len(built_on) == 1 and built_on[0] != loop_thread
@@ -0,0 +1,136 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from benchmarks.fakes import FakeServices
+from src.learning.exceptions import LLMRejectedError
+from src.learning.llm_scheduler import LLMPriority, LLMScheduler
+
+
+def make_scheduler(concurrency: int = 4, requests_per_minute: int = 6000, tokens_per_minute: int = 600000, deadlines=None) -> LLMScheduler:
+    return LLMScheduler(
+        concurrency={priority: concurrency for priority in LLMPriority},
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        deadlines=deadlines,
+    )
+
+
+def test_waiters_are_admitted_in_priority_order():
+    async def scenario():
+        scheduler = make_scheduler()
+        scheduler._requests.tokens = 0  # Budget exhausted: everyone queues
+        admitted = []
+
+        async def call(priority: LLMPriority):
+            await scheduler.acquire(priority, 10)
+            admitted.append(priority)
+            scheduler.release(priority)
+
+        tasks = [asyncio.create_task(call(priority)) for priority in reversed(LLMPriority)]
+        await asyncio.gather(*tasks)
+        return admitted
+
+    assert asyncio.run(scenario()) == [LLMPriority.INTERACTIVE, LLMPriority.EXPLANATION, LLMPriority.BACKGROUND]
+
+
+def test_call_waits_for_the_token_budget_to_refill():
+    async def scenario():
+        scheduler = make_scheduler(tokens_per_minute=6000)  # 100 tokens a second
+        scheduler._tokens.tokens = 0
+        started = time.monotonic()
+        await scheduler.acquire(LLMPriority.INTERACTIVE, 30)
+        scheduler.release(LLMPriority.INTERACTIVE)
+        return time.monotonic() - started
+
+    assert 0.25 <= asyncio.run(scenario()) < 2
+
+
+def test_call_is_rejected_up_front_when_its_deadline_cannot_be_met():
+    async def scenario():
+        scheduler = make_scheduler(tokens_per_minute=600, deadlines={LLMPriority.BACKGROUND: 1.0})
+        scheduler._tokens.tokens = 0  # 10 tokens a second: 500 tokens is ~50 s away
+        await scheduler.acquire(LLMPriority.BACKGROUND, 500)
+
+    with pytest.raises(LLMRejectedError):
+        asyncio.run(scenario())
+
+
+def test_queued_call_expires_at_its_deadline():
+    async def scenario():
+        scheduler = make_scheduler(concurrency=1)
+        scheduler.stats[LLMPriority.INTERACTIVE].avg_service_time = 0.01  # Looks like a short wait
+        await scheduler.acquire(LLMPriority.INTERACTIVE, 10)
+        try:
+            with pytest.raises(LLMRejectedError):
+                await scheduler.acquire(LLMPriority.INTERACTIVE, 10, deadline=0.1)
+        finally:
+            scheduler.release(LLMPriority.INTERACTIVE)
+        return scheduler.stats[LLMPriority.INTERACTIVE]
+
+    stats = asyncio.run(scenario())
+    assert stats.rejected == 1 and stats.queued == 0 and stats.in_flight == 0
+
+
+def test_cancelled_waiter_is_skipped_without_spending_budget():
+    async def scenario():
+        scheduler = make_scheduler(concurrency=1)
+        await scheduler.acquire(LLMPriority.INTERACTIVE, 10)
+        waiter = asyncio.create_task(scheduler.acquire(LLMPriority.INTERACTIVE, 10))
+        await asyncio.sleep(0)
+        requests_before = scheduler._requests.tokens
+
+        # The caller goes away, and the slot frees up before its cancellation is handled
+        waiter.cancel()
+        scheduler.release(LLMPriority.INTERACTIVE)
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        stats = scheduler.stats[LLMPriority.INTERACTIVE]
+        assert stats.queued == 0 and stats.in_flight == 0
+        assert scheduler._requests.tokens >= requests_before
+
+        # The slot is still usable
+        await asyncio.wait_for(scheduler.acquire(LLMPriority.INTERACTIVE, 10), timeout=1)
+        scheduler.release(LLMPriority.INTERACTIVE)
+
+    asyncio.run(scenario())
+
+
+def test_calls_to_a_fake_llm_server_respect_class_concurrency():
+    fakes = FakeServices(llm_latency=0.05, answer_tokens=5).start()
+    try:
+        async def scenario():
+            scheduler = make_scheduler(concurrency=2)
+            running = {priority: 0 for priority in LLMPriority}
+            peak = dict(running)
+
+            def complete(priority: LLMPriority):
+                running[priority] += 1
+                peak[priority] = max(peak[priority], running[priority])
+                try:
+                    response = httpx.post(
+                        f"{fakes.url}/openai/v1/chat/completions",
+                        json={"model": "fake", "messages": [{"role": "user", "content": "Explain motion"}]},
+                    )
+                    return response.json()["choices"][0]["message"]["content"]
+                finally:
+                    running[priority] -= 1
+
+            answers = await asyncio.gather(*(
+                scheduler.run(priority, lambda priority=priority: complete(priority), estimated_tokens=100)
+                for priority in (LLMPriority.INTERACTIVE, LLMPriority.BACKGROUND)
+                for _ in range(6)
+            ))
+            return answers, peak, scheduler.snapshot()
+
+        answers, peak, snapshot = asyncio.run(scenario())
+    finally:
+        fakes.stop()
+
+    assert len(answers) == 12 and all(answers)
+    assert max(peak.values()) <= 2
+    assert all(stats["completed"] == (6 if name in ("interactive", "background") else 0) and stats["in_flight"] == 0
+               for name, stats in snapshot["classes"].items())
@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+import numpy as np
+
+from src.inference.batching import MicroBatcher
+from src.onnx_embeddings import OnnxEmbeddings
+
+
+def make_embeddings(batch_sizes):
+    """OnnxEmbeddings around a stand-in forward pass (the real one needs an exported model)."""
+    def forward(texts):
+        batch_sizes.append(len(texts))
+        time.sleep(0.02)
+        return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+    embeddings = OnnxEmbeddings.__new__(OnnxEmbeddings)
+    embeddings.batch_size = 4
+    embeddings.document_prefix = "search_document: "
+    embeddings.query_prefix = "search_query: "
+    embeddings.batcher = MicroBatcher(forward, max_batch_size=32, max_wait_ms=20, name="test-embeddings")
+    return embeddings
+
+
+def test_concurrent_async_queries_share_forward_passes():
+    batch_sizes = []
+    embeddings = make_embeddings(batch_sizes)
+
+    async def main():
+        return await asyncio.gather(*(embeddings.aembed_query("q" * i) for i in range(16)))
+
+    try:
+        vectors = asyncio.run(main())
+    finally:
+        embeddings.close()
+
+    assert [vector[0] for vector in vectors] == [len("search_query: ") + i for i in range(16)]
+    assert sum(batch_sizes) == 16
+    assert len(batch_sizes) < 16
+
+
+def test_async_documents_keep_order_across_split_submissions():
+    embeddings = make_embeddings([])
+    texts = ["chunk " + "x" * i for i in range(10)]
+    try:
+        vectors = asyncio.run(embeddings.aembed_documents(texts))
+        assert vectors == embeddings.embed_documents(texts)
+    finally:
+        embeddings.close()
+
+    assert [vector[0] for vector in vectors] == [len("search_document: " + text) for text in texts]
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg, psycopg2
+
+from src.database.models import Chapter, LearningProgress, User
+from src.exceptions import ValidationError
+from src.pagination import decode_cursor, encode_cursor, explain_statement, paginate_keyset
+
+USER_ID = "pagination-user"
+START = datetime(2026, 5, 1, 8, 0)
+
+
+def seed(db, count: int):
+    db.add(User(id=USER_ID, email="pages@example.com", hashed_password="-"))
+    db.add_all(Chapter(id=f"chapter-{i:02d}", title=f"Chapter {i}", subject="physics" if i % 2 else "maths") for i in range(count))
+    # Pairs of rows share a timestamp, so the id has to break ties
+    db.add_all(
+        LearningProgress(id=f"progress-{i:02d}", user_id=USER_ID, chapter_id=f"chapter-{i:02d}", last_accessed_at=START + timedelta(hours=i // 2))
+        for i in range(count)
+    )
+    db.commit()
+
+
+def subject_query(db):
+    return db.query(LearningProgress).filter(
+        LearningProgress.user_id == USER_ID,
+        LearningProgress.chapter_id.in_(["chapter-01", "chapter-03", "chapter-05"]),
+        LearningProgress.last_accessed_at >= START
+    )
+
+
+@pytest.mark.parametrize("dialect", [psycopg2.dialect(), asyncpg.dialect()], ids=["psycopg2", "asyncpg"])
+def test_explain_statement_inlines_in_lists_and_parameters(db, dialect):
+    sql = explain_statement(subject_query(db), dialect)
+
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "IN ('chapter-01', 'chapter-03', 'chapter-05')" in sql
+    assert "'pagination-user'" in sql and "2026-05-01" in sql
+    assert "POSTCOMPILE" not in sql and "$1" not in sql and "%(" not in sql
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_keyset_pages_cover_every_row_once(db, descending):
+    seed(db, 11)
+    query = db.query(LearningProgress).filter(LearningProgress.user_id == USER_ID)
+    order_by = [LearningProgress.last_accessed_at, LearningProgress.id]
+
+    seen, cursor = [], None
+    while True:
+        rows, page_info, cursor = paginate_keyset(query, order_by, cursor, size=4, descending=descending, count="exact")
+        assert page_info.total == 11
+        seen.extend(row.id for row in rows)
+        if cursor is None:
+            break
+
+    expected = [f"progress-{i:02d}" for i in range(11)]
+    assert seen == (expected[::-1] if descending else expected)
+
+
+def test_keyset_count_estimate_falls_back_to_exact_off_postgres(db):
+    seed(db, 6)
+    rows, page_info, cursor = paginate_keyset(subject_query(db), [LearningProgress.last_accessed_at, LearningProgress.id], size=2, count="estimate")
+
+    assert [row.id for row in rows] == ["progress-05", "progress-03"]
+    assert (page_info.total, page_info.total_is_estimate) == (3, False)
+    assert cursor is not None
+
+
+def test_cursor_round_trip_and_rejects_tampering():
+    cursor = encode_cursor([START, "progress-07"])
+    assert decode_cursor(cursor, 2) == [START, "progress-07"]
+    with pytest.raises(ValidationError):
+        decode_cursor(cursor, 3)
+    with pytest.raises(ValidationError):
+        decode_cursor("not a cursor!", 2)
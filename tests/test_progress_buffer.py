@@ -0,0 +1,138 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError
+
+from src.database.database import AsyncSessionLocal, async_engine
+from src.database.models import Chapter, LearningProgress, User
+from src.learning.progress_buffer import PendingProgress, ProgressWriteBuffer
+from src.learning.progress_service import ProgressService
+from src.learning.schemas import LearningProgressUpdate
+
+USER_ID = "buffer-user"
+
+
+def pending(**values) -> PendingProgress:
+    return PendingProgress(user_id=USER_ID, chapter_id="chapter-1", last_accessed_at=datetime(2026, 3, 1, 9), **values)
+
+
+def test_merge_keeps_the_latest_values_and_the_highest_completion():
+    entry = pending(completion_percentage=60.0, completed_sections=3)
+
+    entry.merge(LearningProgressUpdate(completion_percentage=40.0, completed_sections=2), datetime(2026, 3, 1, 10))
+    entry.merge(LearningProgressUpdate(is_completed=True), datetime(2026, 3, 1, 11))
+
+    assert entry.completion_percentage == 60.0
+    assert entry.completed_sections == 2
+    assert entry.is_completed is True
+    assert entry.last_accessed_at == datetime(2026, 3, 1, 11)
+
+
+def test_view_applies_pending_values_over_the_stored_row():
+    entry = pending(completion_percentage=75.0, base={"completion_percentage": 50.0, "completed_sections": 4, "is_completed": False})
+
+    view = entry.view()
+
+    assert view["completion_percentage"] == 75.0
+    assert view["completed_sections"] == 4  # Not pending: stored value shows through
+    assert view["last_accessed_at"] == datetime(2026, 3, 1, 9)
+
+
+def test_failed_flush_requeues_under_newer_updates():
+    buffer = ProgressWriteBuffer(apply=lambda session, batch: 0, enabled=False)
+    failed = pending(completion_percentage=80.0, completed_sections=5)
+    buffer._pending[(USER_ID, "chapter-1")] = newer = pending(completed_sections=6)
+    newer.last_accessed_at = datetime(2026, 3, 1, 12)
+
+    buffer._requeue([failed])
+
+    entry = buffer._pending[(USER_ID, "chapter-1")]
+
+    assert entry.completion_percentage == 80.0
+    assert entry.completed_sections == 6
+    assert entry.last_accessed_at == datetime(2026, 3, 1, 12)
+
+
+def test_an_entry_the_database_rejects_does_not_hold_back_the_rest():
+    written = []
+
+    def apply(session, batch):
+        if any(entry.chapter_id == "deleted" for entry in batch):
+            raise ValueError("foreign key violation")
+        written.extend(entry.chapter_id for entry in batch)
+        return len(batch)
+
+    async def scenario():
+        buffer = ProgressWriteBuffer(apply=apply, enabled=False, max_attempts=3)
+        counts = []
+        for attempt in range(3):
+            # The rejected entry is only added once; later flushes retry the requeued one
+            for chapter_id in ("chapter-1", "deleted", "chapter-2", "chapter-3") if attempt == 0 else ("chapter-1", "chapter-2", "chapter-3"):
+                buffer._pending[(USER_ID, chapter_id)] = PendingProgress(
+                    user_id=USER_ID, chapter_id=chapter_id, last_accessed_at=datetime(2026, 3, 1, 9), completion_percentage=50.0
+                )
+            counts.append((await buffer.flush(), len(buffer)))
+        return counts
+
+    counts = asyncio.run(scenario())
+
+    # The good entries are written on every flush; the rejected one is requeued, then dropped
+    assert counts == [(3, 1), (3, 1), (3, 0)]
+    assert sorted(written) == sorted(["chapter-1", "chapter-2", "chapter-3"] * 3)
+
+
+def test_an_unavailable_database_requeues_the_batch_without_counting_failures():
+    def apply(session, batch):
+        raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+    async def scenario():
+        buffer = ProgressWriteBuffer(apply=apply, enabled=False, max_attempts=1)
+        for chapter_id in ("chapter-1", "chapter-2"):
+            buffer._pending[(USER_ID, chapter_id)] = PendingProgress(
+                user_id=USER_ID, chapter_id=chapter_id, last_accessed_at=datetime(2026, 3, 1, 9)
+            )
+        written = [await buffer.flush() for _ in range(3)]
+        return written, buffer._pending
+
+    written, left = asyncio.run(scenario())
+
+    assert written == [0, 0, 0]
+    assert sorted(chapter_id for _, chapter_id in left) == ["chapter-1", "chapter-2"]
+    assert all(entry.failures == 0 for entry in left.values())
+
+
+def test_buffered_updates_are_coalesced_into_one_write(db):
+    db.add(User(id=USER_ID, email="buffer@example.com", hashed_password="-"))
+    db.add(Chapter(id="chapter-1", title="Chapter 1", subject="physics"))
+    db.commit()
+    ProgressService(db).update_progress(USER_ID, "chapter-1", LearningProgressUpdate(completion_percentage=10.0))
+    batches = []
+
+    def apply(session, batch):
+        batches.append([(entry.chapter_id, entry.completion_percentage, entry.completed_sections) for entry in batch])
+        return ProgressService(session).apply_pending_updates(batch)
+
+    async def scenario():
+        buffer = ProgressWriteBuffer(apply=apply, enabled=False, max_pending=100)
+        try:
+            async with AsyncSessionLocal() as session:
+                views = [
+                    await buffer.add(session, USER_ID, "chapter-1", LearningProgressUpdate(completion_percentage=percentage, completed_sections=sections))
+                    for percentage, sections in ((30.0, 1), (50.0, 2), (40.0, 3))
+                ]
+                missing = await buffer.add(session, USER_ID, "chapter-2", LearningProgressUpdate(completion_percentage=5.0))
+            written = await buffer.flush(user_id=USER_ID)
+            return views, missing, written, len(buffer)
+        finally:
+            # Connections belong to this event loop
+            await async_engine.dispose()
+
+    views, missing, written, left = asyncio.run(scenario())
+
+    assert [view["completion_percentage"] for view in views] == [30.0, 50.0, 50.0]
+    assert missing is None  # No row yet: the caller writes it through
+    assert (written, left) == (1, 0)
+    assert batches == [[("chapter-1", 50.0, 3)]]
+    db.expire_all()
+    row = db.query(LearningProgress).filter(LearningProgress.user_id == USER_ID).one()
+    assert (row.completion_percentage, row.completed_sections) == (50.0, 3)
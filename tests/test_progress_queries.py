@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import event
+
+from src.database.database import Base, engine
+from src.database.models import Chapter, User
+from src.learning.chapter_catalog import chapter_catalog
+from src.learning.progress_service import ProgressService
+from src.learning.schemas import LearningProgressUpdate, TestAttempt
+
+USER_ID = "query-count-user"
+
+
+@contextmanager
+def count_statements():
+    """Collect the SQL statements executed on the engine inside the block."""
+    statements: List[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def seed(db, chapters: int) -> ProgressService:
+    db.add(User(id=USER_ID, email="count@example.com", hashed_password="-"))
+    db.add_all(Chapter(id=f"chapter-{i}", title=f"Chapter {i}", subject=f"subject-{i % 3}") for i in range(chapters))
+    db.commit()
+    service = ProgressService(db)
+    for i in range(chapters):
+        service.update_progress(USER_ID, f"chapter-{i}", LearningProgressUpdate(
+            completion_percentage=float(i * 10 % 100),
+            is_completed=i % 2 == 0,
+            test_attempt=TestAttempt(
+                score=70.0, total_questions=10, correct_answers=7, questions_attempted=[], attempted_at=datetime(2026, 1, 1 + i)
+            ) if i % 3 == 0 else None,
+        ))
+    return service
+
+
+def summary_statements(db, chapters: int) -> List[str]:
+    service = seed(db, chapters)
+    service.get_user_progress_summary(USER_ID)  # Warm the chapter catalog
+    with count_statements() as statements:
+        summary = service.get_user_progress_summary(USER_ID)
+    assert summary.total_chapters == chapters
+    return statements
+
+
+def test_progress_summary_query_count_does_not_grow_with_chapters(db):
+    few = summary_statements(db, 3)
+    db.rollback()
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    chapter_catalog.invalidate()
+    many = summary_statements(db, 30)
+
+    assert len(few) == len(many)
+    assert len(many) <= 6, many
+
+
+def test_update_progress_query_count(db):
+    service = seed(db, 5)
+    with count_statements() as statements:
+        service.update_progress(USER_ID, "chapter-1", LearningProgressUpdate(completion_percentage=55.0))
+    # Locked previous row state, progress upsert, activity calendar insert-if-missing and locked read,
+    # user and subject rollup deltas
+    assert len(statements) <= 6, statements
+    assert not any("GROUP BY" in statement for statement in statements), "rollups re-aggregated on a write"
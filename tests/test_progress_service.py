@@ -0,0 +1,142 @@
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from src.database.database import SessionLocal, engine
+from src.database.models import Chapter, ChapterTestAttempt, LearningProgress, TestAttemptQuestion, User, UserProgressRollup
+from src.learning.progress_buffer import PendingProgress
+from src.learning.progress_rollups import check_rollups, rebuild_rollups
+from src.learning.progress_service import ProgressService
+from src.learning.schemas import LearningProgressUpdate, ProgressSyncItem, TestAttempt
+
+USER_ID = "progress-user"
+
+
+def seed(db) -> ProgressService:
+    db.add(User(id=USER_ID, email="progress@example.com", hashed_password="-"))
+    db.add(Chapter(id="chapter-1", title="Chapter 1", subject="physics"))
+    db.commit()
+    return ProgressService(db)
+
+
+def test_retried_test_attempt_is_recorded_once(db):
+    service = seed(db)
+    update = LearningProgressUpdate(
+        completion_percentage=100.0,
+        test_attempt=TestAttempt(
+            score=80.0, total_questions=2, correct_answers=1, attempted_at=datetime(2026, 3, 1, 9, 30),
+            questions_attempted=[{"question": "q1", "correct": True}, {"question": "q2", "correct": False}]
+        )
+    )
+
+    service.update_progress(USER_ID, "chapter-1", update)
+    progress = service.update_progress(USER_ID, "chapter-1", update)
+
+    assert progress.test_attempts == 1
+    assert progress.highest_score == 80.0
+    assert db.query(ChapterTestAttempt).count() == 1
+    assert [row.detail["question"] for row in db.query(TestAttemptQuestion).order_by(TestAttemptQuestion.position)] == ["q1", "q2"]
+
+
+def test_new_test_attempt_is_counted(db):
+    service = seed(db)
+    for hour, score in ((9, 60.0), (10, 90.0)):
+        progress = service.update_progress(USER_ID, "chapter-1", LearningProgressUpdate(
+            test_attempt=TestAttempt(
+                score=score, total_questions=1, correct_answers=1, attempted_at=datetime(2026, 3, 1, hour), questions_attempted=[]
+            )
+        ))
+
+    assert progress.test_attempts == 2
+    assert progress.highest_score == 90.0
+    assert db.query(ChapterTestAttempt).count() == 2
+
+
+def test_rollup_deltas_match_a_full_recompute(db):
+    service = seed(db)
+    db.add(Chapter(id="chapter-2", title="Chapter 2", subject="maths"))
+    db.commit()
+
+    service.update_progress(USER_ID, "chapter-1", LearningProgressUpdate(completion_percentage=40.0))
+    service.update_progress(USER_ID, "chapter-2", LearningProgressUpdate(completion_percentage=100.0, is_completed=True))
+    service.update_progress(USER_ID, "chapter-1", LearningProgressUpdate(
+        completion_percentage=30.0,
+        test_attempt=TestAttempt(score=50.0, total_questions=1, correct_answers=0, attempted_at=datetime(2026, 3, 2), questions_attempted=[])
+    ))
+    service.update_progress(USER_ID, "chapter-2", LearningProgressUpdate(is_completed=False))
+
+    # A long streak that restarts lowers the user's maximum
+    db.query(LearningProgress).filter_by(chapter_id="chapter-2").update({
+        "current_streak": 9, "longest_streak": 9, "last_streak_date": datetime.utcnow() - timedelta(days=5)
+    })
+    rebuild_rollups(db)
+    service.update_progress(USER_ID, "chapter-2", LearningProgressUpdate(completion_percentage=60.0))
+
+    service.sync_progress(USER_ID, [
+        ProgressSyncItem(chapter_id="chapter-1", client_timestamp=datetime.utcnow(), is_completed=True),
+        ProgressSyncItem(chapter_id="missing", client_timestamp=datetime.utcnow(), completion_percentage=10.0)
+    ])
+    service.apply_pending_updates([
+        PendingProgress(user_id=USER_ID, chapter_id="chapter-2", last_accessed_at=datetime.utcnow(), completion_percentage=80.0)
+    ])
+
+    assert check_rollups(db) == []
+    rollup = db.get(UserProgressRollup, USER_ID)
+    assert (rollup.chapters_started, rollup.completed_chapters, rollup.current_streak, rollup.longest_streak) == (2, 1, 1, 9)
+
+
+def test_rebuild_zeroes_rollups_of_users_without_progress(db):
+    service = seed(db)
+    service.update_progress(USER_ID, "chapter-1", LearningProgressUpdate(completion_percentage=40.0))
+    version = db.get(UserProgressRollup, USER_ID).version
+    db.query(LearningProgress).delete()
+    db.commit()
+
+    rebuild_rollups(db)
+
+    assert check_rollups(db) == []
+    db.expire_all()
+    rollup = db.get(UserProgressRollup, USER_ID)
+    assert (rollup.chapters_started, rollup.total_completion, rollup.last_activity_at) == (0, 0.0, None)
+    assert rollup.version > version
+
+
+def test_concurrent_first_writes_to_a_chapter_count_it_once(db):
+    seed(db)
+    # Hold each writer after its read of the stored row until the other has read too (or a second passes),
+    # so both see no row before either writes
+    barrier = threading.Barrier(2)
+    errors = []
+
+    def meet(conn, cursor, statement, *args):
+        if statement.startswith("SELECT") and "FROM learning_progress" in statement:
+            try:
+                barrier.wait(timeout=1)
+            except threading.BrokenBarrierError:
+                pass
+
+    def write(percentage):
+        session = SessionLocal()
+        try:
+            ProgressService(session).update_progress(USER_ID, "chapter-1", LearningProgressUpdate(completion_percentage=percentage))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    event.listen(engine, "after_cursor_execute", meet)
+    try:
+        writers = [threading.Thread(target=write, args=(percentage,)) for percentage in (30.0, 60.0)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+    finally:
+        event.remove(engine, "after_cursor_execute", meet)
+
+    assert errors == []
+    assert check_rollups(db) == []
+    rollup = db.get(UserProgressRollup, USER_ID)
+    assert rollup.chapters_started == 1
+    assert rollup.total_completion == db.query(LearningProgress).one().completion_percentage
@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from supabase import create_client
+
+from benchmarks.fakes import FakeServices
+from src.quantization import _BYTE_POPCOUNT, QuantizedIndex, hamming_distances, top_indices
+from src.quantized_store import QuantizedVectorStore
+
+DIM = 64
+
+
+def unit_vectors(count: int, dim: int = DIM, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.mark.parametrize("width", [16, 13])  # Whole uint64 words, and the byte table fallback
+def test_hamming_distances_match_a_bitwise_count(width):
+    rng = np.random.default_rng(1)
+    codes = rng.integers(0, 256, (50, width), dtype=np.uint8)
+    query = rng.integers(0, 256, width, dtype=np.uint8)
+
+    expected = _BYTE_POPCOUNT[np.bitwise_xor(codes, query)].sum(axis=1)
+    assert hamming_distances(query, codes).tolist() == expected.tolist()
+    assert hamming_distances(codes[3], codes)[3] == 0
+
+
+def test_int8_candidates_from_the_sign_bit_shortlist_match_exact_search():
+    documents = unit_vectors(3000, dim=768)
+    # Queries near stored chunks, as a question is near the passage that answers it
+    queries = documents[:20] + 0.05 * unit_vectors(20, dim=768, seed=2)
+    index = QuantizedIndex("int8")
+    index.add([str(i) for i in range(len(documents))], documents)
+    assert index._signs.shape == (3000, 768 // 8)  # Over the shortlist minimum, so the sign-bit pass runs
+
+    for query in queries:
+        exact = top_indices(documents @ query, 3)
+        candidates = [int(row_id) for row_id in index.candidates(query, 10)]
+        assert set(exact.tolist()) <= set(candidates)
+
+
+def test_binary_candidates_rank_by_hamming_distance():
+    documents = unit_vectors(100)
+    index = QuantizedIndex("binary")
+    index.add([str(i) for i in range(len(documents))], documents)
+
+    assert index.candidates(documents[42], 1) == ["42"]
+    assert index.nbytes == 100 * DIM // 8
+
+
+def test_add_codes_replaces_rows_without_touching_a_searched_snapshot():
+    documents = unit_vectors(4)
+    index = QuantizedIndex("int8")
+    index.add(["a", "b", "c"], documents[:3])
+    codes, signs = index._codes, index._signs
+
+    index.add(["b", "d"], documents[[3, 3]])
+
+    assert index.ids == ["a", "b", "c", "d"]
+    assert set(index.candidates(documents[3], 2)) == {"b", "d"}
+    # The arrays a search read before the write are unchanged
+    assert np.array_equal(codes[1], index.encode(documents[1:2])[0][0])
+    assert np.array_equal(signs[1], np.packbits(index.encode(documents[1:2])[0][0] > 0))
+    assert np.array_equal(index._signs[1], np.packbits(index._codes[1] > 0))
+
+
+@pytest.fixture
+def fakes():
+    services = FakeServices().start()
+    try:
+        yield services
+    finally:
+        services.stop()
+
+
+def make_store(fakes: FakeServices, mode: str) -> QuantizedVectorStore:
+    return QuantizedVectorStore(
+        client=create_client(fakes.url, "test.test.test"),
+        embedding=DeterministicFakeEmbedding(size=fakes.store.dim),
+        table_name="document_embeddings",
+        query_name="match_documents",
+        mode=mode,
+        rescore_factor=5,
+        refresh_seconds=0,
+    )
+
+
+def add_chunks(store: QuantizedVectorStore, vectors: np.ndarray, ids):
+    store.add_vectors(vectors.tolist(), [Document(page_content=f"chunk {row_id}") for row_id in ids], list(ids))
+
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_refresh_picks_up_chunks_another_worker_stored(fakes, mode):
+    vectors = unit_vectors(6, dim=fakes.store.dim)
+    searcher, ingester = make_store(fakes, mode), make_store(fakes, mode)
+    add_chunks(ingester, vectors[:4], ["a", "b", "c", "d"])
+    searcher._ensure_loaded()
+    assert len(searcher.index) == 4
+
+    add_chunks(ingester, vectors[4:], ["e", "f"])
+    searcher._refresh_index()
+
+    assert sorted(searcher.index.ids) == ["a", "b", "c", "d", "e", "f"]
+    results = searcher.similarity_search_by_vector_with_relevance_scores(vectors[5].tolist(), k=1)
+    assert results[0][0].page_content == "chunk f"
+
+
+def test_refresh_only_reads_rows_past_the_watermark(fakes):
+    vectors = unit_vectors(3, dim=fakes.store.dim)
+    searcher, ingester = make_store(fakes, "int8"), make_store(fakes, "int8")
+    add_chunks(ingester, vectors[:2], ["a", "b"])
+    # "a" was stored before the overlap window behind the newest loaded row, "b"
+    now = datetime.now(timezone.utc)
+    fakes.store.rows["a"]["created_at"] = (now - timedelta(hours=2)).isoformat()
+    fakes.store.rows["b"]["created_at"] = (now - timedelta(hours=1)).isoformat()
+    searcher._ensure_loaded()
+
+    add_chunks(ingester, vectors[2:], ["c"])
+    pages = []
+    load_pages = searcher._pages
+    searcher._pages = lambda columns, since=None: (pages.append(page) or page for page in load_pages(columns, since))
+    searcher._refresh_index()
+
+    assert [[row["id"] for row in page] for page in pages] == [["b", "c"]]
+    assert sorted(searcher.index.ids) == ["a", "b", "c"]
+
+
+def test_refresh_reloads_when_chunks_were_deleted(fakes):
+    vectors = unit_vectors(3, dim=fakes.store.dim)
+    searcher = make_store(fakes, "int8")
+    add_chunks(searcher, vectors, ["a", "b", "c"])
+    searcher._ensure_loaded()
+
+    fakes.store.delete("b")
+    searcher._refresh_index()
+
+    assert sorted(searcher.index.ids) == ["a", "c"]